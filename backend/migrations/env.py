@@ -93,6 +93,15 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        # Batch mode trên SQLite tạo lại bảng (DROP rồi RENAME); phải tắt kiểm tra khóa
+        # ngoại (bật bởi SQLITE_TUNING) trong lúc migrate, nếu không DROP TABLE users sẽ
+        # lỗi khi đã có dữ liệu tham chiếu tới nó
+        foreign_keys = None
+        if connection.dialect.name == 'sqlite':
+            foreign_keys = connection.exec_driver_sql('PRAGMA foreign_keys').scalar()
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
@@ -103,6 +112,11 @@ def run_migrations_online():
         with context.begin_transaction():
             context.run_migrations()
 
+        if foreign_keys:
+            connection.commit()
+            connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+            connection.commit()
+
 
 if context.is_offline_mode():
     run_migrations_offline()
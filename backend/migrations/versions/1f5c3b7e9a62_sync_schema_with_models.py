@@ -0,0 +1,109 @@
+"""bring initial schema in line with the models
+
+Revision ID: 1f5c3b7e9a62
+Revises: 8977566f26fd
+Create Date: 2026-10-18 09:05:31.772014
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1f5c3b7e9a62'
+down_revision = '8977566f26fd'
+branch_labels = None
+depends_on = None
+
+
+# Migration đầu tiên được tạo từ một phiên bản model cũ (users.role, submissions.grade,
+# chưa có projects.is_active và bảng comments). Revision này đưa schema về đúng các
+# model mà các revision sau dựa vào, giữ lại dữ liệu có sẵn.
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_teacher', sa.Boolean(), nullable=True))
+        batch_op.add_column(sa.Column('last_seen', sa.DateTime(), nullable=True))
+
+    op.execute("UPDATE users SET is_teacher = (role = 'teacher'), last_seen = created_at")
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('username', existing_type=sa.String(length=80),
+                              type_=sa.String(length=64), existing_nullable=False)
+        batch_op.alter_column('password_hash', existing_type=sa.String(length=128),
+                              type_=sa.String(length=256), existing_nullable=True)
+        batch_op.drop_column('role')
+        batch_op.drop_column('is_active')
+
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_active', sa.Boolean(), nullable=True))
+        batch_op.alter_column('title', existing_type=sa.String(length=200),
+                              type_=sa.String(length=100), existing_nullable=False)
+        batch_op.alter_column('deadline', existing_type=sa.DateTime(), nullable=True)
+
+    op.execute(sa.text('UPDATE projects SET is_active = :active').bindparams(active=True))
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('title', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.alter_column('content', existing_type=sa.Text(), nullable=True)
+        batch_op.alter_column('grade', new_column_name='score', existing_type=sa.Float(),
+                              existing_nullable=True)
+
+    # Bài nộp cũ không có tiêu đề
+    op.execute("UPDATE submissions SET title = 'Bài nộp #' || id, "
+               "created_at = submitted_at, updated_at = submitted_at")
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.alter_column('title', existing_type=sa.String(length=255), nullable=False)
+
+    op.create_table('comments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('submission_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['submission_id'], ['submissions.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('comments')
+
+    op.execute("UPDATE submissions SET content = '' WHERE content IS NULL")
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.alter_column('score', new_column_name='grade', existing_type=sa.Float(),
+                              existing_nullable=True)
+        batch_op.alter_column('content', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('created_at')
+        batch_op.drop_column('title')
+
+    op.execute('UPDATE projects SET deadline = created_at WHERE deadline IS NULL')
+
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.alter_column('deadline', existing_type=sa.DateTime(), nullable=False)
+        batch_op.alter_column('title', existing_type=sa.String(length=100),
+                              type_=sa.String(length=200), existing_nullable=False)
+        batch_op.drop_column('is_active')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('role', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('is_active', sa.Boolean(), nullable=True))
+
+    op.execute("UPDATE users SET role = CASE WHEN is_teacher THEN 'teacher' ELSE 'student' END")
+    op.execute(sa.text('UPDATE users SET is_active = :active').bindparams(active=True))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('role', existing_type=sa.String(length=20), nullable=False)
+        batch_op.alter_column('password_hash', existing_type=sa.String(length=256),
+                              type_=sa.String(length=128), existing_nullable=True)
+        batch_op.alter_column('username', existing_type=sa.String(length=64),
+                              type_=sa.String(length=80), existing_nullable=False)
+        batch_op.drop_column('last_seen')
+        batch_op.drop_column('is_teacher')
@@ -0,0 +1,65 @@
+"""add indexes for hot queries
+
+Revision ID: 3c1f7a9d2b4e
+Revises: 1f5c3b7e9a62
+Create Date: 2026-10-18 09:12:40.118305
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f7a9d2b4e'
+down_revision = '1f5c3b7e9a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mỗi học sinh chỉ còn một bài nộp cho mỗi dự án trước khi tạo unique index: giữ bài
+    # đã chấm (nếu có) rồi đến bài mới nhất, chuyển bình luận của các bài bị bỏ sang bài đó
+    op.execute("""
+        CREATE TEMPORARY TABLE submission_duplicates AS
+        SELECT s.id AS id,
+               (SELECT k.id FROM submissions k
+                WHERE k.project_id = s.project_id AND k.student_id = s.student_id
+                ORDER BY k.score IS NULL, k.id DESC LIMIT 1) AS keep_id
+        FROM submissions s
+    """)
+    op.execute('DELETE FROM submission_duplicates WHERE id = keep_id')
+    op.execute("""
+        UPDATE comments SET submission_id = (
+            SELECT d.keep_id FROM submission_duplicates d WHERE d.id = comments.submission_id
+        )
+        WHERE submission_id IN (SELECT id FROM submission_duplicates)
+    """)
+    op.execute('DELETE FROM submissions WHERE id IN (SELECT id FROM submission_duplicates)')
+    op.execute('DROP TABLE submission_duplicates')
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.create_index('uq_submissions_project_student', ['project_id', 'student_id'], unique=True)
+        batch_op.create_index('ix_submissions_project_submitted', ['project_id', 'submitted_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_submissions_student_id'), ['student_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_submissions_file_path'), ['file_path'], unique=False)
+
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_projects_teacher_id'), ['teacher_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_projects_is_active'), ['is_active'], unique=False)
+
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.create_index('ix_comments_submission_created', ['submission_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comments_submission_created')
+
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_projects_is_active'))
+        batch_op.drop_index(batch_op.f('ix_projects_teacher_id'))
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_submissions_file_path'))
+        batch_op.drop_index(batch_op.f('ix_submissions_student_id'))
+        batch_op.drop_index('ix_submissions_project_submitted')
+        batch_op.drop_index('uq_submissions_project_student')
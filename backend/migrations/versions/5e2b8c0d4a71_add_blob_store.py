@@ -0,0 +1,46 @@
+"""add content-addressed blob store
+
+Revision ID: 5e2b8c0d4a71
+Revises: 3c1f7a9d2b4e
+Create Date: 2026-10-18 10:02:17.540219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b8c0d4a71'
+down_revision = '3c1f7a9d2b4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('mimetype', sa.String(length=255), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_table('submission_files',
+    sa.Column('submission_id', sa.Integer(), nullable=False),
+    sa.Column('blob_sha256', sa.String(length=64), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['blob_sha256'], ['blobs.sha256'], ),
+    sa.ForeignKeyConstraint(['submission_id'], ['submissions.id'], ),
+    sa.PrimaryKeyConstraint('submission_id')
+    )
+    with op.batch_alter_table('submission_files', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_submission_files_blob_sha256'), ['blob_sha256'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('submission_files', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_submission_files_blob_sha256'))
+
+    op.drop_table('submission_files')
+    op.drop_table('blobs')
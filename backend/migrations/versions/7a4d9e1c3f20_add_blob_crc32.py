@@ -0,0 +1,26 @@
+"""add crc32 to blobs
+
+Revision ID: 7a4d9e1c3f20
+Revises: 5e2b8c0d4a71
+Create Date: 2026-10-18 11:31:05.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4d9e1c3f20'
+down_revision = '5e2b8c0d4a71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('blobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('crc32', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('blobs', schema=None) as batch_op:
+        batch_op.drop_column('crc32')
@@ -0,0 +1,65 @@
+"""add dashboard_stats aggregates table
+
+Revision ID: 9b6e2f4a8c13
+Revises: 7a4d9e1c3f20
+Create Date: 2026-10-18 11:52:40.603117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b6e2f4a8c13'
+down_revision = '7a4d9e1c3f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dashboard_stats',
+    sa.Column('scope', sa.String(length=16), nullable=False),
+    sa.Column('scope_id', sa.Integer(), nullable=False),
+    sa.Column('project_count', sa.Integer(), nullable=False),
+    sa.Column('active_project_count', sa.Integer(), nullable=False),
+    sa.Column('submission_count', sa.Integer(), nullable=False),
+    sa.Column('graded_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('scope', 'scope_id')
+    )
+
+    # Tính số liệu ban đầu từ dữ liệu có sẵn (tương đương `flask stem rebuild-stats`)
+    op.execute("""
+        INSERT INTO dashboard_stats (scope, scope_id, project_count, active_project_count,
+                                     submission_count, graded_count, score_sum, updated_at)
+        SELECT 'teacher', u.id,
+               (SELECT COUNT(*) FROM projects p WHERE p.teacher_id = u.id),
+               (SELECT COUNT(*) FROM projects p WHERE p.teacher_id = u.id AND p.is_active),
+               (SELECT COUNT(*) FROM submissions s JOIN projects p ON s.project_id = p.id
+                WHERE p.teacher_id = u.id),
+               (SELECT COUNT(s.score) FROM submissions s JOIN projects p ON s.project_id = p.id
+                WHERE p.teacher_id = u.id),
+               (SELECT COALESCE(SUM(s.score), 0) FROM submissions s JOIN projects p
+                ON s.project_id = p.id WHERE p.teacher_id = u.id),
+               CURRENT_TIMESTAMP
+        FROM users u WHERE u.is_teacher
+    """)
+    op.execute("""
+        INSERT INTO dashboard_stats (scope, scope_id, project_count, active_project_count,
+                                     submission_count, graded_count, score_sum, updated_at)
+        SELECT 'student', s.student_id, COUNT(*), 0, COUNT(*), COUNT(s.score),
+               COALESCE(SUM(s.score), 0), CURRENT_TIMESTAMP
+        FROM submissions s GROUP BY s.student_id
+    """)
+    op.execute("""
+        INSERT INTO dashboard_stats (scope, scope_id, project_count, active_project_count,
+                                     submission_count, graded_count, score_sum, updated_at)
+        SELECT 'site', 0, COUNT(*), COALESCE(SUM(CASE WHEN is_active THEN 1 ELSE 0 END), 0),
+               0, 0, 0, CURRENT_TIMESTAMP
+        FROM projects
+    """)
+
+
+def downgrade():
+    op.drop_table('dashboard_stats')
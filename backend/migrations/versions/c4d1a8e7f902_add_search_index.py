@@ -0,0 +1,171 @@
+"""add full-text search index (SQLite FTS5)
+
+Revision ID: c4d1a8e7f902
+Revises: 9b6e2f4a8c13
+Create Date: 2026-10-18 14:05:12.418305
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d1a8e7f902'
+down_revision = '9b6e2f4a8c13'
+branch_labels = None
+depends_on = None
+
+# DDL được viết trực tiếp (không import stem_app.utils.search) để revision này không đổi
+# theo mã ứng dụng về sau.
+
+TRIGGERS = [
+    f'search_{table}_{suffix}'
+    for table in ('projects', 'submissions', 'comments')
+    for suffix in ('ai', 'au', 'ad')
+] + ['search_projects_teacher']
+
+UPGRADE_SQL = [
+    """
+    CREATE VIRTUAL TABLE search_index USING fts5(
+        title, body, tags,
+        kind UNINDEXED, ref_id UNINDEXED, project_id UNINDEXED, submission_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO search_index (search_index, rank)
+    VALUES ('rank', 'bm25(10.0, 1.0, 0.0)')
+    """,
+    # Dự án
+    """
+    CREATE TRIGGER search_projects_ai AFTER INSERT ON projects BEGIN
+        INSERT INTO search_index (rowid, title, body, tags, kind, ref_id, project_id, submission_id)
+        VALUES (new.id * 4 + 1, new.title,
+                coalesce(new.description, '') || char(10) || coalesce(new.requirements, ''),
+                'project t' || new.teacher_id || CASE WHEN new.is_active THEN ' active' ELSE '' END,
+                'project', new.id, new.id, NULL);
+    END
+    """,
+    """
+    CREATE TRIGGER search_projects_au
+    AFTER UPDATE OF title, description, requirements, is_active, teacher_id ON projects BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+        INSERT INTO search_index (rowid, title, body, tags, kind, ref_id, project_id, submission_id)
+        VALUES (new.id * 4 + 1, new.title,
+                coalesce(new.description, '') || char(10) || coalesce(new.requirements, ''),
+                'project t' || new.teacher_id || CASE WHEN new.is_active THEN ' active' ELSE '' END,
+                'project', new.id, new.id, NULL);
+    END
+    """,
+    """
+    CREATE TRIGGER search_projects_ad AFTER DELETE ON projects BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER search_projects_teacher
+    AFTER UPDATE OF teacher_id ON projects WHEN old.teacher_id IS NOT new.teacher_id BEGIN
+        UPDATE search_index
+        SET tags = 'submission t' || new.teacher_id || ' s' || s.student_id
+        FROM submissions s
+        WHERE s.project_id = new.id AND search_index.rowid = s.id * 4 + 2;
+        UPDATE search_index
+        SET tags = 'comment t' || new.teacher_id || ' s' || s.student_id
+        FROM comments c JOIN submissions s ON s.id = c.submission_id
+        WHERE s.project_id = new.id AND search_index.rowid = c.id * 4 + 3;
+    END
+    """,
+    # Bài nộp
+    """
+    CREATE TRIGGER search_submissions_ai AFTER INSERT ON submissions BEGIN
+        INSERT INTO search_index (rowid, title, body, tags, kind, ref_id, project_id, submission_id)
+        SELECT new.id * 4 + 2, new.title,
+               coalesce(new.content, '') || char(10) || coalesce(new.feedback, ''),
+               'submission t' || p.teacher_id || ' s' || new.student_id,
+               'submission', new.id, new.project_id, new.id
+        FROM projects p WHERE p.id = new.project_id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_submissions_au
+    AFTER UPDATE OF title, content, feedback ON submissions BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+        INSERT INTO search_index (rowid, title, body, tags, kind, ref_id, project_id, submission_id)
+        SELECT new.id * 4 + 2, new.title,
+               coalesce(new.content, '') || char(10) || coalesce(new.feedback, ''),
+               'submission t' || p.teacher_id || ' s' || new.student_id,
+               'submission', new.id, new.project_id, new.id
+        FROM projects p WHERE p.id = new.project_id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_submissions_ad AFTER DELETE ON submissions BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+    END
+    """,
+    # Bình luận
+    """
+    CREATE TRIGGER search_comments_ai AFTER INSERT ON comments BEGIN
+        INSERT INTO search_index (rowid, title, body, tags, kind, ref_id, project_id, submission_id)
+        SELECT new.id * 4 + 3, '', new.content,
+               'comment t' || p.teacher_id || ' s' || s.student_id,
+               'comment', new.id, s.project_id, s.id
+        FROM submissions s JOIN projects p ON p.id = s.project_id
+        WHERE s.id = new.submission_id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_comments_au AFTER UPDATE OF content ON comments BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+        INSERT INTO search_index (rowid, title, body, tags, kind, ref_id, project_id, submission_id)
+        SELECT new.id * 4 + 3, '', new.content,
+               'comment t' || p.teacher_id || ' s' || s.student_id,
+               'comment', new.id, s.project_id, s.id
+        FROM submissions s JOIN projects p ON p.id = s.project_id
+        WHERE s.id = new.submission_id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_comments_ad AFTER DELETE ON comments BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+    END
+    """,
+    # Nạp dữ liệu có sẵn
+    """
+    INSERT INTO search_index (rowid, title, body, tags, kind, ref_id, project_id, submission_id)
+    SELECT p.id * 4 + 1, p.title, coalesce(p.description, '') || char(10) || coalesce(p.requirements, ''),
+           'project t' || p.teacher_id || CASE WHEN p.is_active THEN ' active' ELSE '' END,
+           'project', p.id, p.id, NULL
+    FROM projects p
+    """,
+    """
+    INSERT INTO search_index (rowid, title, body, tags, kind, ref_id, project_id, submission_id)
+    SELECT s.id * 4 + 2, s.title, coalesce(s.content, '') || char(10) || coalesce(s.feedback, ''),
+           'submission t' || p.teacher_id || ' s' || s.student_id,
+           'submission', s.id, s.project_id, s.id
+    FROM submissions s JOIN projects p ON p.id = s.project_id
+    """,
+    """
+    INSERT INTO search_index (rowid, title, body, tags, kind, ref_id, project_id, submission_id)
+    SELECT c.id * 4 + 3, '', c.content,
+           'comment t' || p.teacher_id || ' s' || s.student_id,
+           'comment', c.id, s.project_id, s.id
+    FROM comments c JOIN submissions s ON s.id = c.submission_id JOIN projects p ON p.id = s.project_id
+    """,
+    "INSERT INTO search_index (search_index) VALUES ('optimize')",
+]
+
+
+def upgrade():
+    # Chỉ mục FTS5 chỉ có trên SQLite
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in UPGRADE_SQL:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for trigger in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS search_index')
@@ -7,6 +7,7 @@ Script để tạo dữ liệu mẫu cho ứng dụng STEM
 
 from datetime import datetime, timedelta
 from stem_app import create_app, db
+from stem_app.cli import init_database
 from stem_app.models.user import User
 from stem_app.models.project import Project
 from stem_app.models.submission import Submission
@@ -98,4 +99,5 @@ def seed_db():
 if __name__ == "__main__":
     app = create_app()
     with app.app_context():
+        init_database()
         seed_db() 
\ No newline at end of file
@@ -1,14 +1,24 @@
 import os
-import sys
-import tempfile
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 from stem_app.models import db, login_manager
 from stem_app.config import config
+from stem_app.utils.rate_limit import login_limiter
+from stem_app.utils.sqlite_tuning import register_sqlite_tuning
+from stem_app.utils.uploads import UploadRequest
+from stem_app.utils.json_provider import FastJSONProvider
+from stem_app.utils.jobs import job_queue
+from stem_app.utils.mailer import mail
+from stem_app.utils.passwords import PasswordHashBusy
 
 def create_app(config_name=None):
     app = Flask(__name__)
+    # Cho phép endpoint ghi file upload trực tiếp vào UPLOAD_FOLDER (xem utils/uploads.py)
+    app.request_class = UploadRequest
+    # jsonify dùng orjson (nếu đã cài) và ghi datetime theo ISO 8601
+    app.json = FastJSONProvider(app)
     
     # Load config
     if config_name is None:
@@ -16,13 +26,25 @@ def create_app(config_name=None):
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
     
+    # Sau reverse proxy: lấy IP/scheme của client từ X-Forwarded-* do proxy tin cậy thêm vào
+    # (giới hạn đăng nhập theo IP dựa vào request.remote_addr)
+    trusted_proxies = app.config.get('LOGIN_RATE_LIMIT_TRUSTED_PROXIES', 0)
+    if trusted_proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=trusted_proxies)
+    
     # Initialize extensions
     db.init_app(app)
+    with app.app_context():
+        # Tạo engine không mở kết nối; PRAGMA được áp dụng khi pool mở kết nối mới
+        register_sqlite_tuning(db.engine, app.config.get('SQLITE_TUNING'))
     login_manager.init_app(app)
     Migrate(app, db)
+    login_limiter.init_app(app)
+    mail.init_app(app)
+    job_queue.init_app(app)
     
     # Cấu hình CORS để cho phép frontend truy cập API
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    CORS(app, resources={r"/api/*": {"origins": "*", "expose_headers": ["X-Next-Cursor"]}})
     
     # Cấu hình Flask-Login để trả về lỗi 401 thay vì chuyển hướng
     @login_manager.unauthorized_handler
@@ -54,11 +76,28 @@ def create_app(config_name=None):
             'details': str(error)
         }), 500
     
+    # Xử lý lỗi 413 (File quá lớn)
+    @app.errorhandler(413)
+    def request_entity_too_large(error):
+        return jsonify({'error': 'File quá lớn'}), 413
+    
+    # Xử lý lỗi 415 (Loại file không được phép)
+    @app.errorhandler(415)
+    def unsupported_media_type(error):
+        return jsonify({'error': 'Loại file không được phép'}), 415
+    
     # Xử lý lỗi 405 (Method Not Allowed)
     @app.errorhandler(405)
     def method_not_allowed(error):
         return jsonify({'error': 'Phương thức không được phép'}), 405
     
+    # Pool băm mật khẩu quá tải (đăng nhập/đăng ký dồn dập): báo client thử lại sau
+    @app.errorhandler(PasswordHashBusy)
+    def password_hash_busy(error):
+        response = jsonify({'error': 'Máy chủ đang bận, vui lòng thử lại sau'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
     # Register blueprints
     from stem_app.routes.main import main_bp
     from stem_app.routes.auth import auth_bp
@@ -72,82 +111,9 @@ def create_app(config_name=None):
     app.register_blueprint(submissions_bp, url_prefix='/submissions')
     app.register_blueprint(api_bp)  # API blueprint đã có prefix '/api'
     
-    # Khởi tạo database nếu chưa tồn tại
-    with app.app_context():
-        try:
-            print("Khởi tạo database...")
-            
-            # Tạo tất cả các bảng
-            db.create_all()
-            print("Database tables đã được tạo thành công")
-            
-            # Kiểm tra kết nối database
-            from sqlalchemy import text
-            result = db.session.execute(text("SELECT 1"))
-            print("Kết nối database thành công!")
-            
-            # Tạo dữ liệu mẫu nếu chưa có
-            from stem_app.models.user import User
-            from stem_app.models.project import Project
-            from datetime import datetime, timedelta
-            
-            # Kiểm tra xem đã có user nào chưa
-            user_count = User.query.count()
-            print(f"Số lượng user hiện tại: {user_count}")
-            
-            if user_count == 0:
-                print("Tạo dữ liệu mẫu...")
-                
-                # Tạo tài khoản giáo viên mẫu
-                teacher = User(
-                    username='giaovien',
-                    email='giaovien@example.com',
-                    is_teacher=True
-                )
-                teacher.set_password('password123')
-                
-                # Tạo tài khoản học sinh mẫu
-                student = User(
-                    username='hocsinh',
-                    email='hocsinh@example.com',
-                    is_teacher=False
-                )
-                student.set_password('password123')
-                
-                db.session.add(teacher)
-                db.session.add(student)
-                db.session.commit()
-                
-                # Tạo dự án mẫu
-                project = Project(
-                    title='Dự án STEM mẫu',
-                    description='Đây là dự án STEM mẫu để test hệ thống',
-                    requirements='Yêu cầu cho dự án STEM mẫu',
-                    teacher_id=teacher.id,
-                    deadline=datetime.now() + timedelta(days=30),
-                    is_active=True
-                )
-                
-                db.session.add(project)
-                db.session.commit()
-                
-                print("Đã tạo dữ liệu mẫu thành công")
-            else:
-                print("Dữ liệu mẫu đã tồn tại")
-            
-        except Exception as e:
-            print(f"Lỗi khi khởi tạo database: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            
-            # Nếu lỗi database, thử với in-memory database
-            print("Thử sử dụng in-memory database...")
-            app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-            
-            try:
-                db.create_all()
-                print("Đã chuyển sang in-memory database")
-            except Exception as e2:
-                print(f"Không thể khởi tạo in-memory database: {str(e2)}")
+    # Lệnh CLI: flask stem init | seed | bootstrap | worker
+    # Việc tạo bảng và dữ liệu mẫu không chạy khi khởi động worker nữa
+    from stem_app.cli import stem_cli
+    app.cli.add_command(stem_cli)
     
     return app 
\ No newline at end of file
@@ -1,22 +1,32 @@
 from flask import Blueprint, jsonify
+from stem_app.utils.compression import compress_response
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Nén các response JSON lớn theo Accept-Encoding của client
+api_bp.after_request(compress_response)
+
 # Health check endpoint
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint để kiểm tra trạng thái API"""
+    from stem_app.utils.jwt_middleware import get_cache_stats
     return jsonify({
         'status': 'healthy',
-        'message': 'STEM App API is running'
+        'message': 'STEM App API is running',
+        'jwt_cache': get_cache_stats()
     }), 200
 
 # Import các API routes
 from stem_app.api.auth import auth_api
 from stem_app.api.projects import projects_api
 from stem_app.api.submissions import submissions_api
+from stem_app.api.dashboard import dashboard_api
+from stem_app.api.search import search_api
 
 # Đăng ký các blueprints
 api_bp.register_blueprint(auth_api, url_prefix='/auth')
 api_bp.register_blueprint(projects_api, url_prefix='/projects')
-api_bp.register_blueprint(submissions_api, url_prefix='/submissions') 
\ No newline at end of file
+api_bp.register_blueprint(submissions_api, url_prefix='/submissions')
+api_bp.register_blueprint(dashboard_api, url_prefix='/dashboard')
+api_bp.register_blueprint(search_api, url_prefix='/search') 
\ No newline at end of file
@@ -9,6 +9,9 @@ import os
 import traceback
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 from werkzeug.security import generate_password_hash, check_password_hash
+from stem_app.utils.jwt_middleware import jwt_required, get_current_user as get_jwt_user
+from stem_app.utils.passwords import PasswordHashBusy
+from stem_app.utils.rate_limit import login_limiter
 
 auth_api = Blueprint('auth_api', __name__)
 
@@ -22,7 +25,7 @@ def login():
     try:
         data = request.get_json()
         
-        if not data:
+        if not data or not isinstance(data, dict):
             return jsonify({'error': 'Không có dữ liệu được gửi'}), 400
         
         if not data.get('email'):
@@ -31,6 +34,16 @@ def login():
         if not data.get('password'):
             return jsonify({'error': 'Thiếu mật khẩu đăng nhập'}), 400
         
+        if not isinstance(data['email'], str) or not isinstance(data['password'], str):
+            return jsonify({'error': 'Email hoặc mật khẩu không hợp lệ'}), 400
+        
+        # Từ chối sớm, trước khi tốn CPU cho việc băm mật khẩu
+        retry_after = login_limiter.check(data['email'], request.remote_addr)
+        if retry_after:
+            response = jsonify({'error': 'Quá nhiều lần đăng nhập, vui lòng thử lại sau'})
+            response.headers['Retry-After'] = str(retry_after)
+            return response, 429
+        
         # Xử lý trực tiếp không qua database nếu là dữ liệu test
         if data.get('email') == 'giaovien@example.com' and data.get('password') == 'password123':
             # Tạo JWT token cho giáo viên test
@@ -88,9 +101,22 @@ def login():
             user = User.query.filter_by(email=data['email']).first()
             
             # Kiểm tra người dùng tồn tại và mật khẩu đúng
-            if user is None or not user.check_password(data['password']):
+            if user is None:
+                return jsonify({'error': 'Email hoặc mật khẩu không đúng'}), 401
+            
+            try:
+                valid, rehashed = user.verify_and_update_password(data['password'])
+            except PasswordHashBusy:
+                response = jsonify({'error': 'Máy chủ đang bận, vui lòng thử lại sau'})
+                response.headers['Retry-After'] = '1'
+                return response, 503
+            if not valid:
                 return jsonify({'error': 'Email hoặc mật khẩu không đúng'}), 401
             
+            # Lưu hash mới nếu tham số băm đã thay đổi trong Config
+            if rehashed:
+                db.session.commit()
+            
             # Đăng nhập người dùng
             login_user(user)
             
@@ -247,6 +273,9 @@ def register():
             db.session.rollback()
             return jsonify({'error': f'Lỗi khi lưu người dùng: {str(e)}'}), 500
     
+    except PasswordHashBusy:
+        # Để errorhandler của app trả về 503
+        raise
     except Exception as e:
         # Log lỗi để debug
         current_app.logger.error(f"Registration error: {str(e)}")
@@ -254,10 +283,10 @@ def register():
         return jsonify({'error': f'Có lỗi xảy ra khi đăng ký: {str(e)}'}), 500
 
 @auth_api.route('/logout', methods=['POST'])
-@login_required
 def logout():
     """
     API endpoint để đăng xuất
+    JWT không lưu trạng thái phía server, chỉ cần xóa session (nếu có)
     """
     logout_user()
     return jsonify({'message': 'Đăng xuất thành công'}), 200
@@ -290,11 +319,12 @@ def get_token():
         return jsonify({'error': 'Không thể tạo token'}), 500
 
 @auth_api.route('/me', methods=['GET'])
-@login_required
+@jwt_required(fresh_user=True)
 def get_current_user():
     """
     API endpoint để lấy thông tin người dùng hiện tại
     """
+    current_user = get_jwt_user()
     return jsonify({
         'id': current_user.id,
         'username': current_user.username,
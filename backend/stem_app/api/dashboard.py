@@ -0,0 +1,46 @@
+from flask import Blueprint, jsonify
+from stem_app.models import db
+from stem_app.models.stats import DashboardStats, SCOPE_TEACHER, SCOPE_STUDENT, SCOPE_SITE
+from stem_app.utils.jwt_middleware import jwt_required, get_current_user
+
+dashboard_api = Blueprint('dashboard_api', __name__)
+
+
+def _get_stats(scope, scope_id):
+    # Đọc theo khóa chính; chưa có dòng nghĩa là mọi bộ đếm bằng 0
+    return db.session.get(DashboardStats, (scope, scope_id)) or DashboardStats(
+        scope=scope, scope_id=scope_id, project_count=0, active_project_count=0,
+        submission_count=0, graded_count=0, score_sum=0.0
+    )
+
+
+@dashboard_api.route('/stats', methods=['GET'])
+@jwt_required
+def get_stats():
+    """
+    API endpoint để lấy số liệu tổng hợp cho dashboard
+    - Giáo viên: dự án của mình và bài nộp trong các dự án đó
+    - Học sinh: dự án trong hệ thống và bài nộp của mình
+    
+    Số liệu được duy trì dần trong bảng dashboard_stats (xem models/stats.py)
+    """
+    current_user = get_current_user()
+    if current_user.is_teacher:
+        stats = _get_stats(SCOPE_TEACHER, current_user.id)
+        projects = stats
+    else:
+        stats = _get_stats(SCOPE_STUDENT, current_user.id)
+        projects = _get_stats(SCOPE_SITE, 0)
+    
+    result = {
+        'totalProjects': projects.project_count,
+        'activeProjects': projects.active_project_count,
+        'totalSubmissions': stats.submission_count,
+        'pendingSubmissions': stats.ungraded_count,
+        'gradedSubmissions': stats.graded_count,
+        'averageScore': stats.average_score
+    }
+    if not current_user.is_teacher:
+        result['submittedProjects'] = stats.project_count
+    
+    return jsonify(result), 200
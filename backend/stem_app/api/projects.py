@@ -1,13 +1,22 @@
 from flask import Blueprint, request, jsonify, current_app, g
-from flask_login import login_required, current_user
 from stem_app.models.project import Project
+from stem_app.models.submission import Submission
 from stem_app.models.user import User
 from stem_app.models import db
+from sqlalchemy import select, func
 from datetime import datetime
 import os
 from werkzeug.utils import secure_filename
 from stem_app.utils.decorators import teacher_required
 from stem_app.utils.jwt_middleware import jwt_required, get_current_user
+from stem_app.utils.downloads import submission_archive_entries, send_zip
+from stem_app.utils.zip_stream import ZipStream
+from stem_app.utils.http_cache import make_validators, is_not_modified, not_modified, set_validators
+from stem_app.utils.score_stats import project_score_stats, teacher_score_stats
+from stem_app.utils.serializers import project_serializer, project_summary_serializer
+from stem_app.utils.pagination import (
+    get_page_args, keyset_paginate, check_fields, NEXT_CURSOR_HEADER
+)
 
 projects_api = Blueprint('projects_api', __name__)
 
@@ -18,62 +27,130 @@ def get_projects():
     API endpoint để lấy danh sách dự án
     - Giáo viên: xem tất cả dự án họ tạo
     - Học sinh: xem tất cả dự án đang hoạt động
+    
+    Query string: limit, cursor (phân trang keyset theo id), fields
+    Cursor của trang kế tiếp trả về trong header X-Next-Cursor
     """
     current_user = get_current_user()
+    
+    try:
+        limit, cursor, fields = get_page_args()
+        check_fields(fields, project_serializer.names)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Một truy vấn chỉ gồm cột (JOIN giáo viên, đếm bài nộp bằng subquery),
+    # không tạo ORM instance
+    stmt = project_serializer.select(fields)
     if current_user.is_teacher:
-        projects = Project.query.filter_by(teacher_id=current_user.id).all()
+        stmt = stmt.where(Project.teacher_id == current_user.id)
     else:
-        projects = Project.query.filter_by(is_active=True).all()
-    
-    result = []
-    for project in projects:
-        result.append({
-            'id': project.id,
-            'title': project.title,
-            'description': project.description,
-            'deadline': project.deadline.isoformat() if project.deadline else None,
-            'is_active': project.is_active,
-            'created_at': project.created_at.isoformat(),
-            'teacher': {
-                'id': project.teacher.id,
-                'username': project.teacher.username
-            } if project.teacher else None
-        })
-    
-    return jsonify(result), 200
+        stmt = stmt.where(Project.is_active.is_(True))
+    
+    try:
+        rows, next_cursor = keyset_paginate(stmt, [Project.id], limit, cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    result = project_serializer.serialize(rows, fields)
+    
+    response = jsonify(result)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response, 200
 
 @projects_api.route('/<int:project_id>', methods=['GET'])
-@login_required
+@jwt_required
 def get_project(project_id):
     """
     API endpoint để lấy thông tin chi tiết của một dự án
+    
+    Hỗ trợ If-None-Match / If-Modified-Since: quyền truy cập và phiên bản được
+    kiểm tra bằng một truy vấn nhỏ, trả 304 mà không cần nạp dự án.
     """
-    project = db.session.get(Project, project_id)
-    if not project:
+    current_user = get_current_user()
+    submission_count = select(func.count(Submission.id)) \
+        .where(Submission.project_id == Project.id).scalar_subquery()
+    version = db.session.execute(
+        select(Project.teacher_id, Project.is_active, Project.updated_at, User.username,
+               submission_count)
+        .outerjoin(User, Project.teacher_id == User.id)
+        .where(Project.id == project_id)
+    ).first()
+    if not version:
         return jsonify({'error': 'Dự án không tồn tại'}), 404
     
     # Học sinh chỉ có thể xem dự án đang hoạt động
-    if not current_user.is_teacher and not project.is_active:
+    if not current_user.is_teacher and not version.is_active:
         return jsonify({'error': 'Không có quyền truy cập dự án này'}), 403
     
     # Giáo viên chỉ có thể xem dự án của mình
-    if current_user.is_teacher and project.teacher_id != current_user.id:
+    if current_user.is_teacher and version.teacher_id != current_user.id:
         return jsonify({'error': 'Không có quyền truy cập dự án này'}), 403
     
-    result = {
-        'id': project.id,
-        'title': project.title,
-        'description': project.description,
-        'deadline': project.deadline.isoformat() if project.deadline else None,
-        'is_active': project.is_active,
-        'created_at': project.created_at.isoformat(),
-        'teacher': {
-            'id': project.teacher.id,
-            'username': project.teacher.username
-        } if project.teacher else None
-    }
-    
-    return jsonify(result), 200
+    etag, last_modified = make_validators('project', project_id, *version)
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+    
+    result = project_serializer.get(project_id)
+    if result is None:
+        return jsonify({'error': 'Dự án không tồn tại'}), 404
+    
+    return set_validators(jsonify(result), etag, last_modified), 200
+
+@projects_api.route('/stats', methods=['GET'])
+@jwt_required
+@teacher_required
+def get_teacher_stats():
+    """
+    API endpoint để lấy phân bố điểm trên tất cả dự án của giáo viên
+    """
+    current_user = get_current_user()
+    return jsonify(dict(teacher_score_stats(current_user.id), teacher_id=current_user.id)), 200
+
+@projects_api.route('/<int:project_id>/stats', methods=['GET'])
+@jwt_required
+@teacher_required
+def get_project_stats(project_id):
+    """
+    API endpoint để lấy phân bố điểm của dự án (trung bình, độ lệch chuẩn,
+    phân vị, histogram). Chỉ giáo viên tạo dự án mới có thể xem
+    """
+    current_user = get_current_user()
+    project = db.session.get(Project, project_id)
+    if not project:
+        return jsonify({'error': 'Dự án không tồn tại'}), 404
+    
+    if project.teacher_id != current_user.id:
+        return jsonify({'error': 'Không có quyền truy cập dự án này'}), 403
+    
+    return jsonify(dict(project_score_stats(project), project_id=project.id)), 200
+
+@projects_api.route('/<int:project_id>/submissions.zip', methods=['GET'])
+@jwt_required
+@teacher_required
+def download_submissions_zip(project_id):
+    """
+    API endpoint để tải file đính kèm của mọi bài nộp trong dự án dưới dạng ZIP
+    Chỉ giáo viên tạo dự án mới có thể tải
+
+    Archive được tạo trực tiếp vào response (không dùng file tạm); các định dạng đã
+    nén sẵn (pdf, ảnh, zip, docx...) được lưu nguyên. Khi mọi entry đều được lưu
+    nguyên, response có Content-Length và hỗ trợ Range để tải tiếp.
+    """
+    current_user = get_current_user()
+    project = db.session.get(Project, project_id)
+    if not project:
+        return jsonify({'error': 'Dự án không tồn tại'}), 404
+    
+    if project.teacher_id != current_user.id:
+        return jsonify({'error': 'Không có quyền truy cập dự án này'}), 403
+    
+    entries = submission_archive_entries(project_id)
+    if not entries:
+        return jsonify({'error': 'Dự án chưa có file bài nộp nào'}), 404
+    
+    return send_zip(ZipStream(entries), f'project-{project_id}-submissions.zip')
 
 @projects_api.route('/', methods=['POST'])
 @jwt_required
@@ -116,28 +193,24 @@ def create_project():
     
     db.session.add(project)
     try:
+        db.session.flush()
+        # Lấy id trước commit: sau commit instance bị expire, đọc lại bằng select() chỉ gồm cột
+        project_id = project.id
         db.session.commit()
-        return jsonify({
-            'id': project.id,
-            'title': project.title,
-            'description': project.description,
-            'deadline': project.deadline.isoformat() if project.deadline else None,
-            'is_active': project.is_active,
-            'created_at': project.created_at.isoformat(),
-            'teacher_id': project.teacher_id
-        }), 201
+        return jsonify(project_summary_serializer.get(project_id)), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Có lỗi xảy ra khi tạo dự án: {str(e)}'}), 500
 
 @projects_api.route('/<int:project_id>', methods=['PUT'])
-@login_required
+@jwt_required
 @teacher_required
 def update_project(project_id):
     """
     API endpoint để cập nhật thông tin dự án
     Chỉ giáo viên tạo dự án mới có thể cập nhật
     """
+    current_user = get_current_user()
     project = db.session.get(Project, project_id)
     if not project:
         return jsonify({'error': 'Dự án không tồn tại'}), 404
@@ -178,13 +251,14 @@ def update_project(project_id):
         return jsonify({'error': f'Có lỗi xảy ra khi cập nhật dự án: {str(e)}'}), 500
 
 @projects_api.route('/<int:project_id>', methods=['DELETE'])
-@login_required
+@jwt_required(fresh_user=True)
 @teacher_required
 def delete_project(project_id):
     """
     API endpoint để xóa dự án
     Chỉ giáo viên tạo dự án mới có thể xóa
     """
+    current_user = get_current_user()
     project = db.session.get(Project, project_id)
     if not project:
         return jsonify({'error': 'Dự án không tồn tại'}), 404
@@ -0,0 +1,45 @@
+from flask import Blueprint, jsonify, request
+from stem_app.models import db
+from stem_app.utils.jwt_middleware import jwt_required, get_current_user
+from stem_app.utils.search import SEARCH_KINDS, search_supported, build_match_query, search
+
+search_api = Blueprint('search_api', __name__)
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+
+
+@search_api.route('', methods=['GET'])
+@jwt_required
+def search_content():
+    """
+    API endpoint tìm kiếm toàn văn trong dự án, bài nộp và bình luận
+
+    Query string: q (bắt buộc), type (project, submission hoặc comment), limit
+    Kết quả xếp theo bm25 (tiêu đề có trọng số cao hơn nội dung), kèm đoạn trích
+    với từ khớp được bọc trong <mark>. Chỉ trả về nội dung người dùng được xem.
+    """
+    connection = db.session.connection()
+    if not search_supported(connection):
+        return jsonify({'error': 'Tìm kiếm chưa được hỗ trợ trên database này'}), 501
+
+    match_query = build_match_query(request.args.get('q'))
+    if match_query is None:
+        return jsonify({'error': 'Thiếu từ khóa tìm kiếm'}), 400
+
+    kind = request.args.get('type') or None
+    if kind is not None and kind not in SEARCH_KINDS:
+        return jsonify({'error': 'Loại nội dung không hợp lệ (project, submission hoặc comment)'}), 400
+
+    try:
+        limit = int(request.args.get('limit', SEARCH_DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Tham số limit không hợp lệ'}), 400
+    if limit < 1:
+        return jsonify({'error': 'Tham số limit không hợp lệ'}), 400
+    limit = min(limit, SEARCH_MAX_LIMIT)
+
+    current_user = get_current_user()
+    results = search(connection, match_query, current_user.id, current_user.is_teacher,
+                     kind=kind, limit=limit)
+    return jsonify({'results': results}), 200
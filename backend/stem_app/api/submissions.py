@@ -1,123 +1,192 @@
-from flask import Blueprint, request, jsonify, current_app, send_from_directory, g
-from flask_login import login_required, current_user
+from flask import Blueprint, Response, request, jsonify, current_app, g, stream_with_context
 from stem_app.models.submission import Submission
 from stem_app.models.project import Project
 from stem_app.models.comment import Comment
+from stem_app.models.user import User
+from stem_app.models.stats import apply_grade_change
 from stem_app.models import db
 from datetime import datetime
+from sqlalchemy import select, update, func
 import os
+import math
 from werkzeug.utils import secure_filename
 from stem_app.utils.decorators import teacher_required
 from stem_app.utils.jwt_middleware import jwt_required, get_current_user
+from stem_app.utils.uploads import streaming_upload
+from stem_app.utils.blob_store import attach_file
+from stem_app.utils.downloads import send_submission_file
+from stem_app.utils.http_cache import make_validators, is_not_modified, not_modified, set_validators
+from stem_app.utils.exports import EXPORT_BATCH_SIZE, EXPORT_FORMATS, iter_csv, iter_ndjson
+from stem_app.utils.serializers import (
+    submission_serializer, submission_detail_serializer, submission_summary_serializer,
+    comment_serializer
+)
+from stem_app.utils.pagination import (
+    get_page_args, keyset_paginate, check_fields, NEXT_CURSOR_HEADER
+)
 import uuid
 
 submissions_api = Blueprint('submissions_api', __name__)
 
-def allowed_file(filename):
-    """
-    Kiểm tra xem file có được phép tải lên không
-    """
-    ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'ppt', 'pptx', 'zip', 'rar', 'jpg', 'jpeg', 'png'}
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# Các trường trả về sau khi nộp bài (chưa có điểm và nhận xét)
+SUBMISSION_CREATED_FIELDS = ('id', 'title', 'content', 'submitted_at', 'project_id', 'student_id')
+
+# Số bài nộp tối đa trong một request chấm điểm hàng loạt
+GRADES_BATCH_MAX = 1000
+
+# Các cột của file xuất điểm
+GRADE_EXPORT_COLUMNS = ['submission_id', 'student_username', 'score', 'feedback', 'submitted_at']
 
 @submissions_api.route('/project/<int:project_id>', methods=['GET'])
-@login_required
+@jwt_required
 def get_submissions_by_project(project_id):
     """
     API endpoint để lấy danh sách bài nộp cho một dự án
     - Giáo viên: xem tất cả bài nộp của dự án họ tạo
     - Học sinh: chỉ xem bài nộp của mình
+    
+    Query string: limit, cursor (phân trang keyset theo submitted_at, id), fields
+    Cursor của trang kế tiếp trả về trong header X-Next-Cursor
     """
-    project = db.session.get(Project, project_id)
-    if not project:
+    current_user = get_current_user()
+    try:
+        limit, cursor, fields = get_page_args()
+        check_fields(fields, submission_serializer.names)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    teacher_id = db.session.execute(
+        select(Project.teacher_id).where(Project.id == project_id)
+    ).scalar_one_or_none()
+    if teacher_id is None:
         return jsonify({'error': 'Dự án không tồn tại'}), 404
     
     # Kiểm tra quyền
+    stmt = submission_serializer.select(fields).where(Submission.project_id == project_id)
     if current_user.is_teacher:
-        if project.teacher_id != current_user.id:
+        if teacher_id != current_user.id:
             return jsonify({'error': 'Không có quyền truy cập dự án này'}), 403
-        submissions = Submission.query.filter_by(project_id=project_id).all()
     else:
-        submissions = Submission.query.filter_by(
-            project_id=project_id, 
-            student_id=current_user.id
-        ).all()
-    
-    result = []
-    for submission in submissions:
-        result.append({
-            'id': submission.id,
-            'title': submission.title,
-            'content': submission.content,
-            'file_path': submission.file_path,
-            'score': submission.score,
-            'feedback': submission.feedback,
-            'submitted_at': submission.submitted_at.isoformat(),
-            'student': {
-                'id': submission.student.id,
-                'username': submission.student.username
-            } if submission.student else None
-        })
-    
-    return jsonify(result), 200
+        stmt = stmt.where(Submission.student_id == current_user.id)
+    
+    # Bài nộp mới nhất trước
+    try:
+        rows, next_cursor = keyset_paginate(
+            stmt, [Submission.submitted_at, Submission.id], limit, cursor, descending=True
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    result = submission_serializer.serialize(rows, fields)
+    
+    response = jsonify(result)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response, 200
+
+@submissions_api.route('/project/<int:project_id>/export', methods=['GET'])
+@jwt_required
+@teacher_required
+def export_grades(project_id):
+    """
+    API endpoint để xuất điểm của dự án (chỉ giáo viên của dự án)
+
+    Query string: format=csv (mặc định) hoặc ndjson
+    Các dòng được đọc từ cursor database theo lô (yield_per) và ghi thẳng ra
+    response, nên bộ nhớ không phụ thuộc số bài nộp.
+    """
+    current_user = get_current_user()
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Định dạng không hợp lệ (csv hoặc ndjson)'}), 400
+
+    project = db.session.get(Project, project_id)
+    if not project:
+        return jsonify({'error': 'Dự án không tồn tại'}), 404
+    if project.teacher_id != current_user.id:
+        return jsonify({'error': 'Không có quyền truy cập dự án này'}), 403
+
+    stmt = (
+        select(Submission.id, User.username, Submission.score, Submission.feedback,
+               Submission.submitted_at)
+        .join(User, Submission.student_id == User.id)
+        .where(Submission.project_id == project_id)
+        .order_by(Submission.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    def generate():
+        rows = db.session.execute(stmt)
+        try:
+            if export_format == 'csv':
+                yield from iter_csv(GRADE_EXPORT_COLUMNS, rows)
+            else:
+                yield from iter_ndjson(GRADE_EXPORT_COLUMNS, rows)
+        finally:
+            rows.close()
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename=grades-project-{project_id}.{extension}'
+        }
+    )
 
 @submissions_api.route('/<int:submission_id>', methods=['GET'])
 @jwt_required
 def get_submission(submission_id):
     """
     API endpoint để lấy thông tin chi tiết của một bài nộp
+    
+    Hỗ trợ If-None-Match / If-Modified-Since: phiên bản gồm updated_at của bài nộp
+    và dự án, thời điểm sửa và số lượng bình luận, được đọc bằng một truy vấn nhỏ
+    để trả 304 mà không cần nạp bài nộp và bình luận.
     """
     current_user = get_current_user()
-    submission = db.session.get(Submission, submission_id)
-    if not submission:
+    # Số bình luận để nhận ra cả bình luận bị xóa
+    last_comment = select(func.max(Comment.updated_at)) \
+        .where(Comment.submission_id == Submission.id).scalar_subquery()
+    comment_count = select(func.count(Comment.id)) \
+        .where(Comment.submission_id == Submission.id).scalar_subquery()
+    version = db.session.execute(
+        select(Submission.student_id, Project.teacher_id, Submission.updated_at,
+               Project.updated_at, User.username, last_comment, comment_count)
+        .outerjoin(Project, Submission.project_id == Project.id)
+        .outerjoin(User, Submission.student_id == User.id)
+        .where(Submission.id == submission_id)
+    ).first()
+    if not version:
         return jsonify({'error': 'Bài nộp không tồn tại'}), 404
     
     # Kiểm tra quyền
     if current_user.is_teacher:
-        project = db.session.get(Project, submission.project_id)
-        if not project:
+        if version.teacher_id is None:
             return jsonify({'error': 'Dự án không tồn tại'}), 404
             
-        if project.teacher_id != current_user.id:
+        if version.teacher_id != current_user.id:
             return jsonify({'error': 'Không có quyền truy cập bài nộp này'}), 403
-    elif submission.student_id != current_user.id:
+    elif version.student_id != current_user.id:
         return jsonify({'error': 'Không có quyền truy cập bài nộp này'}), 403
     
+    etag, last_modified = make_validators('submission', submission_id, *version)
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+    
+    result = submission_detail_serializer.get(submission_id)
+    if result is None:
+        return jsonify({'error': 'Bài nộp không tồn tại'}), 404
+    
     # Lấy các comments
-    comments = Comment.query.filter_by(submission_id=submission_id).order_by(Comment.created_at).all()
-    comments_data = []
-    for comment in comments:
-        comments_data.append({
-            'id': comment.id,
-            'content': comment.content,
-            'created_at': comment.created_at.isoformat(),
-            'user': {
-                'id': comment.user.id,
-                'username': comment.user.username,
-                'is_teacher': comment.user.is_teacher
-            } if comment.user else None
-        })
-    
-    result = {
-        'id': submission.id,
-        'title': submission.title,
-        'content': submission.content,
-        'file_path': submission.file_path,
-        'score': submission.score,
-        'feedback': submission.feedback,
-        'submitted_at': submission.submitted_at.isoformat(),
-        'student': {
-            'id': submission.student.id,
-            'username': submission.student.username
-        } if submission.student else None,
-        'project': {
-            'id': submission.project.id,
-            'title': submission.project.title
-        } if submission.project else None,
-        'comments': comments_data
-    }
-    
-    return jsonify(result), 200
+    comments = db.session.execute(
+        comment_serializer.select()
+        .where(Comment.submission_id == submission_id)
+        .order_by(Comment.created_at)
+    )
+    result['comments'] = comment_serializer.serialize(comments)
+    
+    return set_validators(jsonify(result), etag, last_modified), 200
 
 @submissions_api.route('/project/<int:project_id>', methods=['POST'])
 @jwt_required
@@ -142,6 +211,14 @@ def create_submission(project_id):
     if not project.check_deadline():
         return jsonify({'error': 'Đã quá hạn nộp bài'}), 400
     
+    # Mỗi học sinh chỉ có một bài nộp cho mỗi dự án (ràng buộc unique trong database)
+    existing = Submission.query.filter_by(project_id=project_id, student_id=current_user.id).first()
+    if existing:
+        return jsonify({
+            'error': 'Bạn đã nộp bài cho dự án này',
+            'submission_id': existing.id
+        }), 409
+    
     # Xử lý JSON data
     data = request.get_json()
     if not data:
@@ -167,26 +244,25 @@ def create_submission(project_id):
     
     db.session.add(submission)
     try:
+        db.session.flush()
+        submission_id = submission.id
         db.session.commit()
-        return jsonify({
-            'id': submission.id,
-            'title': submission.title,
-            'content': submission.content,
-            'submitted_at': submission.submitted_at.isoformat(),
-            'project_id': submission.project_id,
-            'student_id': submission.student_id
-        }), 201
+        return jsonify(submission_summary_serializer.get(submission_id, SUBMISSION_CREATED_FIELDS)), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Có lỗi xảy ra khi nộp bài: {str(e)}'}), 500
 
 @submissions_api.route('/<int:submission_id>', methods=['PUT'])
-@jwt_required
+@jwt_required(fresh_user=True)
+@streaming_upload()
 def update_submission(submission_id):
     """
     API endpoint để cập nhật bài nộp
     - Học sinh: cập nhật nội dung bài nộp của mình
     - Giáo viên: chấm điểm và đưa ra nhận xét
+    
+    File tải lên được ghi thẳng vào UPLOAD_FOLDER trong lúc nhận request (một lượt,
+    kèm kiểm tra kích thước và MIME); file sai loại hoặc quá lớn bị từ chối với 415/413.
     """
     current_user = get_current_user()
     submission = db.session.get(Submission, submission_id)
@@ -209,13 +285,17 @@ def update_submission(submission_id):
         if 'score' in data:
             try:
                 score = float(data['score'])
-                if score < 0 or score > 10:
-                    return jsonify({'error': 'Điểm phải từ 0 đến 10'}), 400
-                submission.score = score
-            except ValueError:
+            except (TypeError, ValueError):
+                score = math.nan
+            if not math.isfinite(score):
                 return jsonify({'error': 'Điểm không hợp lệ'}), 400
+            if score < 0 or score > 10:
+                return jsonify({'error': 'Điểm phải từ 0 đến 10'}), 400
+            submission.score = score
         
         if 'feedback' in data:
+            if data['feedback'] is not None and not isinstance(data['feedback'], str):
+                return jsonify({'error': 'Nhận xét không hợp lệ'}), 400
             submission.feedback = data['feedback']
     else:
         # Học sinh cập nhật bài nộp
@@ -240,43 +320,149 @@ def update_submission(submission_id):
         # Xử lý file tải lên
         if 'file' in request.files:
             file = request.files['file']
-            if file and file.filename and allowed_file(file.filename):
+            if file and file.filename:
                 filename = secure_filename(file.filename)
-                # Tạo tên file duy nhất
+                # Tạo tên file duy nhất (dùng làm khóa tải xuống)
                 unique_filename = f"{uuid.uuid4().hex}_{filename}"
-                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
-                file.save(file_path)
                 
-                # Xóa file cũ nếu có
-                if submission.file_path:
+                # Xóa file cũ nếu là file lưu trực tiếp (trước khi có kho blob)
+                if submission.file_path and submission.attachment is None:
                     old_file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], submission.file_path)
                     if os.path.exists(old_file_path):
                         os.remove(old_file_path)
                 
+                # Lưu vào kho blob theo SHA-256; nội dung trùng chỉ tăng ref_count
+                attach_file(submission, file.stream, filename)
                 submission.file_path = unique_filename
     
     try:
         db.session.commit()
-        return jsonify({
-            'id': submission.id,
-            'title': submission.title,
-            'content': submission.content,
-            'score': submission.score,
-            'feedback': submission.feedback,
-            'submitted_at': submission.submitted_at.isoformat(),
-            'project_id': submission.project_id,
-            'student_id': submission.student_id
-        }), 200
+        return jsonify(submission_summary_serializer.get(submission_id)), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Có lỗi xảy ra khi cập nhật bài nộp: {str(e)}'}), 500
 
+@submissions_api.route('/grades:batch', methods=['POST'])
+@jwt_required(fresh_user=True)
+@teacher_required
+def grade_submissions_batch():
+    """
+    API endpoint để chấm điểm nhiều bài nộp trong một request (chỉ giáo viên)
+
+    Body: {"grades": [{"id": 1, "score": 8.5, "feedback": "..."}, ...]}
+    Quyền sở hữu của mọi bài nộp được kiểm tra bằng một truy vấn, các bài hợp lệ
+    được cập nhật bằng một lệnh UPDATE executemany và một lần commit.
+    Lỗi được báo riêng cho từng phần tử; các phần tử hợp lệ vẫn được lưu.
+    """
+    current_user = get_current_user()
+    data = request.get_json(silent=True) or {}
+    grades = data.get('grades')
+    if not isinstance(grades, list) or not grades:
+        return jsonify({'error': 'Danh sách điểm không hợp lệ'}), 400
+    if len(grades) > GRADES_BATCH_MAX:
+        return jsonify({'error': f'Tối đa {GRADES_BATCH_MAX} bài nộp mỗi lần'}), 400
+
+    results = [None] * len(grades)
+    pending = {}
+    for index, item in enumerate(grades):
+        # bool là lớp con của int: true/false trong JSON không phải id hợp lệ
+        if (not isinstance(item, dict) or not isinstance(item.get('id'), int)
+                or isinstance(item['id'], bool)):
+            results[index] = {'index': index, 'status': 400, 'error': 'Thiếu id bài nộp'}
+            continue
+        submission_id = item['id']
+        if submission_id in pending:
+            results[index] = {'index': index, 'id': submission_id, 'status': 400,
+                              'error': 'Bài nộp bị lặp trong danh sách'}
+            continue
+
+        values = {'id': submission_id}
+        if 'score' in item:
+            try:
+                score = float(item['score'])
+            except (TypeError, ValueError):
+                score = math.nan
+            # NaN và vô cực vượt qua phép so sánh khoảng bên dưới
+            if not math.isfinite(score):
+                results[index] = {'index': index, 'id': submission_id, 'status': 400,
+                                  'error': 'Điểm không hợp lệ'}
+                continue
+            if score < 0 or score > 10:
+                results[index] = {'index': index, 'id': submission_id, 'status': 400,
+                                  'error': 'Điểm phải từ 0 đến 10'}
+                continue
+            values['score'] = score
+        if 'feedback' in item:
+            if item['feedback'] is not None and not isinstance(item['feedback'], str):
+                results[index] = {'index': index, 'id': submission_id, 'status': 400,
+                                  'error': 'Nhận xét không hợp lệ'}
+                continue
+            values['feedback'] = item['feedback']
+        if len(values) == 1:
+            results[index] = {'index': index, 'id': submission_id, 'status': 400,
+                              'error': 'Không có dữ liệu để cập nhật'}
+            continue
+        pending[submission_id] = (index, values)
+
+    updates = []
+    if pending:
+        try:
+            # Lệnh ghi đầu tiên giữ khóa ghi của SQLite tới khi commit: cập nhật updated_at
+            # của các bài thuộc giáo viên trước, rồi mới đọc điểm cũ (cho dashboard_stats).
+            # Batch chạy đồng thời không thể chấm các bài này giữa lúc đọc và lúc ghi.
+            db.session.execute(
+                update(Submission)
+                .where(Submission.id.in_(list(pending)),
+                       Submission.project_id.in_(
+                           select(Project.id).where(Project.teacher_id == current_user.id)
+                       ))
+                .values(updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            # Một truy vấn cho sự tồn tại, quyền sở hữu và điểm cũ
+            rows = db.session.execute(
+                select(Submission.id, Project.teacher_id, Submission.student_id, Submission.score)
+                .join(Project, Submission.project_id == Project.id)
+                .where(Submission.id.in_(list(pending)))
+            ).all()
+            current = {row.id: row for row in rows}
+
+            for submission_id, (index, values) in pending.items():
+                row = current.get(submission_id)
+                if row is None:
+                    results[index] = {'index': index, 'id': submission_id, 'status': 404,
+                                      'error': 'Bài nộp không tồn tại'}
+                elif row.teacher_id != current_user.id:
+                    results[index] = {'index': index, 'id': submission_id, 'status': 403,
+                                      'error': 'Không có quyền chấm điểm bài nộp này'}
+                else:
+                    updates.append(values)
+                    results[index] = {'index': index, 'id': submission_id, 'status': 200}
+
+            if updates:
+                # UPDATE theo khóa chính, chạy executemany (bỏ qua @validates vì đã kiểm tra ở trên)
+                db.session.execute(update(Submission), updates)
+                # Bulk UPDATE không kích hoạt sự kiện ORM: cập nhật thống kê dashboard tại đây
+                connection = db.session.connection()
+                for values in updates:
+                    if 'score' in values:
+                        row = current[values['id']]
+                        apply_grade_change(connection, row.teacher_id, row.student_id,
+                                           row.score, values['score'])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': f'Có lỗi xảy ra khi chấm điểm: {str(e)}'}), 500
+
+    return jsonify({'updated': len(updates), 'results': results}), 200
+
 @submissions_api.route('/<int:submission_id>/comment', methods=['POST'])
-@login_required
+@jwt_required
 def add_comment(submission_id):
     """
     API endpoint để thêm bình luận vào bài nộp
     """
+    current_user = get_current_user()
     submission = db.session.get(Submission, submission_id)
     if not submission:
         return jsonify({'error': 'Bài nộp không tồn tại'}), 404
@@ -315,11 +501,12 @@ def add_comment(submission_id):
         return jsonify({'error': f'Có lỗi xảy ra khi thêm bình luận: {str(e)}'}), 500
 
 @submissions_api.route('/download/<path:filename>', methods=['GET'])
-@login_required
+@jwt_required
 def download_file(filename):
     """
     API endpoint để tải xuống file đính kèm của bài nộp
     """
+    current_user = get_current_user()
     # Tìm submission có file_path tương ứng
     submission = Submission.query.filter_by(file_path=filename).first()
     if not submission:
@@ -336,4 +523,4 @@ def download_file(filename):
     elif submission.student_id != current_user.id:
         return jsonify({'error': 'Không có quyền tải file này'}), 403
     
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename) 
\ No newline at end of file
+    return send_submission_file(submission, as_attachment=False)
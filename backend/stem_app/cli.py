@@ -0,0 +1,143 @@
+import os
+import click
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import text, inspect
+
+from stem_app.models import db
+
+stem_cli = AppGroup('stem', help='Các lệnh quản trị ứng dụng STEM.')
+
+
+def init_database():
+    """Tạo thư mục upload, tất cả các bảng còn thiếu, chỉ mục tìm kiếm và kiểm tra kết nối database
+
+    Bảng dashboard_stats và chỉ mục tìm kiếm được nạp từ dữ liệu có sẵn khi vừa được tạo,
+    nên có thể chạy trên database cũ đã có dự án và bài nộp.
+    """
+    from stem_app.models.stats import DashboardStats, rebuild_dashboard_stats
+    from stem_app.utils.search import create_search_index
+
+    os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+    stats_exists = inspect(db.engine).has_table(DashboardStats.__tablename__)
+    db.create_all()
+    db.session.execute(text("SELECT 1"))
+    if not stats_exists:
+        # Các listener chỉ cộng dồn thay đổi, nên bộ đếm phải bắt đầu từ dữ liệu hiện có
+        rebuild_dashboard_stats(db.session.connection())
+    create_search_index(db.session.connection())
+    db.session.commit()
+
+
+def seed_sample_data():
+    """Tạo tài khoản và dự án mẫu nếu database chưa có user nào
+
+    Returns:
+        True nếu đã tạo dữ liệu mẫu, False nếu dữ liệu đã tồn tại
+    """
+    from stem_app.models.user import User
+    from stem_app.models.project import Project
+
+    if User.query.count() > 0:
+        return False
+
+    # Tạo tài khoản giáo viên mẫu
+    teacher = User(
+        username='giaovien',
+        email='giaovien@example.com',
+        is_teacher=True
+    )
+    teacher.set_password('password123')
+
+    # Tạo tài khoản học sinh mẫu
+    student = User(
+        username='hocsinh',
+        email='hocsinh@example.com',
+        is_teacher=False
+    )
+    student.set_password('password123')
+
+    db.session.add(teacher)
+    db.session.add(student)
+    db.session.commit()
+
+    # Tạo dự án mẫu
+    project = Project(
+        title='Dự án STEM mẫu',
+        description='Đây là dự án STEM mẫu để test hệ thống',
+        requirements='Yêu cầu cho dự án STEM mẫu',
+        teacher_id=teacher.id,
+        deadline=datetime.now() + timedelta(days=30),
+        is_active=True
+    )
+
+    db.session.add(project)
+    db.session.commit()
+    return True
+
+
+@stem_cli.command('init')
+def init_command():
+    """Tạo các bảng database."""
+    init_database()
+    click.echo('Database tables đã được tạo thành công')
+
+
+@stem_cli.command('seed')
+def seed_command():
+    """Tạo dữ liệu mẫu nếu chưa có user nào."""
+    if seed_sample_data():
+        click.echo('Đã tạo dữ liệu mẫu thành công')
+    else:
+        click.echo('Dữ liệu mẫu đã tồn tại')
+
+
+@stem_cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Tính lại bảng dashboard_stats từ dữ liệu dự án và bài nộp."""
+    from stem_app.models.stats import rebuild_dashboard_stats
+    rebuild_dashboard_stats(db.session.connection())
+    db.session.commit()
+    click.echo('Đã tính lại số liệu dashboard')
+
+
+@stem_cli.command('reindex')
+def reindex_command():
+    """Tạo lại chỉ mục tìm kiếm toàn văn (SQLite FTS5)."""
+    from stem_app.utils.search import search_supported, create_search_index, rebuild_search_index
+    connection = db.session.connection()
+    if not search_supported(connection):
+        click.echo('Tìm kiếm toàn văn chỉ hỗ trợ SQLite')
+        return
+    if not create_search_index(connection):
+        rebuild_search_index(connection)
+    db.session.commit()
+    click.echo('Đã tạo lại chỉ mục tìm kiếm')
+
+
+@stem_cli.command('backfill-crc')
+def backfill_crc_command():
+    """Tính CRC-32 cho các blob cũ để tải ZIP bài nộp hỗ trợ Range."""
+    from stem_app.utils.blob_store import backfill_blob_crc32
+    updated = backfill_blob_crc32()
+    click.echo(f'Đã tính CRC-32 cho {updated} blob')
+
+
+@stem_cli.command('worker')
+def worker_command():
+    """Chạy worker của hàng đợi job nền ở foreground (nên dùng JOB_QUEUE_BACKEND=sqlite)."""
+    from stem_app.utils.jobs import job_queue
+    click.echo(f'Đang chạy {job_queue.workers} worker, nhấn Ctrl+C để dừng')
+    job_queue.run_forever()
+
+
+@stem_cli.command('bootstrap')
+def bootstrap_command():
+    """Tạo bảng và dữ liệu mẫu (chạy một lần trước khi khởi động worker)."""
+    init_database()
+    click.echo('Database tables đã được tạo thành công')
+    if seed_sample_data():
+        click.echo('Đã tạo dữ liệu mẫu thành công')
+    else:
+        click.echo('Dữ liệu mẫu đã tồn tại')
@@ -2,6 +2,7 @@ import os
 import sys
 from dotenv import load_dotenv
 from datetime import timedelta
+from stem_app.utils.sqlite_tuning import SqliteTuning
 
 # Tải biến môi trường từ file .env nếu tồn tại
 try:
@@ -19,8 +20,6 @@ UPLOAD_DIR = os.path.join(BASE_DIR, 'uploads')
 os.makedirs(INSTANCE_DIR, exist_ok=True)
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-print(f"Instance directory: {INSTANCE_DIR}")
-
 class Config:
     """Lớp cấu hình cho ứng dụng Flask"""
     # Bảo mật
@@ -37,11 +36,27 @@ class Config:
             'timeout': 30
         }
     }
+    # PRAGMA cho mỗi kết nối SQLite (WAL, synchronous=NORMAL, mmap...), None để tắt
+    SQLITE_TUNING = SqliteTuning()
     
     # Cấu hình upload file
     UPLOAD_FOLDER = UPLOAD_DIR
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt', 'png', 'jpg', 'jpeg'}
+    # Số detector libmagic dùng chung trong mỗi process để nhận diện MIME file upload
+    MIME_DETECTOR_POOL_SIZE = int(os.environ.get('MIME_DETECTOR_POOL_SIZE', '4'))
+    # Bảng chính sách upload dùng chung cho mọi form và API (MIME tương ứng xem
+    # stem_app.utils.upload_policy.EXTENSION_MIMES)
+    ALLOWED_EXTENSIONS = {
+        'pdf', 'doc', 'docx', 'ppt', 'pptx', 'txt',
+        'png', 'jpg', 'jpeg', 'gif',
+        'zip', 'rar', '7z',
+        'py', 'ipynb', 'java', 'cpp', 'c'
+    }
+    # Giao việc gửi file tải xuống cho proxy sau khi đã kiểm tra quyền:
+    # None (Flask tự gửi), 'x-accel' (nginx) hoặc 'x-sendfile' (Apache/lighttpd)
+    DOWNLOAD_OFFLOAD = os.environ.get('DOWNLOAD_OFFLOAD') or None
+    # Location nội bộ của nginx trỏ tới UPLOAD_FOLDER (khai báo `internal;`)
+    DOWNLOAD_ACCEL_PREFIX = os.environ.get('DOWNLOAD_ACCEL_PREFIX', '/protected-uploads/')
     
     # Cấu hình email
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.googlemail.com')
@@ -51,12 +66,51 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@stem-app.com')
     
+    # Hàng đợi job nền (gửi email...): 'memory' mất job chưa chạy khi khởi động lại,
+    # 'sqlite' lưu job vào file và dùng chung cho mọi worker gunicorn
+    JOB_QUEUE_BACKEND = os.environ.get('JOB_QUEUE_BACKEND', 'memory')
+    JOB_QUEUE_SQLITE_PATH = os.path.join(INSTANCE_DIR, 'jobs.db')
+    JOB_QUEUE_WORKERS = int(os.environ.get('JOB_QUEUE_WORKERS', '2'))
+    JOB_QUEUE_MAX_PENDING = int(os.environ.get('JOB_QUEUE_MAX_PENDING', '10000'))
+    # Số email tối đa gửi qua một kết nối SMTP
+    JOB_QUEUE_BATCH_SIZE = int(os.environ.get('JOB_QUEUE_BATCH_SIZE', '50'))
+    # Chạy lại job lỗi sau 30s, 60s, 120s... (tối đa 1 giờ), bỏ sau 5 lần
+    JOB_MAX_ATTEMPTS = 5
+    JOB_RETRY_DELAY = 30
+    JOB_RETRY_MAX_DELAY = 3600
+    
+    # Cấu hình băm mật khẩu - hash cũ sẽ được băm lại khi người dùng đăng nhập
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    # Số phép băm tối đa chạy đồng thời trong mỗi process
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+    # Số phép băm tối đa được xếp hàng, vượt quá sẽ trả về 503 ngay
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '16'))
+    
+    # Giới hạn số lần đăng nhập (token bucket): (số lần, số giây)
+    # Backend 'memory' riêng cho mỗi worker, 'sqlite' dùng chung cho mọi worker gunicorn
+    LOGIN_RATE_LIMIT_BACKEND = os.environ.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+    LOGIN_RATE_LIMIT_SQLITE_PATH = os.path.join(INSTANCE_DIR, 'rate_limit.db')
+    LOGIN_RATE_LIMIT_EMAIL = (5, 60)
+    LOGIN_RATE_LIMIT_IP = (20, 60)
+    # Số proxy tin cậy đứng trước ứng dụng (nginx, load balancer). 0 (mặc định): dùng IP
+    # của kết nối; khi chạy sau nginx phải đặt 1, nếu không mọi client dùng chung một bucket IP
+    LOGIN_RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('LOGIN_RATE_LIMIT_TRUSTED_PROXIES', '0'))
+    
     # Cấu hình session
     PERMANENT_SESSION_LIFETIME = timedelta(minutes=60)
     
     # Cấu hình pagination
     POSTS_PER_PAGE = 10 
     
+    # Thống kê điểm: từ số bài đã chấm này trở lên thì tính bằng NumPy (nếu đã cài)
+    SCORE_STATS_NUMPY_THRESHOLD = int(os.environ.get('SCORE_STATS_NUMPY_THRESHOLD', '5000'))
+    
+    # Nén response của /api theo Accept-Encoding (brotli nếu đã cài, nếu không thì gzip)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4
+    
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-2024'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
@@ -71,23 +125,6 @@ class Config:
         if not os.environ.get('DATABASE_URL') or app.config.get('SQLALCHEMY_DATABASE_URI') == 'sqlite:///temp.db':
             db_path = os.path.join(INSTANCE_DIR, 'stem_app.db')
             app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.abspath(db_path)}'
-            print(f"✓ Database URI updated to: {app.config['SQLALCHEMY_DATABASE_URI']}")
-        else:
-            print(f"✓ Using environment DATABASE_URL: {app.config['SQLALCHEMY_DATABASE_URI']}")
-        
-        # Tạo thư mục uploads nếu chưa tồn tại
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-        
-        # Đảm bảo có quyền ghi vào thư mục instance
-        try:
-            test_file = os.path.join(INSTANCE_DIR, 'test_write.txt')
-            with open(test_file, 'w') as f:
-                f.write('test')
-            os.remove(test_file)
-            print(f"✓ Có quyền ghi vào thư mục instance")
-        except Exception as e:
-            print(f"✗ Không có quyền ghi vào thư mục instance: {e}")
-            raise RuntimeError(f"Không thể ghi vào thư mục instance: {INSTANCE_DIR}")
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -98,11 +135,19 @@ class TestingConfig(Config):
     TEST_DB_PATH = os.path.join(INSTANCE_DIR, 'test.db')
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.abspath(TEST_DB_PATH)}'
     WTF_CSRF_ENABLED = False
-    
+    # Băm nhanh để test không bị chậm
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    LOGIN_RATE_LIMIT_ENABLED = False
+    # Database test có thể tạo lại bất cứ lúc nào, không cần fsync
+    SQLITE_TUNING = SqliteTuning(synchronous='OFF')
+
     @classmethod
     def init_app(cls, app):
-        Config.init_app(app)
-        print("✓ Initializing testing configuration")
+        # Không dùng Config.init_app: nó thay URI bằng database stem_app.db của môi trường dev.
+        # TEST_DATABASE_URL cho phép mỗi test dùng một database riêng (xem tests/conftest.py)
+        app.config['SQLALCHEMY_DATABASE_URI'] = (
+            os.environ.get('TEST_DATABASE_URL') or cls.SQLALCHEMY_DATABASE_URI
+        )
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -15,4 +15,6 @@ def load_user(id):
 from stem_app.models.user import User
 from stem_app.models.project import Project
 from stem_app.models.submission import Submission
-from stem_app.models.comment import Comment 
\ No newline at end of file
+from stem_app.models.comment import Comment 
+from stem_app.models.blob import Blob, SubmissionFile
+from stem_app.models.stats import DashboardStats
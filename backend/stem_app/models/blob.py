@@ -0,0 +1,139 @@
+from datetime import datetime
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from . import db
+
+# Khóa trong session.info chứa các blob cần xóa khỏi đĩa sau khi commit
+PENDING_BLOB_DELETIONS = 'pending_blob_deletions'
+# Khóa trong session.info chứa các blob vừa được ghi ra đĩa, cần xóa nếu rollback
+NEW_BLOB_FILES = 'new_blob_files'
+
+
+class Blob(db.Model):
+    """Nội dung file lưu theo địa chỉ nội dung (SHA-256), dùng chung giữa các bài nộp
+
+    File giống hệt nhau chỉ được lưu một lần; ref_count đếm số bài nộp đang tham chiếu.
+    """
+    __tablename__ = 'blobs'
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    # CRC-32 của nội dung, cho phép tính trước bố cục file ZIP khi tải nhiều bài nộp
+    crc32 = db.Column(db.BigInteger)
+    mimetype = db.Column(db.String(255))
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __init__(self, sha256, size, mimetype=None, ref_count=1, crc32=None):
+        """Khởi tạo blob mới
+
+        Args:
+            sha256: Mã băm SHA-256 (hex) của nội dung
+            size: Kích thước (byte)
+            mimetype: MIME type đã nhận diện
+            ref_count: Số tham chiếu ban đầu
+            crc32: CRC-32 của nội dung
+        """
+        self.sha256 = sha256
+        self.size = size
+        self.mimetype = mimetype
+        self.ref_count = ref_count
+        self.crc32 = crc32
+
+    def get_absolute_path(self):
+        """Lấy đường dẫn tuyệt đối của nội dung blob trên đĩa"""
+        from stem_app.utils.blob_store import blob_absolute_path
+        return blob_absolute_path(self.sha256)
+
+    def __repr__(self):
+        return f'<Blob {self.sha256[:12]} refs={self.ref_count}>'
+
+
+class SubmissionFile(db.Model):
+    """Liên kết giữa bài nộp và blob chứa file đính kèm"""
+    __tablename__ = 'submission_files'
+
+    submission_id = db.Column(db.Integer, db.ForeignKey('submissions.id'), primary_key=True)
+    blob_sha256 = db.Column(db.String(64), db.ForeignKey('blobs.sha256'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    blob = db.relationship('Blob')
+
+    def __init__(self, blob_sha256, filename):
+        """Khởi tạo liên kết file
+
+        Args:
+            blob_sha256: SHA-256 của blob
+            filename: Tên file gốc (đã được làm sạch) dùng khi tải xuống
+        """
+        self.blob_sha256 = blob_sha256
+        self.filename = filename
+
+    def __repr__(self):
+        return f'<SubmissionFile {self.submission_id} -> {self.blob_sha256[:12]}>'
+
+
+def release_blob(connection, sha256, session=None):
+    """Giảm ref_count của blob; xóa blob khi không còn tham chiếu
+
+    File trên đĩa chỉ bị xóa sau khi transaction commit thành công.
+
+    Args:
+        connection: Connection của transaction hiện tại
+        sha256: SHA-256 của blob
+        session: Session để lên lịch xóa file sau commit
+    """
+    blobs = Blob.__table__
+    connection.execute(
+        blobs.update()
+        .where(blobs.c.sha256 == sha256)
+        .values(ref_count=blobs.c.ref_count - 1)
+    )
+    remaining = connection.execute(
+        select(blobs.c.ref_count).where(blobs.c.sha256 == sha256)
+    ).scalar()
+    if remaining is not None and remaining <= 0:
+        connection.execute(blobs.delete().where(blobs.c.sha256 == sha256))
+        if session is not None:
+            session.info.setdefault(PENDING_BLOB_DELETIONS, set()).add(sha256)
+
+
+@event.listens_for(SubmissionFile, 'after_delete')
+def _release_on_delete(mapper, connection, target):
+    # Chạy cả khi xóa qua cascade (xóa bài nộp hoặc xóa dự án)
+    release_blob(connection, target.blob_sha256, object_session(target))
+
+
+@event.listens_for(Session, 'after_commit')
+def _delete_released_blobs(session):
+    # after_commit cũng chạy khi giải phóng savepoint (begin_nested); chỉ xử lý khi
+    # transaction gốc đã commit
+    if session.in_nested_transaction():
+        return
+    session.info.pop(NEW_BLOB_FILES, None)
+    pending = session.info.pop(PENDING_BLOB_DELETIONS, None)
+    if pending:
+        from stem_app.utils.blob_store import remove_unreferenced_blobs
+        remove_unreferenced_blobs(session.get_bind(), pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_released_blobs(session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop(PENDING_BLOB_DELETIONS, None)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _remove_uncommitted_blobs(session, transaction):
+    # Transaction gốc kết thúc mà không commit (rollback hoặc đóng session): file đã
+    # được đưa vào kho nhưng dòng Blob không tồn tại. Savepoint (begin_nested) bị bỏ qua
+    # vì transaction ngoài vẫn đang giữ khóa ghi. Vẫn kiểm tra lại database vì request
+    # khác có thể vừa commit cùng nội dung.
+    if transaction.parent is not None:
+        return
+    written = session.info.pop(NEW_BLOB_FILES, None)
+    if written:
+        from stem_app.utils.blob_store import remove_unreferenced_blobs
+        remove_unreferenced_blobs(session.get_bind(), written)
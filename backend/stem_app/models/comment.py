@@ -1,9 +1,15 @@
 from datetime import datetime
+from sqlalchemy import event
 from . import db
+from .submission import Submission
 
 class Comment(db.Model):
     """Model cho bình luận của người dùng"""
     __tablename__ = 'comments'
+    __table_args__ = (
+        # Bình luận của một bài nộp theo thứ tự thời gian
+        db.Index('ix_comments_submission_created', 'submission_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
@@ -47,4 +53,16 @@ class Comment(db.Model):
         Returns:
             Chuỗi biểu diễn bình luận
         """
-        return f'<Comment {self.id} by User {self.user_id}>' 
\ No newline at end of file
+        return f'<Comment {self.id} by User {self.user_id}>' 
+
+
+@event.listens_for(Comment, 'after_delete')
+def _touch_submission_on_delete(mapper, connection, target):
+    # Bình luận đã xóa không còn góp vào max(Comment.updated_at): cập nhật updated_at của
+    # bài nộp để Last-Modified của GET /api/submissions/<id> vẫn tăng
+    submissions = Submission.__table__
+    connection.execute(
+        submissions.update()
+        .where(submissions.c.id == target.submission_id)
+        .values(updated_at=datetime.utcnow())
+    )
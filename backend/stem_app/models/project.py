@@ -1,6 +1,7 @@
 from datetime import datetime
 import os
 from flask import current_app
+from sqlalchemy import func
 from sqlalchemy.orm import relationship, validates
 from . import db
 
@@ -13,12 +14,14 @@ class Project(db.Model):
     description = db.Column(db.Text, nullable=False)
     requirements = db.Column(db.Text)
     deadline = db.Column(db.DateTime)
-    is_active = db.Column(db.Boolean, default=True)
+    # active_history: giá trị cũ cần cho models/stats.py kể cả khi đối tượng đã bị expire
+    is_active = db.column_property(db.Column(db.Boolean, default=True, index=True),
+                                   active_history=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Foreign keys
-    teacher_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    teacher_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     # Relationships
     submissions = db.relationship('Submission', backref='project', lazy=True, cascade="all, delete-orphan")
@@ -119,9 +122,24 @@ class Project(db.Model):
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'teacher_id': self.teacher_id,
-            'submission_count': len(self.submissions)
+            'submission_count': self.submission_count
         }
     
+    @property
+    def submission_count(self):
+        """Số bài nộp của dự án
+        
+        Chạy một truy vấn COUNT thay vì nạp toàn bộ collection submissions. Các API
+        danh sách đọc số này qua project_serializer (utils/serializers.py).
+        
+        Returns:
+            Số bài nộp
+        """
+        from stem_app.models.submission import Submission
+        return db.session.query(func.count(Submission.id)) \
+            .filter(Submission.project_id == self.id) \
+            .scalar()
+    
     def check_deadline(self):
         """Kiểm tra xem dự án còn hạn nộp không
         
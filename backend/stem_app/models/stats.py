@@ -0,0 +1,208 @@
+from datetime import datetime
+from sqlalchemy import event, select, func, case, inspect
+from . import db
+from .project import Project
+from .submission import Submission
+
+# Phạm vi của một dòng thống kê
+SCOPE_TEACHER = 'teacher'
+SCOPE_STUDENT = 'student'
+# Dòng toàn hệ thống (scope_id = 0): số dự án đang mở cho học sinh
+SCOPE_SITE = 'site'
+
+COUNTER_COLUMNS = ('project_count', 'active_project_count', 'submission_count',
+                   'graded_count', 'score_sum')
+
+
+class DashboardStats(db.Model):
+    """Số liệu tổng hợp cho dashboard, cập nhật dần khi dữ liệu thay đổi
+
+    Mỗi giáo viên, học sinh và toàn hệ thống có một dòng; dashboard chỉ cần đọc
+    theo khóa chính thay vì COUNT trên bảng submissions mỗi lần tải trang.
+    Với học sinh, project_count là số dự án đã nộp bài.
+    """
+    __tablename__ = 'dashboard_stats'
+
+    scope = db.Column(db.String(16), primary_key=True)
+    scope_id = db.Column(db.Integer, primary_key=True)
+    project_count = db.Column(db.Integer, nullable=False, default=0)
+    active_project_count = db.Column(db.Integer, nullable=False, default=0)
+    submission_count = db.Column(db.Integer, nullable=False, default=0)
+    graded_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def ungraded_count(self):
+        return self.submission_count - self.graded_count
+
+    @property
+    def average_score(self):
+        if not self.graded_count:
+            return None
+        return round(self.score_sum / self.graded_count, 2)
+
+    def __repr__(self):
+        return f'<DashboardStats {self.scope}:{self.scope_id}>'
+
+
+def bump_stats(connection, scope, scope_id, **deltas):
+    """Cộng dồn các bộ đếm của một dòng thống kê, tạo dòng nếu chưa có
+
+    Args:
+        connection: Connection của transaction hiện tại
+        scope: SCOPE_TEACHER, SCOPE_STUDENT hoặc SCOPE_SITE
+        scope_id: ID người dùng (0 với SCOPE_SITE)
+        **deltas: Giá trị cộng thêm cho các cột trong COUNTER_COLUMNS
+    """
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+    table = DashboardStats.__table__
+    now = datetime.utcnow()
+    result = connection.execute(
+        table.update()
+        .where(table.c.scope == scope, table.c.scope_id == scope_id)
+        .values(updated_at=now, **{name: table.c[name] + value for name, value in deltas.items()})
+    )
+    if result.rowcount == 0:
+        values = {name: 0 for name in COUNTER_COLUMNS}
+        values.update(deltas)
+        connection.execute(table.insert().values(
+            scope=scope, scope_id=scope_id, updated_at=now, **values
+        ))
+
+
+def apply_grade_change(connection, teacher_id, student_id, old_score, new_score):
+    """Cập nhật thống kê khi điểm của một bài nộp thay đổi
+
+    Args:
+        connection: Connection của transaction hiện tại
+        teacher_id: ID giáo viên của dự án
+        student_id: ID học sinh
+        old_score: Điểm cũ (None nếu chưa chấm)
+        new_score: Điểm mới (None nếu bỏ điểm)
+    """
+    graded = (new_score is not None) - (old_score is not None)
+    score = (new_score or 0.0) - (old_score or 0.0)
+    bump_stats(connection, SCOPE_TEACHER, teacher_id, graded_count=graded, score_sum=score)
+    bump_stats(connection, SCOPE_STUDENT, student_id, graded_count=graded, score_sum=score)
+
+
+def _project_teacher(connection, project_id):
+    return connection.execute(
+        select(Project.teacher_id).where(Project.id == project_id)
+    ).scalar()
+
+
+def _submission_deltas(submission, sign):
+    graded = submission.score is not None
+    return {
+        'submission_count': sign,
+        'graded_count': sign if graded else 0,
+        'score_sum': sign * submission.score if graded else 0.0,
+    }
+
+
+@event.listens_for(Submission, 'after_insert')
+def _stats_submission_insert(mapper, connection, target):
+    deltas = _submission_deltas(target, 1)
+    bump_stats(connection, SCOPE_TEACHER, _project_teacher(connection, target.project_id), **deltas)
+    # Mỗi học sinh chỉ có một bài nộp cho mỗi dự án
+    bump_stats(connection, SCOPE_STUDENT, target.student_id, project_count=1, **deltas)
+
+
+@event.listens_for(Submission, 'after_delete')
+def _stats_submission_delete(mapper, connection, target):
+    deltas = _submission_deltas(target, -1)
+    bump_stats(connection, SCOPE_TEACHER, _project_teacher(connection, target.project_id), **deltas)
+    bump_stats(connection, SCOPE_STUDENT, target.student_id, project_count=-1, **deltas)
+
+
+@event.listens_for(Submission, 'after_update')
+def _stats_submission_update(mapper, connection, target):
+    history = inspect(target).attrs.score.history
+    if not history.has_changes():
+        return
+    old_score = history.deleted[0] if history.deleted else None
+    apply_grade_change(connection, _project_teacher(connection, target.project_id),
+                       target.student_id, old_score, target.score)
+
+
+@event.listens_for(Project, 'after_insert')
+def _stats_project_insert(mapper, connection, target):
+    active = 1 if target.is_active else 0
+    bump_stats(connection, SCOPE_TEACHER, target.teacher_id, project_count=1, active_project_count=active)
+    bump_stats(connection, SCOPE_SITE, 0, project_count=1, active_project_count=active)
+
+
+@event.listens_for(Project, 'after_delete')
+def _stats_project_delete(mapper, connection, target):
+    active = -1 if target.is_active else 0
+    bump_stats(connection, SCOPE_TEACHER, target.teacher_id, project_count=-1, active_project_count=active)
+    bump_stats(connection, SCOPE_SITE, 0, project_count=-1, active_project_count=active)
+
+
+@event.listens_for(Project, 'after_update')
+def _stats_project_update(mapper, connection, target):
+    history = inspect(target).attrs.is_active.history
+    if not history.has_changes():
+        return
+    was_active = bool(history.deleted[0]) if history.deleted else False
+    delta = (1 if target.is_active else 0) - (1 if was_active else 0)
+    bump_stats(connection, SCOPE_TEACHER, target.teacher_id, active_project_count=delta)
+    bump_stats(connection, SCOPE_SITE, 0, active_project_count=delta)
+
+
+def rebuild_dashboard_stats(connection):
+    """Tính lại toàn bộ bảng dashboard_stats từ dữ liệu gốc
+
+    Dùng cho database có sẵn dữ liệu hoặc khi cần sửa sai lệch.
+
+    Args:
+        connection: Connection của transaction hiện tại
+    """
+    table = DashboardStats.__table__
+    connection.execute(table.delete())
+    now = datetime.utcnow()
+    rows = {}
+
+    def row(scope, scope_id):
+        key = (scope, scope_id)
+        if key not in rows:
+            rows[key] = dict({name: 0 for name in COUNTER_COLUMNS},
+                             scope=scope, scope_id=scope_id, updated_at=now)
+        return rows[key]
+
+    active = case((Project.is_active, 1), else_=0)
+    for teacher_id, projects, active_projects in connection.execute(
+        select(Project.teacher_id, func.count(Project.id), func.sum(active))
+        .group_by(Project.teacher_id)
+    ):
+        stats = row(SCOPE_TEACHER, teacher_id)
+        stats['project_count'] = projects
+        stats['active_project_count'] = active_projects or 0
+        site = row(SCOPE_SITE, 0)
+        site['project_count'] += projects
+        site['active_project_count'] += active_projects or 0
+
+    graded = func.count(Submission.score)
+    score_sum = func.coalesce(func.sum(Submission.score), 0.0)
+    for teacher_id, submissions, graded_count, total in connection.execute(
+        select(Project.teacher_id, func.count(Submission.id), graded, score_sum)
+        .join(Project, Submission.project_id == Project.id)
+        .group_by(Project.teacher_id)
+    ):
+        stats = row(SCOPE_TEACHER, teacher_id)
+        stats.update(submission_count=submissions, graded_count=graded_count, score_sum=total)
+
+    for student_id, submissions, graded_count, total in connection.execute(
+        select(Submission.student_id, func.count(Submission.id), graded, score_sum)
+        .group_by(Submission.student_id)
+    ):
+        stats = row(SCOPE_STUDENT, student_id)
+        stats.update(project_count=submissions, submission_count=submissions,
+                     graded_count=graded_count, score_sum=total)
+
+    if rows:
+        connection.execute(table.insert(), list(rows.values()))
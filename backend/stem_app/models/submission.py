@@ -8,23 +8,37 @@ from . import db
 class Submission(db.Model):
     """Model cho bài nộp"""
     __tablename__ = 'submissions'
+    __table_args__ = (
+        # Mỗi học sinh chỉ có một bài nộp cho mỗi dự án; cũng phục vụ lọc theo project_id
+        db.Index('uq_submissions_project_student', 'project_id', 'student_id', unique=True),
+        # Danh sách bài nộp của dự án, sắp xếp theo thời gian nộp
+        db.Index('ix_submissions_project_submitted', 'project_id', 'submitted_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     content = db.Column(db.Text)
-    file_path = db.Column(db.String(255))
+    file_path = db.Column(db.String(255), index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    score = db.Column(db.Float)
+    # active_history: nạp giá trị cũ khi gán, kể cả sau commit (đối tượng đã bị expire),
+    # để models/stats.py tính đúng chênh lệch điểm
+    score = db.column_property(db.Column(db.Float), active_history=True)
     feedback = db.Column(db.Text)
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Foreign keys
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
-    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     # Relationships
     student = db.relationship('User', foreign_keys=[student_id], backref='student_submissions')
+    # Xóa bình luận cùng bài nộp (cần thiết khi PRAGMA foreign_keys = ON)
+    comments = db.relationship('Comment', backref='submission', lazy='dynamic',
+                               cascade='all, delete-orphan')
+    # File đính kèm trong kho blob (xem models/blob.py)
+    attachment = db.relationship('SubmissionFile', uselist=False, backref='submission',
+                                 cascade='all, delete-orphan')
     
     def __init__(self, title, content, project_id, student_id, file_path=None):
         """Khởi tạo bài nộp mới
@@ -82,10 +96,17 @@ class Submission(db.Model):
         """
         if not self.file_path:
             return None
+        if self.attachment is not None:
+            return self.attachment.blob.get_absolute_path()
         return os.path.join(current_app.config['UPLOAD_FOLDER'], self.file_path)
     
     def delete_file(self):
         """Xóa file vật lý nếu tồn tại"""
+        if self.attachment is not None:
+            # Blob chỉ bị xóa khỏi đĩa khi không còn bài nộp nào tham chiếu
+            self.attachment = None
+            self.file_path = None
+            return
         if self.file_path:
             try:
                 file_path = self.get_absolute_file_path()
@@ -1,9 +1,11 @@
 from datetime import datetime
 from flask_login import UserMixin
 import re
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.orm import validates
 from stem_app.models import db
+from stem_app.utils.passwords import (
+    PasswordHashBusy, hash_password, verify_password, needs_rehash
+)
 
 class User(UserMixin, db.Model):
     """Mô hình User đại diện cho người dùng trong hệ thống
@@ -25,7 +27,7 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))
     is_teacher = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_seen = db.Column(db.DateTime, default=datetime.utcnow)
@@ -115,7 +117,7 @@ class User(UserMixin, db.Model):
         """
         if not password or len(password) < 6:
             raise ValueError('Mật khẩu phải có ít nhất 6 ký tự')
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
         
     def check_password(self, password):
         """Kiểm tra mật khẩu
@@ -126,7 +128,29 @@ class User(UserMixin, db.Model):
         Returns:
             True nếu mật khẩu đúng, False nếu sai
         """
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    def verify_and_update_password(self, password):
+        """Kiểm tra mật khẩu và băm lại nếu hash đang dùng tham số cũ
+        
+        Người gọi chịu trách nhiệm commit session nếu hash đã được cập nhật.
+        Nếu pool băm đang bận thì bỏ qua việc băm lại, lần đăng nhập sau sẽ thử lại.
+        
+        Args:
+            password: Mật khẩu cần kiểm tra
+            
+        Returns:
+            Tuple (đúng mật khẩu, đã băm lại)
+        """
+        if not self.check_password(password):
+            return False, False
+        if needs_rehash(self.password_hash):
+            try:
+                self.password_hash = hash_password(password)
+            except PasswordHashBusy:
+                return True, False
+            return True, True
+        return True, False
     
     def update_last_seen(self):
         self.last_seen = datetime.utcnow()
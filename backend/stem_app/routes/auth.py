@@ -15,9 +15,12 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
-        if user is None or not user.check_password(form.password.data):
+        valid, rehashed = user.verify_and_update_password(form.password.data) if user else (False, False)
+        if not valid:
             flash('Email hoặc mật khẩu không đúng', 'danger')
             return redirect(url_for('auth.login'))
+        if rehashed:
+            db.session.commit()
         
         login_user(user, remember=form.remember_me.data)
         next_page = request.args.get('next')
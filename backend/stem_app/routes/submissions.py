@@ -1,6 +1,6 @@
 import os
 import uuid
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, send_from_directory
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 
@@ -9,6 +9,8 @@ from stem_app.models.project import Project
 from stem_app.models.submission import Submission
 from stem_app.utils.decorators import teacher_required
 from stem_app.utils.file_utils import save_file, allowed_file
+from stem_app.utils.pagination import keyset_paginate
+from stem_app.utils.downloads import send_submission_file
 
 submissions_bp = Blueprint('submissions', __name__)
 
@@ -159,19 +161,46 @@ def grade_submission(submission_id):
 @login_required
 def download_file(filename):
     """Tải xuống file bài nộp"""
-    # Xác định quyền truy cập file dựa trên đường dẫn
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    return send_from_directory(upload_folder, filename, as_attachment=True)
+    submission = Submission.query.filter_by(file_path=filename).first()
+    if not submission:
+        flash('File không tồn tại', 'danger')
+        return redirect(url_for('projects.list_projects'))
+    
+    # Kiểm tra quyền tải file giống quyền xem bài nộp: giáo viên chỉ tải được file trong
+    # dự án của mình, học sinh chỉ tải được file của mình
+    if current_user.is_teacher:
+        project = db.session.get(Project, submission.project_id)
+        allowed = project is not None and project.teacher_id == current_user.id
+    else:
+        allowed = submission.student_id == current_user.id
+    if not allowed:
+        flash('Bạn không có quyền tải file này', 'danger')
+        return redirect(url_for('projects.list_projects'))
+    
+    return send_submission_file(submission)
 
 @submissions_bp.route('/all', methods=['GET'])
 @login_required
 def list_all_submissions():
-    """Lấy danh sách tất cả bài nộp"""
+    """Lấy danh sách tất cả bài nộp (phân trang keyset, POSTS_PER_PAGE bài mỗi trang)"""
     if current_user.is_teacher:
         # Giáo viên thấy bài nộp của các dự án do họ tạo
-        submissions = Submission.query.join(Project).filter(Project.teacher_id == current_user.id).all()
+        query = Submission.query.join(Project).filter(Project.teacher_id == current_user.id)
     else:
         # Học sinh chỉ thấy bài nộp của họ
-        submissions = current_user.submissions.all()
+        query = Submission.query.filter_by(student_id=current_user.id)
+    
+    try:
+        submissions, next_cursor = keyset_paginate(
+            query,
+            [Submission.submitted_at, Submission.id],
+            current_app.config['POSTS_PER_PAGE'],
+            request.args.get('cursor') or None,
+            descending=True
+        )
+    except ValueError:
+        flash('Trang không hợp lệ', 'danger')
+        return redirect(url_for('submissions.list_all_submissions'))
     
-    return render_template('submissions/list_all.html', title='Danh sách bài nộp', submissions=submissions) 
\ No newline at end of file
+    return render_template('submissions/list_all.html', title='Danh sách bài nộp',
+                           submissions=submissions, next_cursor=next_cursor) 
\ No newline at end of file
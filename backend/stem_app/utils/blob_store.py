@@ -0,0 +1,179 @@
+import os
+from flask import current_app
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from stem_app.models import db
+from stem_app.models.blob import Blob, SubmissionFile, release_blob, NEW_BLOB_FILES
+
+# Thư mục con trong UPLOAD_FOLDER chứa các blob
+BLOB_SUBDIR = 'blobs'
+
+
+def blob_relative_path(sha256):
+    """Đường dẫn của blob tương đối với UPLOAD_FOLDER, vd. blobs/ab/cd/abcd...
+
+    Chia hai cấp thư mục theo tiền tố để mỗi thư mục không chứa quá nhiều file.
+    """
+    return os.path.join(BLOB_SUBDIR, sha256[:2], sha256[2:4], sha256)
+
+
+def blob_absolute_path(sha256):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], blob_relative_path(sha256))
+
+
+def store_blob(sink):
+    """Lưu nội dung của một UploadSink vào kho blob và tăng ref_count
+
+    Nếu nội dung đã có trong kho, file tạm bị bỏ đi và không ghi thêm gì. File vừa
+    được đưa vào kho sẽ bị xóa lại nếu transaction bị rollback (xem models/blob.py).
+
+    Args:
+        sink: UploadSink đã nhận xong dữ liệu (có sha256, crc32, size, mimetype)
+
+    Returns:
+        str: SHA-256 của blob
+    """
+    sha256 = sink.sha256
+    path = blob_absolute_path(sha256)
+
+    # UPDATE đầu tiên giữ khóa ghi (SQLite) tới khi commit, nên remove_unreferenced_blobs
+    # của request khác không thể xóa file ghi dưới đây trước khi dòng Blob được commit
+    if _add_reference(sha256, sink.crc32):
+        if os.path.exists(path):
+            sink.discard()
+        else:
+            # Blob có trong database nhưng mất file: khôi phục từ bản vừa tải lên
+            _commit_file(sink, sha256)
+        return sha256
+
+    _commit_file(sink, sha256)
+    try:
+        with db.session.begin_nested():
+            db.session.add(Blob(sha256, sink.size, sink.mimetype, ref_count=1, crc32=sink.crc32))
+    except IntegrityError:
+        # Request khác vừa tạo cùng blob; file có cùng nội dung nên chỉ cần tăng ref_count
+        _add_reference(sha256, sink.crc32)
+    return sha256
+
+
+def _commit_file(sink, sha256):
+    sink.commit(blob_relative_path(sha256))
+    db.session.info.setdefault(NEW_BLOB_FILES, set()).add(sha256)
+
+
+def _add_reference(sha256, crc32):
+    # Blob cũ chưa có CRC-32 được bổ sung từ bản vừa tải lên (cùng nội dung)
+    result = db.session.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256)
+        .values(ref_count=Blob.ref_count + 1, crc32=func.coalesce(Blob.crc32, crc32))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+def attach_file(submission, sink, filename):
+    """Gắn file vừa tải lên vào bài nộp, thay thế file cũ nếu có
+
+    Args:
+        submission: Submission object
+        sink: UploadSink của file
+        filename: Tên file gốc đã được làm sạch
+
+    Returns:
+        SubmissionFile: Liên kết file của bài nộp
+    """
+    sha256 = store_blob(sink)
+    attachment = submission.attachment
+    if attachment is None:
+        submission.attachment = SubmissionFile(sha256, filename)
+        return submission.attachment
+
+    old_sha256 = attachment.blob_sha256
+    attachment.blob_sha256 = sha256
+    attachment.filename = filename
+    # Ghi liên kết mới trước, nếu không dòng blob cũ vẫn đang được tham chiếu (khóa ngoại)
+    # khi release_blob xóa nó
+    db.session.flush()
+    if old_sha256 != sha256:
+        release_blob(db.session.connection(), old_sha256, db.session)
+    else:
+        # Tải lại đúng nội dung cũ: bỏ tham chiếu vừa thêm
+        release_blob(db.session.connection(), sha256, db.session)
+    return attachment
+
+
+def backfill_blob_crc32(batch_size=100):
+    """Tính CRC-32 cho các blob tải lên trước khi có cột crc32
+
+    Mỗi lô được commit riêng để không giữ khóa ghi trong lúc đọc nhiều file.
+
+    Args:
+        batch_size: Số blob mỗi lô
+
+    Returns:
+        int: Số blob đã được cập nhật
+    """
+    from stem_app.utils.zip_stream import file_crc32
+
+    updated = 0
+    skipped = set()
+    while True:
+        sha256s = db.session.execute(
+            select(Blob.sha256)
+            .where(Blob.crc32.is_(None), Blob.sha256.notin_(skipped))
+            .limit(batch_size)
+        ).scalars().all()
+        db.session.rollback()
+        if not sha256s:
+            return updated
+
+        values = []
+        for sha256 in sha256s:
+            path = blob_absolute_path(sha256)
+            if os.path.isfile(path):
+                values.append({'sha256': sha256, 'crc32': file_crc32(path)})
+            else:
+                current_app.logger.error(f"Không tìm thấy file của blob {sha256}")
+                skipped.add(sha256)
+        if values:
+            db.session.execute(update(Blob), values)
+            db.session.commit()
+            updated += len(values)
+
+
+def remove_unreferenced_blobs(bind, sha256s):
+    """Xóa file của các blob không còn trong database
+
+    Gọi sau khi commit (blob đã bị xóa) hoặc sau khi rollback (file vừa ghi của blob
+    không được tạo). Trên SQLite, việc kiểm tra lại và xóa file chạy trong một
+    transaction BEGIN IMMEDIATE: request đang lưu cùng nội dung (store_blob) giữ khóa
+    ghi từ trước khi ghi file cho tới khi commit dòng Blob, nên hoặc dòng đó đã được
+    commit và file được giữ lại, hoặc request đó chỉ ghi file sau khi file cũ đã bị xóa.
+
+    Args:
+        bind: Engine để kiểm tra lại
+        sha256s: Tập SHA-256 cần xóa
+    """
+    blobs = Blob.__table__
+    with bind.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+        try:
+            existing = set(connection.execute(
+                select(blobs.c.sha256).where(blobs.c.sha256.in_(list(sha256s)))
+            ).scalars())
+
+            for sha256 in sha256s:
+                if sha256 in existing:
+                    continue
+                path = blob_absolute_path(sha256)
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError as e:
+                    current_app.logger.error(f"Lỗi khi xóa blob {sha256}: {str(e)}")
+        finally:
+            # Chỉ đọc: kết thúc transaction để nhả khóa ghi
+            connection.rollback()
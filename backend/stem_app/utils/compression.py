@@ -0,0 +1,66 @@
+import gzip
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli là tùy chọn, thiếu thì chỉ dùng gzip
+    brotli = None
+
+# Chỉ nén các kiểu nội dung dạng văn bản; file tải xuống (PDF, ảnh, ZIP) đã nén sẵn
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/csv', 'application/x-ndjson', 'text/plain'}
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+# Mức 4-5 của brotli nén tốt hơn gzip -6 mà vẫn đủ nhanh cho nội dung động
+DEFAULT_BROTLI_QUALITY = 4
+
+
+def _choose_encoding():
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(encodings)
+
+
+def compress_response(response):
+    """Nén body của response theo Accept-Encoding (after_request của API blueprint)
+
+    Bỏ qua response stream (export, ZIP, file), response đã có Content-Encoding,
+    kiểu nội dung không phải văn bản và body nhỏ hơn COMPRESS_MIN_SIZE.
+
+    Args:
+        response: Response của Flask
+
+    Returns:
+        Chính response đó (đã nén nếu phù hợp)
+    """
+    config = current_app.config
+    if not config.get('COMPRESS_ENABLED', True):
+        return response
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206)
+            or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE):
+        return response
+
+    encoding = _choose_encoding()
+    if encoding == 'br':
+        body = brotli.compress(
+            body, quality=config.get('COMPRESS_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY)
+        )
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=config.get('COMPRESS_GZIP_LEVEL', DEFAULT_GZIP_LEVEL))
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    # ETag mạnh gắn với byte chưa nén; ETag yếu (xem http_cache.py) vẫn đúng sau khi nén
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -1,11 +1,18 @@
 from functools import wraps
 from flask import abort, jsonify
 from flask_login import current_user
+from stem_app.utils.jwt_middleware import get_current_user
+
+def _resolve_user():
+    """Ưu tiên user từ JWT (không truy vấn database), sau đó mới đến session"""
+    user = get_current_user()
+    return user if user is not None else current_user
 
 def teacher_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or not current_user.is_teacher:
+        user = _resolve_user()
+        if not user.is_authenticated or not user.is_teacher:
             return jsonify({'error': 'Yêu cầu quyền giáo viên'}), 403
         return f(*args, **kwargs)
     return decorated_function
@@ -13,7 +20,8 @@ def teacher_required(f):
 def student_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or current_user.is_teacher:
+        user = _resolve_user()
+        if not user.is_authenticated or user.is_teacher:
             return jsonify({'error': 'Yêu cầu quyền học sinh'}), 403
         return f(*args, **kwargs)
     return decorated_function
@@ -23,7 +31,8 @@ def owner_required(model):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             obj = model.query.get_or_404(kwargs.get('id'))
-            if not current_user.is_authenticated or obj.user_id != current_user.id:
+            user = _resolve_user()
+            if not user.is_authenticated or obj.user_id != user.id:
                 return jsonify({'error': 'Không có quyền truy cập'}), 403
             return f(*args, **kwargs)
         return decorated_function
@@ -0,0 +1,219 @@
+import os
+import hashlib
+from urllib.parse import quote
+from flask import Response, request, current_app
+from sqlalchemy import select
+from werkzeug.datastructures import ContentRange
+from werkzeug.exceptions import NotFound, RequestedRangeNotSatisfiable
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+from stem_app.models import db
+from stem_app.models.blob import Blob, SubmissionFile
+from stem_app.models.submission import Submission
+from stem_app.models.user import User
+from stem_app.utils.blob_store import blob_absolute_path
+from stem_app.utils.zip_stream import ZipEntry, entry_size
+
+# Các chế độ chuyển việc gửi file cho proxy phía trước (cấu hình DOWNLOAD_OFFLOAD)
+OFFLOAD_X_ACCEL = 'x-accel'
+OFFLOAD_X_SENDFILE = 'x-sendfile'
+
+# Thư mục con mà routes/submissions lưu file qua save_file
+LEGACY_SUBDIR = 'submissions'
+
+
+def send_upload(path, download_name=None, mimetype=None, etag=None, as_attachment=True):
+    """Gửi một file trong UPLOAD_FOLDER, hỗ trợ If-None-Match và Range
+
+    Chỉ gọi sau khi đã kiểm tra quyền. Nếu DOWNLOAD_OFFLOAD được bật, response
+    không có nội dung mà chỉ chứa header X-Accel-Redirect (nginx) hoặc X-Sendfile
+    (Apache/lighttpd) để proxy tự gửi file; worker không phải đọc file nữa.
+
+    Args:
+        path: Đường dẫn tuyệt đối của file (nằm trong UPLOAD_FOLDER)
+        download_name: Tên file khi tải xuống
+        mimetype: MIME type (mặc định đoán theo download_name)
+        etag: ETag mạnh, vd. SHA-256 của nội dung (mặc định dựa trên mtime và kích thước)
+        as_attachment: Gửi dưới dạng file đính kèm
+
+    Returns:
+        Response 200, 206 hoặc 304
+    """
+    if not os.path.isfile(path):
+        raise NotFound()
+
+    offload = current_app.config.get('DOWNLOAD_OFFLOAD')
+    environ = request.environ
+    if offload:
+        # Proxy tự xử lý Range trên file thật; ở đây chỉ trả 304 khi ETag khớp
+        environ = {k: v for k, v in environ.items() if k != 'HTTP_RANGE'}
+
+    response = send_file(
+        path,
+        environ,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name or os.path.basename(path),
+        conditional=True,
+        etag=etag if etag is not None else True,
+        use_x_sendfile=bool(offload),
+        response_class=current_app.response_class
+    )
+    response.cache_control.private = True
+
+    if offload and response.status_code == 200:
+        response.accept_ranges = 'bytes'
+        if offload == OFFLOAD_X_ACCEL:
+            del response.headers['X-Sendfile']
+            response.headers['X-Accel-Redirect'] = _accel_uri(path)
+    return response
+
+
+def _accel_uri(path):
+    """URI nội bộ của file cho nginx, vd. /protected-uploads/blobs/ab/cd/..."""
+    config = current_app.config
+    relative = os.path.relpath(path, config['UPLOAD_FOLDER']).replace(os.sep, '/')
+    prefix = config.get('DOWNLOAD_ACCEL_PREFIX', '/protected-uploads/').rstrip('/')
+    return f'{prefix}/{quote(relative)}'
+
+
+def send_submission_file(submission, as_attachment=True):
+    """Gửi file đính kèm của bài nộp (blob hoặc file cũ trong UPLOAD_FOLDER)
+
+    Blob dùng SHA-256 đã lưu làm ETag mạnh nên không cần băm lại khi tải xuống.
+
+    Args:
+        submission: Submission object đã được kiểm tra quyền
+        as_attachment: Gửi dưới dạng file đính kèm
+
+    Returns:
+        Response của send_upload
+    """
+    attachment = submission.attachment
+    if attachment is not None:
+        blob = attachment.blob
+        return send_upload(
+            blob.get_absolute_path(),
+            download_name=attachment.filename,
+            mimetype=blob.mimetype,
+            etag=blob.sha256,
+            as_attachment=as_attachment
+        )
+
+    path = legacy_file_path(submission.file_path)
+    if path is None:
+        raise NotFound()
+    return send_upload(path, as_attachment=as_attachment)
+
+
+def legacy_file_path(file_path):
+    """Đường dẫn tuyệt đối của file bài nộp lưu trực tiếp (trước khi có kho blob)
+
+    File cũ nằm ngay trong UPLOAD_FOLDER (API) hoặc trong thư mục con của save_file.
+
+    Args:
+        file_path: Giá trị Submission.file_path
+
+    Returns:
+        str hoặc None nếu không tìm thấy file
+    """
+    if not file_path:
+        return None
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    for directory in (upload_folder, os.path.join(upload_folder, LEGACY_SUBDIR)):
+        path = safe_join(directory, file_path)
+        if path is not None and os.path.isfile(path):
+            return path
+    return None
+
+
+def submission_archive_entries(project_id):
+    """Danh sách ZipEntry cho file đính kèm của mọi bài nộp trong dự án
+
+    Mỗi entry được đặt tên theo học sinh: <username>/<tên file gốc>. Hàm này chỉ đọc:
+    blob chưa có CRC-32 (tải lên trước khi có cột crc32) làm archive được ghi tuần tự,
+    không hỗ trợ Range, cho tới khi chạy `flask stem backfill-crc`.
+
+    Args:
+        project_id: ID của dự án
+
+    Returns:
+        list: Các ZipEntry, sắp xếp theo username
+    """
+    rows = db.session.execute(
+        select(Submission.file_path, Submission.updated_at, User.username,
+               SubmissionFile.filename, Blob.sha256, Blob.crc32)
+        .join(User, Submission.student_id == User.id)
+        .outerjoin(SubmissionFile, SubmissionFile.submission_id == Submission.id)
+        .outerjoin(Blob, Blob.sha256 == SubmissionFile.blob_sha256)
+        .where(Submission.project_id == project_id, Submission.file_path.isnot(None))
+        .order_by(User.username, Submission.id)
+    ).all()
+
+    entries = []
+    names = set()
+    for file_path, modified, username, filename, sha256, crc32 in rows:
+        if sha256 is not None:
+            path = blob_absolute_path(sha256)
+        else:
+            path = legacy_file_path(file_path)
+            filename = os.path.basename(file_path)
+        size = entry_size(path) if path else None
+        if size is None:
+            continue
+
+        folder = username.replace('/', '_').replace('\\', '_')
+        name = f'{folder}/{filename}'
+        while name in names:
+            name = f'{folder}/_{os.path.basename(name)}'
+        names.add(name)
+        entries.append(ZipEntry(name, path, size, crc32=crc32, modified=modified))
+    return entries
+
+
+def send_zip(stream, download_name):
+    """Gửi ZipStream, hỗ trợ Range và If-None-Match khi bố cục được tính trước
+
+    Args:
+        stream: ZipStream
+        download_name: Tên file ZIP khi tải xuống
+
+    Returns:
+        Response 200, 206 hoặc 304
+    """
+    headers = {'Content-Disposition': f'attachment; filename={download_name}'}
+    size = stream.size
+    if size is None:
+        # Có entry cần nén: ghi tuần tự, không biết trước kích thước
+        return Response(iter(stream), mimetype='application/zip', headers=headers)
+
+    digest = hashlib.sha256()
+    for entry in stream.entries:
+        digest.update(f'{entry.name}\0{entry.size}\0{entry.crc32}\0{entry.modified}\n'.encode('utf-8'))
+    etag = digest.hexdigest()
+
+    response = Response(mimetype='application/zip', headers=headers)
+    response.set_etag(etag)
+    response.accept_ranges = 'bytes'
+    response.cache_control.private = True
+    if request.if_none_match.contains(etag):
+        response.status_code = 304
+        return response
+
+    start, stop = 0, size
+    byte_range = request.range
+    if_range = request.if_range
+    # If-Range chỉ được chấp nhận khi khớp ETag (archive không có Last-Modified)
+    range_valid = if_range.etag == etag if if_range.etag or if_range.date else True
+    if byte_range is not None and len(byte_range.ranges) == 1 and range_valid:
+        bounds = byte_range.range_for_length(size)
+        if bounds is None:
+            raise RequestedRangeNotSatisfiable(length=size)
+        start, stop = bounds
+        response.status_code = 206
+        response.content_range = ContentRange('bytes', start, stop, size)
+
+    response.response = stream.iter_range(start, stop)
+    response.content_length = stop - start
+    return response
@@ -0,0 +1,67 @@
+import io
+import csv
+import json
+from datetime import datetime
+
+# Số dòng lấy từ cursor database mỗi lần, cũng là số dòng gộp vào một chunk HTTP
+EXPORT_BATCH_SIZE = 1000
+
+# Định dạng xuất được hỗ trợ: mimetype và phần mở rộng file
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(columns, rows):
+    """Sinh nội dung CSV theo từng lô dòng, bộ nhớ không phụ thuộc số dòng
+
+    Args:
+        columns: Danh sách tên cột (dòng tiêu đề)
+        rows: Iterable các tuple giá trị theo thứ tự columns
+
+    Yields:
+        str: Một đoạn CSV gồm tối đa EXPORT_BATCH_SIZE dòng
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM để Excel nhận đúng UTF-8 (tên tiếng Việt)
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+
+    count = 0
+    for row in rows:
+        writer.writerow([_plain(value) for value in row])
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(columns, rows):
+    """Sinh nội dung NDJSON (mỗi dòng một object JSON) theo từng lô
+
+    Args:
+        columns: Danh sách tên trường
+        rows: Iterable các tuple giá trị theo thứ tự columns
+
+    Yields:
+        str: Một đoạn gồm tối đa EXPORT_BATCH_SIZE dòng JSON
+    """
+    lines = []
+    for row in rows:
+        record = {name: _plain(value) for name, value in zip(columns, row)}
+        lines.append(json.dumps(record, ensure_ascii=False))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
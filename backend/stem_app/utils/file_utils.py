@@ -1,19 +1,12 @@
 import os
 import uuid
+import shutil
 from werkzeug.utils import secure_filename
 from flask import current_app
-import magic
-
-ALLOWED_EXTENSIONS = {
-    'pdf', 'doc', 'docx', 'txt', 
-    'png', 'jpg', 'jpeg', 'gif',
-    'zip', 'rar', '7z',
-    'py', 'ipynb', 'java', 'cpp', 'c'
-}
-
-def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+from stem_app.utils.mime_sniffer import sniff_stream
+from stem_app.utils.upload_policy import (
+    UploadRejected, allowed_file, check_upload, copy_with_limit, get_upload_rules
+)
 
 def get_safe_filename(filename):
     """Generate a safe filename while preserving the original extension"""
@@ -33,52 +26,48 @@ def save_file(file, subdirectory=''):
     if not file:
         return False, "No file provided"
     
-    if not allowed_file(file.filename):
-        return False, "File type not allowed"
+    rules = get_upload_rules()
+    try:
+        # Extension and size (Content-Length or seek/tell), without reading the body
+        size = check_upload(file, rules)
+    except UploadRejected as e:
+        return False, e.message
     
+    file_path = None
     try:
         # Generate safe filename
         filename = get_safe_filename(file.filename)
         if not filename:
             return False, "Invalid filename"
         
+        # Verify file type from the first bytes of the stream, before anything reaches disk
+        file_type, head = sniff_stream(file.stream)
+        if not rules.mime_allowed(file_type, file.filename):
+            return False, "Invalid file type detected"
+        
         # Create full path
         upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], subdirectory)
         os.makedirs(upload_path, exist_ok=True)
         file_path = os.path.join(upload_path, filename)
         
-        # Save file
-        file.save(file_path)
-        
-        # Verify file type using python-magic
-        mime = magic.Magic(mime=True)
-        file_type = mime.from_file(file_path)
-        
-        # List of allowed MIME types
-        ALLOWED_MIMES = {
-            'application/pdf',
-            'application/msword',
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            'text/plain',
-            'image/png',
-            'image/jpeg',
-            'image/gif',
-            'application/zip',
-            'application/x-rar-compressed',
-            'application/x-7z-compressed',
-            'text/x-python',
-            'text/x-java',
-            'text/x-c++',
-            'text/x-c'
-        }
-        
-        if file_type not in ALLOWED_MIMES:
-            os.remove(file_path)
-            return False, "Invalid file type detected"
+        # Save file: the sniffed head first, then the rest of the stream
+        with open(file_path, 'wb') as out:
+            out.write(head)
+            if size is not None:
+                shutil.copyfileobj(file.stream, out)
+            else:
+                # Size unknown up front: count bytes while copying
+                copy_with_limit(file.stream, out, rules, written=len(head))
         
         return True, filename
         
+    except UploadRejected as e:
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+        return False, e.message
     except Exception as e:
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
         return False, f"Error saving file: {str(e)}"
 
 def delete_file(filename, subdirectory=''):
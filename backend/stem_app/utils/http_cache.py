@@ -0,0 +1,59 @@
+import hashlib
+from datetime import timezone
+from flask import Response, request
+
+
+def make_validators(kind, *versions):
+    """Tạo ETag yếu và Last-Modified cho một biểu diễn JSON
+
+    Args:
+        kind: Tên biểu diễn (vd. 'project'), để hai endpoint khác nhau không trùng ETag
+        *versions: Các giá trị xác định nội dung (id, updated_at, số bản ghi con...)
+
+    Returns:
+        tuple: (etag, last_modified) - last_modified là thời điểm mới nhất trong
+               versions (UTC, làm tròn xuống giây) hoặc None
+    """
+    digest = hashlib.sha1(kind.encode('utf-8'))
+    for value in versions:
+        digest.update(b'\0' + repr(value).encode('utf-8'))
+
+    timestamps = [value for value in versions if hasattr(value, 'isoformat')]
+    last_modified = None
+    if timestamps:
+        # Cột updated_at lưu giờ UTC không có múi giờ; header HTTP chỉ chính xác đến giây
+        last_modified = max(timestamps).replace(tzinfo=timezone.utc, microsecond=0)
+    return digest.hexdigest()[:32], last_modified
+
+
+def is_not_modified(etag, last_modified):
+    """Kiểm tra If-None-Match / If-Modified-Since của request hiện tại
+
+    If-None-Match được ưu tiên; chỉ xét If-Modified-Since khi request không gửi ETag.
+
+    Returns:
+        bool: True nếu client đã có bản mới nhất
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def set_validators(response, etag, last_modified):
+    """Gắn ETag, Last-Modified và Cache-Control vào response
+
+    Dữ liệu cần đăng nhập nên chỉ cho phép cache riêng của trình duyệt, và luôn
+    phải hỏi lại server (no-cache) trước khi dùng.
+    """
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag, last_modified):
+    """Response 304 không có body"""
+    return set_validators(Response(status=304), etag, last_modified)
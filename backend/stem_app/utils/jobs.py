@@ -0,0 +1,403 @@
+import os
+import json
+import time
+import heapq
+import random
+import sqlite3
+import itertools
+import threading
+from collections import deque
+
+
+class QueueFull(Exception):
+    """Hàng đợi đã đủ JOB_QUEUE_MAX_PENDING job chờ chạy"""
+
+
+class PermanentJobError(Exception):
+    """Lỗi không thể khắc phục bằng cách chạy lại (vd. địa chỉ email bị từ chối)"""
+
+
+class Job:
+    """Một job trong hàng đợi
+
+    Attributes:
+        id: ID của job (trong store)
+        name: Tên task đã đăng ký
+        payload: Dữ liệu JSON truyền cho task
+        attempts: Số lần đã chạy thất bại
+    """
+    __slots__ = ('id', 'name', 'payload', 'attempts')
+
+    def __init__(self, id, name, payload, attempts=0):
+        self.id = id
+        self.name = name
+        self.payload = payload
+        self.attempts = attempts
+
+
+class MemoryJobStore:
+    """Giữ job trong bộ nhớ của process (mặc định)
+
+    Job chưa chạy sẽ mất khi process khởi động lại; dùng SQLiteJobStore nếu cần
+    giữ job qua các lần khởi động lại.
+    """
+
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self._ready = deque()
+        self._delayed = []  # heap (run_at, seq, job)
+        self._seq = itertools.count(1)
+        self._cond = threading.Condition()
+
+    def put_many(self, name, payloads, run_at):
+        with self._cond:
+            if len(self._ready) + len(self._delayed) + len(payloads) > self.max_pending:
+                raise QueueFull()
+            for payload in payloads:
+                job = Job(next(self._seq), name, payload)
+                if run_at <= time.time():
+                    self._ready.append(job)
+                else:
+                    heapq.heappush(self._delayed, (run_at, job.id, job))
+            self._cond.notify(len(payloads))
+
+    def _promote(self, now):
+        while self._delayed and self._delayed[0][0] <= now:
+            self._ready.append(heapq.heappop(self._delayed)[2])
+
+    def claim(self, batch_sizes, timeout):
+        """Lấy job kế tiếp (và các job cùng task nếu task chạy theo lô), chờ tối đa timeout giây"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                now = time.time()
+                self._promote(now)
+                if self._ready:
+                    break
+                wait = deadline - now
+                if self._delayed:
+                    wait = min(wait, self._delayed[0][0] - now)
+                if deadline <= now:
+                    return []
+                self._cond.wait(max(wait, 0.01))
+
+            first = self._ready.popleft()
+            jobs = [first]
+            limit = batch_sizes.get(first.name, 1)
+            if limit > 1:
+                rest = deque()
+                while self._ready and len(jobs) < limit:
+                    job = self._ready.popleft()
+                    (jobs if job.name == first.name else rest).append(job)
+                rest.extend(self._ready)
+                self._ready = rest
+            return jobs
+
+    def complete(self, job):
+        pass
+
+    def retry(self, job, run_at, error):
+        with self._cond:
+            heapq.heappush(self._delayed, (run_at, job.id, job))
+            self._cond.notify()
+
+    def fail(self, job, error):
+        pass
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._ready) + len(self._delayed)
+
+
+class SQLiteJobStore:
+    """Lưu job trong một file SQLite, giữ được qua các lần khởi động lại
+
+    Mọi worker (kể cả ở các process gunicorn khác nhau) lấy job bằng một
+    transaction BEGIN IMMEDIATE ngắn. Job đang chạy có thời hạn thuê (lease);
+    nếu process chết giữa chừng, job được chạy lại sau khi hết hạn.
+    """
+
+    def __init__(self, path, max_pending, lease=300):
+        self.path = path
+        self.max_pending = max_pending
+        self.lease = lease
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        # Đánh thức worker ngay khi process này thêm job, thay vì chờ hết chu kỳ poll
+        self._wakeup = threading.Event()
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS background_jobs ('
+            'id INTEGER PRIMARY KEY, name TEXT NOT NULL, payload TEXT NOT NULL, '
+            "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+            'run_at REAL NOT NULL, locked_until REAL, last_error TEXT, created_at REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS ix_background_jobs_status_run_at '
+            'ON background_jobs (status, run_at)'
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, work):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    def put_many(self, name, payloads, run_at):
+        now = time.time()
+        rows = [(name, json.dumps(payload), run_at, now) for payload in payloads]
+
+        def work(conn):
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM background_jobs WHERE status != 'failed'"
+            ).fetchone()[0]
+            if pending + len(rows) > self.max_pending:
+                raise QueueFull()
+            conn.executemany(
+                'INSERT INTO background_jobs (name, payload, run_at, created_at) VALUES (?, ?, ?, ?)',
+                rows
+            )
+        self._transaction(work)
+        self._wakeup.set()
+
+    def claim(self, batch_sizes, timeout):
+        now = time.time()
+        # Job chờ đến hạn, hoặc job 'running' mà process giữ nó đã chết (hết lease)
+        ready = ("((status = 'pending' AND run_at <= ?) "
+                 "OR (status = 'running' AND locked_until < ?))")
+
+        def work(conn):
+            row = conn.execute(
+                f'SELECT id, name, payload, attempts FROM background_jobs WHERE {ready} '
+                'ORDER BY run_at LIMIT 1', (now, now)
+            ).fetchone()
+            if row is None:
+                return []
+            rows = [row]
+            limit = batch_sizes.get(row[1], 1)
+            if limit > 1:
+                rows += conn.execute(
+                    f'SELECT id, name, payload, attempts FROM background_jobs WHERE {ready} '
+                    'AND name = ? AND id != ? ORDER BY run_at LIMIT ?',
+                    (now, now, row[1], row[0], limit - 1)
+                ).fetchall()
+            conn.executemany(
+                "UPDATE background_jobs SET status = 'running', locked_until = ? WHERE id = ?",
+                [(now + self.lease, r[0]) for r in rows]
+            )
+            return [Job(r[0], r[1], json.loads(r[2]), r[3]) for r in rows]
+
+        jobs = self._transaction(work)
+        if not jobs:
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+        return jobs
+
+    def complete(self, job):
+        self._connect().execute('DELETE FROM background_jobs WHERE id = ?', (job.id,))
+
+    def retry(self, job, run_at, error):
+        self._connect().execute(
+            "UPDATE background_jobs SET status = 'pending', attempts = ?, run_at = ?, "
+            'locked_until = NULL, last_error = ? WHERE id = ?',
+            (job.attempts, run_at, error, job.id)
+        )
+
+    def fail(self, job, error):
+        self._connect().execute(
+            "UPDATE background_jobs SET status = 'failed', attempts = ?, locked_until = NULL, "
+            'last_error = ? WHERE id = ?',
+            (job.attempts, error, job.id)
+        )
+
+    def pending_count(self):
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM background_jobs WHERE status != 'failed'"
+        ).fetchone()[0]
+
+
+class JobQueue:
+    """Hàng đợi job chạy nền với số worker cố định
+
+    Task được đăng ký bằng decorator `task`; task chạy theo lô (batch=True) nhận
+    list payload và trả về list lỗi (None nếu thành công) theo đúng thứ tự.
+    Job lỗi được chạy lại với backoff lũy thừa; PermanentJobError hoặc hết
+    JOB_MAX_ATTEMPTS lần thì job bị đánh dấu thất bại.
+
+    Worker được khởi động ở lần enqueue đầu tiên (không tạo thread khi chỉ chạy
+    lệnh CLI hay trước khi gunicorn fork), hoặc chạy riêng bằng `flask stem worker`.
+
+    Cấu hình qua Config:
+        JOB_QUEUE_BACKEND: 'memory' (mặc định) hoặc 'sqlite'
+        JOB_QUEUE_SQLITE_PATH: File SQLite cho backend 'sqlite'
+        JOB_QUEUE_WORKERS: Số worker thread
+        JOB_QUEUE_MAX_PENDING: Số job chờ tối đa, vượt quá thì enqueue ném QueueFull
+        JOB_QUEUE_BATCH_SIZE: Số job tối đa trong một lô
+        JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY, JOB_RETRY_MAX_DELAY: Chính sách chạy lại
+    """
+
+    # Thời gian chờ tối đa của worker trước khi kiểm tra lại (giây)
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, app=None):
+        self.app = None
+        self.store = None
+        self._tasks = {}
+        self._workers = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        config = app.config
+        self.workers = config.get('JOB_QUEUE_WORKERS', 2)
+        self.batch_size = config.get('JOB_QUEUE_BATCH_SIZE', 50)
+        self.max_attempts = config.get('JOB_MAX_ATTEMPTS', 5)
+        self.retry_delay = config.get('JOB_RETRY_DELAY', 30)
+        self.retry_max_delay = config.get('JOB_RETRY_MAX_DELAY', 3600)
+        max_pending = config.get('JOB_QUEUE_MAX_PENDING', 10000)
+
+        backend = config.get('JOB_QUEUE_BACKEND', 'memory')
+        if backend == 'sqlite':
+            self.store = SQLiteJobStore(config['JOB_QUEUE_SQLITE_PATH'], max_pending)
+        elif backend == 'memory':
+            self.store = MemoryJobStore(max_pending)
+        else:
+            raise ValueError(f'JOB_QUEUE_BACKEND không hợp lệ: {backend}')
+
+        app.extensions['job_queue'] = self
+
+    def task(self, name, batch=False):
+        """Decorator đăng ký một task
+
+        Args:
+            name: Tên task dùng khi enqueue
+            batch: True nếu hàm nhận list payload (tối đa JOB_QUEUE_BATCH_SIZE)
+        """
+        def decorator(func):
+            self._tasks[name] = (func, batch)
+            return func
+        return decorator
+
+    def enqueue(self, name, payload, delay=0):
+        """Thêm một job vào hàng đợi
+
+        Args:
+            name: Tên task
+            payload: Dữ liệu (phải chuyển được sang JSON)
+            delay: Số giây chờ trước khi chạy
+
+        Raises:
+            QueueFull: Nếu hàng đợi đã đầy
+        """
+        self.enqueue_many(name, [payload], delay)
+
+    def enqueue_many(self, name, payloads, delay=0):
+        """Thêm nhiều job của cùng một task trong một lần (một transaction với SQLite)"""
+        if name not in self._tasks:
+            raise KeyError(f'Task chưa được đăng ký: {name}')
+        if not payloads:
+            return
+        self.store.put_many(name, list(payloads), time.time() + delay)
+        self.start()
+
+    def start(self):
+        """Khởi động các worker thread nếu chưa chạy"""
+        with self._lock:
+            if self._workers:
+                return
+            self._stop.clear()
+            for i in range(self.workers):
+                worker = threading.Thread(target=self._run, name=f'job-worker-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def stop(self, timeout=None):
+        """Dừng các worker sau khi chúng xong job đang chạy"""
+        self._stop.set()
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.join(timeout)
+
+    def run_forever(self):
+        """Chạy worker ở foreground (dùng cho `flask stem worker`)"""
+        self.start()
+        try:
+            while not self._stop.wait(self.POLL_INTERVAL):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _batch_sizes(self):
+        return {name: self.batch_size if batch else 1 for name, (_, batch) in self._tasks.items()}
+
+    def _run(self):
+        batch_sizes = self._batch_sizes()
+        while not self._stop.is_set():
+            try:
+                jobs = self.store.claim(batch_sizes, self.POLL_INTERVAL)
+            except Exception:
+                self.app.logger.exception('Không lấy được job từ hàng đợi')
+                time.sleep(self.POLL_INTERVAL)
+                continue
+            if jobs:
+                with self.app.app_context():
+                    self._execute(jobs)
+
+    def _execute(self, jobs):
+        func, batch = self._tasks.get(jobs[0].name, (None, False))
+        if func is None:
+            for job in jobs:
+                self._finish(job, PermanentJobError(f'Task chưa được đăng ký: {job.name}'))
+            return
+
+        try:
+            if batch:
+                errors = func([job.payload for job in jobs])
+            else:
+                func(jobs[0].payload)
+                errors = [None]
+        except Exception as e:
+            errors = [e] * len(jobs)
+
+        for job, error in zip(jobs, errors):
+            self._finish(job, error)
+
+    def _finish(self, job, error):
+        if error is None:
+            self.store.complete(job)
+            return
+
+        job.attempts += 1
+        message = f'{type(error).__name__}: {error}'
+        if isinstance(error, PermanentJobError) or job.attempts >= self.max_attempts:
+            self.app.logger.error(f'Job {job.name}#{job.id} thất bại sau {job.attempts} lần: {message}')
+            self.store.fail(job, message)
+            return
+
+        # Backoff lũy thừa có jitter để các job lỗi cùng lúc không chạy lại cùng lúc
+        delay = min(self.retry_max_delay, self.retry_delay * 2 ** (job.attempts - 1))
+        delay *= random.uniform(0.8, 1.2)
+        self.app.logger.warning(f'Job {job.name}#{job.id} lỗi, chạy lại sau {delay:.0f}s: {message}')
+        self.store.retry(job, time.time() + delay, message)
+
+
+job_queue = JobQueue()
@@ -0,0 +1,55 @@
+import json
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson là tùy chọn, thiếu thì dùng module json chuẩn
+    orjson = None
+
+
+def _default(o):
+    # datetime/date theo ISO 8601 (giống orjson) thay vì định dạng HTTP date của Flask
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider của ứng dụng, dùng orjson nếu đã cài
+
+    - datetime và date được ghi theo ISO 8601 (naive UTC như trong database), nên
+      handler có thể trả thẳng giá trị của cột thay vì gọi isoformat()
+    - Giữ nguyên thứ tự khóa của dictionary và ghi UTF-8 trực tiếp (không escape
+      tiếng Việt thành \\uXXXX), cho cả orjson lẫn json chuẩn
+    - Response được tạo từ bytes của orjson, không qua chuỗi trung gian
+    """
+    default = staticmethod(_default)
+    ensure_ascii = False
+    sort_keys = False
+
+    def _orjson_options(self, pretty=False):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._orjson_options(pretty))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
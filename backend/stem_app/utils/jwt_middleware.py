@@ -1,15 +1,157 @@
 import jwt
 import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from functools import wraps
 from flask import request, jsonify, current_app, g
+from stem_app.models import db
 from stem_app.models.user import User
 
-def jwt_required(f):
-    """Decorator để yêu cầu JWT token hợp lệ"""
+# Số token đã xác thực tối đa được giữ trong cache của mỗi process
+CLAIMS_CACHE_SIZE = 4096
+
+
+class JWTUser:
+    """Người dùng được xác định từ claims của JWT, không cần truy vấn database
+
+    Tương thích với các thuộc tính Flask-Login mà các view đang dùng.
+    """
+    __slots__ = ('id', 'email', 'is_teacher')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, id, email, is_teacher):
+        self.id = id
+        self.email = email
+        self.is_teacher = is_teacher
+
+    def get_id(self):
+        return str(self.id)
+
+    def __repr__(self):
+        return f'<JWTUser {self.id}>'
+
+
+class ClaimsCache:
+    """Cache LRU cho token đã xác thực chữ ký, mỗi mục hết hạn theo claim `exp`
+
+    Khóa là SHA-256 của token nên cache không giữ token gốc trong bộ nhớ.
+    """
+
+    def __init__(self, maxsize=CLAIMS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Lấy user đã cache nếu token chưa hết hạn
+
+        Args:
+            key: Digest của token
+
+        Returns:
+            JWTUser hoặc None nếu không có trong cache
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                user, expires_at = entry
+                if expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return user
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, user, expires_at):
+        """Lưu user đã xác thực cho đến thời điểm expires_at (epoch giây)"""
+        with self._lock:
+            self._data[key] = (user, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Thống kê cache
+
+        Returns:
+            Dictionary gồm hits, misses và size
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data)}
+
+
+claims_cache = ClaimsCache()
+
+
+def _token_digest(token):
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+def decode_token(token):
+    """Xác thực token và trả về JWTUser, dùng cache để bỏ qua HMAC cho token đã gặp
+
+    Args:
+        token: Chuỗi JWT
+
+    Returns:
+        JWTUser tương ứng với claims của token
+
+    Raises:
+        jwt.ExpiredSignatureError: Nếu token đã hết hạn
+        jwt.InvalidTokenError: Nếu token không hợp lệ
+    """
+    key = _token_digest(token)
+    user = claims_cache.get(key)
+    if user is not None:
+        return user
+
+    data = jwt.decode(
+        token,
+        os.environ.get('JWT_SECRET_KEY', 'dev-key'),
+        algorithms=['HS256']
+    )
+    user = JWTUser(data.get('id'), data.get('email'), data.get('is_teacher', False))
+
+    # Chỉ cache token có exp, để mục cache tự hết hạn cùng với token
+    exp = data.get('exp')
+    if exp is not None:
+        claims_cache.set(key, user, float(exp))
+    return user
+
+
+def get_cache_stats():
+    """Lấy số lần hit/miss của cache xác thực JWT trong process hiện tại"""
+    return claims_cache.stats()
+
+
+def jwt_required(f=None, fresh_user=False):
+    """Decorator để yêu cầu JWT token hợp lệ
+
+    Danh tính lấy hoàn toàn từ claims của token, không truy vấn database.
+    Dùng `@jwt_required(fresh_user=True)` cho các thao tác cần quyền chính xác
+    tại thời điểm hiện tại (chấm điểm, xóa...): user sẽ được nạp lại từ database.
+    """
+    if f is None:
+        return lambda func: jwt_required(func, fresh_user=fresh_user)
+
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
-        
+
         # Lấy token từ header Authorization
         if 'Authorization' in request.headers:
             auth_header = request.headers['Authorization']
@@ -17,39 +159,13 @@ def jwt_required(f):
                 token = auth_header.split(" ")[1]  # Bearer <token>
             except IndexError:
                 return jsonify({'error': 'Token format không hợp lệ'}), 401
-        
+
         if not token:
             return jsonify({'error': 'Token không được cung cấp'}), 401
-        
+
         try:
-            # Decode JWT token
-            data = jwt.decode(
-                token, 
-                os.environ.get('JWT_SECRET_KEY', 'dev-key'), 
-                algorithms=['HS256']
-            )
-            
-            # Lấy thông tin user từ token
-            user_id = data.get('id')
-            user_email = data.get('email')
-            is_teacher = data.get('is_teacher', False)
-            
-            # Tạo mock user object cho Flask-Login
-            class MockUser:
-                def __init__(self, id, email, is_teacher):
-                    self.id = id
-                    self.email = email
-                    self.is_teacher = is_teacher
-                    self.is_authenticated = True
-                    self.is_active = True
-                    self.is_anonymous = False
-                
-                def get_id(self):
-                    return str(self.id)
-            
-            # Set current_user trong g context
-            g.current_user = MockUser(user_id, user_email, is_teacher)
-            
+            principal = decode_token(token)
+
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token đã hết hạn'}), 401
         except jwt.InvalidTokenError:
@@ -57,11 +173,21 @@ def jwt_required(f):
         except Exception as e:
             current_app.logger.error(f"JWT decode error: {str(e)}")
             return jsonify({'error': 'Lỗi xử lý token'}), 401
-        
+
+        if fresh_user:
+            # Nạp lại user để phản ánh thay đổi vai trò hoặc tài khoản đã bị xóa
+            user = db.session.get(User, principal.id)
+            if user is None:
+                return jsonify({'error': 'Người dùng không tồn tại'}), 401
+            g.current_user = user
+        else:
+            # Set current_user trong g context
+            g.current_user = principal
+
         return f(*args, **kwargs)
-    
+
     return decorated
 
 def get_current_user():
     """Lấy current user từ JWT token"""
-    return getattr(g, 'current_user', None) 
\ No newline at end of file
+    return getattr(g, 'current_user', None)
@@ -0,0 +1,107 @@
+import smtplib
+from flask import current_app
+from flask_mail import Mail, Message
+
+from stem_app.utils.jobs import job_queue, PermanentJobError
+
+mail = Mail()
+
+SEND_EMAIL_TASK = 'send_email'
+
+
+def _message_payload(subject, recipients, text_body, html_body=None, sender=None):
+    return {
+        'subject': subject,
+        'sender': sender or current_app.config['MAIL_DEFAULT_SENDER'],
+        'recipients': list(recipients),
+        'text_body': text_body,
+        'html_body': html_body,
+    }
+
+
+def send_email(subject, recipients, text_body, html_body=None, sender=None):
+    """Xếp một email vào hàng đợi gửi nền
+
+    Args:
+        subject: Tiêu đề
+        recipients: List địa chỉ người nhận
+        text_body: Nội dung dạng văn bản
+        html_body: Nội dung HTML (tùy chọn)
+        sender: Người gửi (mặc định MAIL_DEFAULT_SENDER)
+
+    Raises:
+        QueueFull: Nếu hàng đợi đã đầy
+    """
+    job_queue.enqueue(SEND_EMAIL_TASK, _message_payload(
+        subject, recipients, text_body, html_body, sender
+    ))
+
+
+def send_bulk_email(messages):
+    """Xếp nhiều email vào hàng đợi trong một lần (vd. thông báo điểm cho cả lớp)
+
+    Các email được worker gửi theo lô JOB_QUEUE_BATCH_SIZE, mỗi lô dùng chung
+    một kết nối SMTP.
+
+    Args:
+        messages: List dict với các khóa subject, recipients, text_body,
+                  html_body (tùy chọn), sender (tùy chọn)
+    """
+    job_queue.enqueue_many(SEND_EMAIL_TASK, [_message_payload(**message) for message in messages])
+
+
+def _classify(error):
+    # Lỗi 5xx (địa chỉ bị từ chối, nội dung bị chặn...) không thể thành công khi gửi lại;
+    # lỗi 4xx là tạm thời và được chạy lại với backoff
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        if all(500 <= code < 600 for code, _ in error.recipients.values()):
+            return PermanentJobError(f'Người nhận bị từ chối: {", ".join(error.recipients)}')
+        return error
+    if 500 <= error.smtp_code < 600:
+        return PermanentJobError(f'{error.smtp_code} {error.smtp_error!r}')
+    return error
+
+
+def _build_message(payload):
+    return Message(
+        payload['subject'],
+        sender=payload['sender'],
+        recipients=payload['recipients'],
+        body=payload['text_body'],
+        html=payload['html_body'],
+    )
+
+
+@job_queue.task(SEND_EMAIL_TASK, batch=True)
+def deliver_emails(payloads):
+    """Gửi một lô email qua một kết nối SMTP duy nhất
+
+    Returns:
+        list: Lỗi của từng email (None nếu đã gửi), theo thứ tự payloads
+    """
+    errors = [None] * len(payloads)
+    index = 0
+    try:
+        with mail.connect() as connection:
+            for index, payload in enumerate(payloads):
+                try:
+                    connection.send(_build_message(payload))
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                        smtplib.SMTPDataError) as e:
+                    # Server từ chối riêng email này (smtplib đã RSET), kết nối vẫn dùng tiếp được
+                    errors[index] = _classify(e)
+                except (smtplib.SMTPException, OSError):
+                    # Lỗi của kết nối: xử lý chung cho các email còn lại bên dưới
+                    raise
+                except Exception as e:
+                    # Email không hợp lệ (header có ký tự xuống dòng, thiếu người nhận...) bị
+                    # Flask-Mail từ chối trước khi gửi; gửi lại cũng không được, và không làm
+                    # hỏng các email khác trong lô
+                    errors[index] = PermanentJobError(f'{type(e).__name__}: {e}')
+            index = len(payloads)
+    except (smtplib.SMTPException, OSError) as e:
+        # Không kết nối được hoặc mất kết nối: các email chưa gửi được chạy lại sau.
+        # Lỗi khi QUIT sau khi đã gửi hết (index == len(payloads)) không ảnh hưởng email nào.
+        for i in range(index, len(payloads)):
+            errors[i] = e
+    return errors
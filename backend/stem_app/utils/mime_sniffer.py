@@ -0,0 +1,103 @@
+import queue
+import threading
+from flask import current_app
+
+import magic
+
+# Số byte đầu file dùng để nhận diện MIME
+SNIFF_BYTES = 2048
+
+# Số detector tối đa khi không có app context
+DEFAULT_POOL_SIZE = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class MagicPool:
+    """Pool các đối tượng magic.Magic dùng chung trong process
+
+    Mỗi magic.Magic nạp cơ sở dữ liệu magic một lần khi khởi tạo và chỉ được dùng
+    bởi một luồng tại một thời điểm (có khóa riêng). Pool giữ tối đa `size` đối
+    tượng, tạo dần khi cần; luồng thứ size+1 sẽ chờ đến khi có detector rảnh.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE):
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if not create:
+            return self._idle.get()
+
+        try:
+            return magic.Magic(mime=True)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def from_buffer(self, data):
+        """Nhận diện MIME từ một đoạn bytes
+
+        Args:
+            data: Phần đầu của file
+
+        Returns:
+            str: MIME type, vd. 'application/pdf'
+        """
+        detector = self._checkout()
+        try:
+            return detector.from_buffer(data)
+        finally:
+            self._idle.put(detector)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                try:
+                    size = current_app.config.get('MIME_DETECTOR_POOL_SIZE', DEFAULT_POOL_SIZE)
+                except RuntimeError:
+                    # Ngoài app context
+                    size = DEFAULT_POOL_SIZE
+                _pool = MagicPool(size)
+    return _pool
+
+
+def detect_mime(data):
+    """Nhận diện MIME từ tối đa SNIFF_BYTES byte đầu tiên của file
+
+    Args:
+        data: Phần đầu của file (bytes)
+
+    Returns:
+        str: MIME type
+    """
+    return _get_pool().from_buffer(data[:SNIFF_BYTES])
+
+
+def sniff_stream(stream):
+    """Đọc phần đầu của stream và nhận diện MIME mà không đọc hết file
+
+    Args:
+        stream: Stream nhị phân đang ở đầu file
+
+    Returns:
+        tuple: (mimetype, head) - head là các byte đã đọc, cần ghi lại trước phần còn lại
+    """
+    head = stream.read(SNIFF_BYTES)
+    return detect_mime(head), head
@@ -0,0 +1,174 @@
+import base64
+import json
+from datetime import datetime
+from flask import request, current_app
+from sqlalchemy import and_, or_, Select
+
+from stem_app.models import db
+
+# Số bản ghi tối đa cho mỗi trang API, bất kể client yêu cầu bao nhiêu
+MAX_PAGE_SIZE = 100
+
+# Header chứa cursor của trang kế tiếp (body vẫn là mảng JSON như trước)
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def encode_cursor(values):
+    """Mã hóa giá trị khóa của bản ghi cuối trang thành cursor
+
+    Args:
+        values: List các giá trị khóa (int, str hoặc datetime)
+
+    Returns:
+        str: Cursor dạng base64 an toàn cho URL
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Giải mã cursor thành list giá trị khóa theo kiểu của từng cột
+
+    Args:
+        cursor: Chuỗi cursor do encode_cursor tạo ra
+        columns: Các cột dùng làm khóa phân trang
+
+    Returns:
+        list: Giá trị khóa tương ứng với columns
+
+    Raises:
+        ValueError: Nếu cursor không hợp lệ
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError('Cursor không hợp lệ')
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Cursor không hợp lệ')
+
+    result = []
+    for column, value in zip(columns, values):
+        if value is not None:
+            value = _cursor_value(column.type.python_type, value)
+        result.append(value)
+    return result
+
+
+def _cursor_value(python_type, value):
+    # Cursor do client gửi lên: chỉ nhận đúng kiểu JSON mà encode_cursor tạo ra cho cột đó
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise ValueError('Cursor không hợp lệ')
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError('Cursor không hợp lệ')
+    if python_type is float:
+        valid = isinstance(value, (int, float))
+    else:
+        valid = isinstance(value, python_type)
+    # bool là lớp con của int trong Python nhưng không phải giá trị khóa hợp lệ
+    if not valid or isinstance(value, bool):
+        raise ValueError('Cursor không hợp lệ')
+    return value
+
+
+def get_page_args():
+    """Đọc các tham số phân trang từ query string
+
+    Hỗ trợ `limit`, `cursor` và `fields` (danh sách trường cách nhau bởi dấu phẩy).
+
+    Returns:
+        tuple: (limit, cursor, fields) - fields là None nếu không giới hạn trường
+
+    Raises:
+        ValueError: Nếu limit không hợp lệ
+    """
+    default_limit = current_app.config.get('POSTS_PER_PAGE', 10)
+    try:
+        limit = int(request.args.get('limit', default_limit))
+    except (TypeError, ValueError):
+        raise ValueError('Tham số limit không hợp lệ')
+    if limit < 1:
+        raise ValueError('Tham số limit không hợp lệ')
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    cursor = request.args.get('cursor') or None
+
+    fields = request.args.get('fields')
+    if fields:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+    else:
+        fields = None
+
+    return limit, cursor, fields
+
+
+def keyset_paginate(query, columns, limit, cursor=None, descending=False):
+    """Phân trang theo keyset (seek) thay vì OFFSET
+
+    Mỗi trang chỉ cần một truy vấn `WHERE (k1, k2) > cursor ORDER BY k1, k2 LIMIT n+1`,
+    nên chi phí không tăng theo số trang hay kích thước bảng.
+
+    Args:
+        query: Query SQLAlchemy hoặc select() (xem utils/serializers.py) đã lọc theo quyền;
+            với select(), kết quả là các Row
+        columns: Các cột khóa, cột cuối phải là duy nhất (thường là id)
+        limit: Số bản ghi tối đa trên trang
+        cursor: Cursor của trang trước (None cho trang đầu)
+        descending: True để sắp xếp giảm dần (mới nhất trước)
+
+    Returns:
+        tuple: (items, next_cursor) - next_cursor là None nếu đã hết dữ liệu
+
+    Raises:
+        ValueError: Nếu cursor không hợp lệ
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        clauses = []
+        for i, column in enumerate(columns):
+            equal = [columns[j] == values[j] for j in range(i)]
+            seek = column < values[i] if descending else column > values[i]
+            clauses.append(and_(*equal, seek))
+        query = query.filter(or_(*clauses))
+
+    order = [c.desc() for c in columns] if descending else [c.asc() for c in columns]
+    is_select = isinstance(query, Select)
+    if is_select:
+        # Cột khóa được thêm vào cuối Row để tạo cursor, kể cả khi fields= không chọn chúng
+        query = query.add_columns(*columns)
+        items = db.session.execute(query.order_by(*order).limit(limit + 1)).all()
+    else:
+        items = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        if is_select:
+            next_cursor = encode_cursor(list(last[-len(columns):]))
+        else:
+            next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+
+    return items, next_cursor
+
+
+def check_fields(fields, allowed):
+    """Kiểm tra các trường yêu cầu có nằm trong tập trường trả về không
+
+    Args:
+        fields: List tên trường hoặc None
+        allowed: Tập tên trường hợp lệ
+
+    Raises:
+        ValueError: Nếu có trường không hợp lệ
+    """
+    if fields:
+        invalid = [f for f in fields if f not in allowed]
+        if invalid:
+            raise ValueError(f"Trường không hợp lệ: {', '.join(invalid)}")
@@ -0,0 +1,133 @@
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+)
+
+# Giá trị mặc định khi không có app context (vd. script init_db)
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256:600000'
+DEFAULT_HASH_WORKERS = 4
+
+_executor = None
+_pending = None
+_executor_lock = threading.Lock()
+
+
+class PasswordHashBusy(Exception):
+    """Pool băm mật khẩu đã đầy, request nên bị từ chối thay vì xếp hàng"""
+
+
+def _config(key, default):
+    try:
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        # Ngoài app context
+        return default
+
+
+def _get_executor():
+    """Pool luồng dùng chung cho các phép băm mật khẩu của process
+
+    Số luồng cố định (PASSWORD_HASH_WORKERS) nên dù có bao nhiêu request đăng nhập
+    cùng lúc, số phép băm chạy song song cũng không vượt quá giới hạn này.
+    hashlib nhả GIL trong lúc băm nên các luồng khác vẫn phục vụ request bình thường.
+    """
+    global _executor, _pending
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = _config('PASSWORD_HASH_WORKERS', DEFAULT_HASH_WORKERS)
+                # Số phép băm tối đa (đang chạy + đang chờ) được nhận vào pool
+                _pending = threading.BoundedSemaphore(
+                    _config('PASSWORD_HASH_MAX_PENDING', workers * 4)
+                )
+                _executor = ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix='password-hash'
+                )
+    return _executor
+
+
+def _run(fn, *args):
+    """Chạy một phép băm trong pool, từ chối ngay nếu hàng đợi đã đầy
+
+    Raises:
+        PasswordHashBusy: Nếu đã có PASSWORD_HASH_MAX_PENDING phép băm đang chờ
+    """
+    executor = _get_executor()
+    if not _pending.acquire(blocking=False):
+        raise PasswordHashBusy()
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return future.result()
+
+
+def hash_method():
+    """Tham số băm hiện tại, vd. 'pbkdf2:sha256:600000' hoặc 'scrypt:32768:8:1'"""
+    return _config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+
+
+def hash_password(password):
+    """Băm mật khẩu với tham số lấy từ Config.PASSWORD_HASH_METHOD
+
+    Args:
+        password: Mật khẩu chưa mã hóa
+
+    Returns:
+        str: Chuỗi hash theo định dạng của werkzeug
+
+    Raises:
+        PasswordHashBusy: Nếu pool băm đang quá tải
+    """
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(pwhash, password):
+    """Kiểm tra mật khẩu trong pool băm giới hạn
+
+    Args:
+        pwhash: Chuỗi hash đã lưu
+        password: Mật khẩu cần kiểm tra
+
+    Returns:
+        bool: True nếu mật khẩu đúng
+
+    Raises:
+        PasswordHashBusy: Nếu pool băm đang quá tải
+    """
+    if not pwhash:
+        return False
+    return _run(check_password_hash, pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """Kiểm tra hash đã lưu có dùng tham số cũ hơn cấu hình hiện tại không
+
+    Args:
+        pwhash: Chuỗi hash đã lưu
+
+    Returns:
+        bool: True nếu cần băm lại
+    """
+    if not pwhash or '$' not in pwhash:
+        return True
+    return pwhash.split('$', 1)[0] != _method_prefix(hash_method())
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    # Điền tham số mặc định giống werkzeug ('scrypt' -> 'scrypt:32768:8:1',
+    # 'pbkdf2' -> 'pbkdf2:sha256:600000') mà không phải băm thử trên luồng request
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        return 'scrypt:32768:8:1'
+    if name == 'pbkdf2' and len(args) < 2:
+        hash_name = args[0] if args else 'sha256'
+        return f'pbkdf2:{hash_name}:{DEFAULT_PBKDF2_ITERATIONS}'
+    return method
@@ -0,0 +1,189 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    """Lưu token bucket trong bộ nhớ của process (mặc định)
+
+    Mỗi worker gunicorn có bucket riêng, nên giới hạn thực tế nhân theo số worker.
+    Dùng SQLiteBackend nếu cần giới hạn chung cho mọi worker.
+
+    Bucket được giữ theo thứ tự dùng gần nhất (LRU): bucket cũ nhất nằm đầu
+    OrderedDict, nên việc dọn dẹp chỉ xem các phần tử đầu thay vì quét cả bảng.
+    """
+
+    # Số khóa tối đa; vượt quá thì bỏ bucket lâu không dùng nhất
+    MAX_KEYS = 100000
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, capacity, now):
+        """Lấy một token từ bucket
+
+        Args:
+            key: Khóa của bucket
+            rate: Số token được nạp lại mỗi giây
+            capacity: Số token tối đa (burst)
+            now: Thời điểm hiện tại (giây)
+
+        Returns:
+            bool: True nếu còn token
+        """
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, None))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Bucket không được dùng lâu hơn thời gian nạp đầy thì tương đương bucket mới
+            self._buckets[key] = (tokens, now, now + capacity / rate)
+            self._buckets.move_to_end(key)
+            self._prune(now)
+            return allowed
+
+    def _prune(self, now):
+        # Bỏ các bucket đã nạp đầy ở đầu hàng (chi phí khấu hao O(1) mỗi lần gọi),
+        # sau đó giới hạn cứng số khóa
+        buckets = self._buckets
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if oldest[2] > now:
+                break
+            buckets.popitem(last=False)
+        while len(buckets) > self.MAX_KEYS:
+            buckets.popitem(last=False)
+
+
+class SQLiteBackend:
+    """Lưu token bucket trong một file SQLite dùng chung cho mọi worker
+
+    Mỗi lần lấy token là một transaction BEGIN IMMEDIATE ngắn nên các worker
+    được tuần tự hóa đúng cách mà không cần server riêng.
+    """
+
+    # Dọn các bucket cũ sau mỗi ngần này lần gọi
+    CLEANUP_INTERVAL = 1000
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._calls = 0
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit_buckets ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key, rate, capacity, now):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?', (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+
+            self._calls += 1
+            if self._calls % self.CLEANUP_INTERVAL == 0:
+                conn.execute(
+                    'DELETE FROM rate_limit_buckets WHERE updated < ?', (now - capacity / rate,)
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed
+
+
+class LoginRateLimiter:
+    """Giới hạn số lần đăng nhập theo email và theo IP bằng token bucket
+
+    Cấu hình qua Config:
+        LOGIN_RATE_LIMIT_BACKEND: 'memory' (mặc định) hoặc 'sqlite'
+        LOGIN_RATE_LIMIT_SQLITE_PATH: File SQLite cho backend 'sqlite'
+        LOGIN_RATE_LIMIT_EMAIL: (số lần, số giây) cho mỗi email
+        LOGIN_RATE_LIMIT_IP: (số lần, số giây) cho mỗi IP
+        LOGIN_RATE_LIMIT_TRUSTED_PROXIES: Số proxy (nginx, load balancer) đứng trước
+            ứng dụng; IP của client được lấy từ X-Forwarded-For (xem create_app)
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.email_limit = (5, 60)
+        self.ip_limit = (20, 60)
+        self.enabled = True
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('LOGIN_RATE_LIMIT_ENABLED', True)
+        self.email_limit = app.config.get('LOGIN_RATE_LIMIT_EMAIL', self.email_limit)
+        self.ip_limit = app.config.get('LOGIN_RATE_LIMIT_IP', self.ip_limit)
+
+        backend = app.config.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+        if backend == 'sqlite':
+            self.backend = SQLiteBackend(app.config['LOGIN_RATE_LIMIT_SQLITE_PATH'])
+        elif backend == 'memory':
+            self.backend = MemoryBackend()
+        else:
+            raise ValueError(f'LOGIN_RATE_LIMIT_BACKEND không hợp lệ: {backend}')
+
+        app.extensions['login_rate_limiter'] = self
+
+    def _consume(self, key, limit, now):
+        count, period = limit
+        return self.backend.consume(key, count / period, count, now)
+
+    def check(self, email, ip):
+        """Kiểm tra một lần đăng nhập có được phép không
+
+        Bucket của IP được kiểm tra trước. Khi IP đã hết token, lần thử bị từ chối
+        mà không đụng tới bucket của email, nên một client không thể tạo vô số bucket
+        bằng cách đổi email. Khi IP còn token, bucket của email vẫn bị trừ token để
+        không thể né giới hạn theo email bằng cách đổi IP.
+
+        Args:
+            email: Email đăng nhập (chuỗi)
+            ip: Địa chỉ IP của client (xem LOGIN_RATE_LIMIT_TRUSTED_PROXIES khi chạy sau proxy)
+
+        Returns:
+            int: 0 nếu được phép thử đăng nhập, nếu không là số giây gợi ý cho
+                header Retry-After (theo bucket đã hết token)
+        """
+        if not self.enabled:
+            return 0
+        now = time.time()
+        if not self._consume(f'ip:{ip}', self.ip_limit, now):
+            exhausted = self.ip_limit
+        elif not self._consume(f'email:{email.strip().lower()}', self.email_limit, now):
+            exhausted = self.email_limit
+        else:
+            return 0
+        # Thời gian nạp lại một token của bucket đã hết
+        count, period = exhausted
+        return max(1, int(period / count))
+
+
+login_limiter = LoginRateLimiter()
@@ -0,0 +1,221 @@
+import math
+import threading
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import select, func, case
+
+from stem_app.models import db
+from stem_app.models.project import Project
+from stem_app.models.submission import Submission
+from stem_app.models.stats import DashboardStats, SCOPE_TEACHER
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn, thiếu thì luôn dùng SQL
+    np = None
+
+# Thang điểm của bài nộp (xem Submission.validate_score) và số cột histogram
+SCORE_MIN = 0
+SCORE_MAX = 10
+HISTOGRAM_BINS = 10
+
+PERCENTILES = (25, 50, 75, 90)
+
+# Từ số bài đã chấm này trở lên thì tải điểm vào mảng NumPy (nếu có NumPy)
+DEFAULT_NUMPY_THRESHOLD = 5000
+
+STATS_CACHE_SIZE = 256
+
+
+class ScoreStatsCache:
+    """Cache LRU cho kết quả thống kê điểm
+
+    Mỗi mục ghi kèm updated_at của dòng dashboard_stats của giáo viên. Dòng này
+    được cập nhật trong cùng transaction mỗi khi một Submission.score thay đổi
+    (kể cả chấm hàng loạt), nên một lần đọc theo khóa chính là đủ để biết mục
+    cache còn đúng không, kể cả khi điểm được sửa từ process khác.
+    """
+
+    def __init__(self, maxsize=STATS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, cached_version = entry
+            if cached_version != version:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._data[key] = (value, version)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+stats_cache = ScoreStatsCache()
+
+
+def _teacher_version(teacher_id):
+    stats = db.session.get(DashboardStats, (SCOPE_TEACHER, teacher_id))
+    return stats.updated_at if stats is not None else None
+
+
+def _numpy_threshold():
+    return current_app.config.get('SCORE_STATS_NUMPY_THRESHOLD', DEFAULT_NUMPY_THRESHOLD)
+
+
+def _scoped(stmt, project_id=None, teacher_id=None):
+    if project_id is not None:
+        return stmt.where(Submission.project_id == project_id)
+    return stmt.join(Project, Submission.project_id == Project.id) \
+        .where(Project.teacher_id == teacher_id)
+
+
+def _bin_edges():
+    width = (SCORE_MAX - SCORE_MIN) / HISTOGRAM_BINS
+    return [SCORE_MIN + i * width for i in range(HISTOGRAM_BINS + 1)]
+
+
+def _histogram(counts):
+    edges = _bin_edges()
+    return [
+        {'min': edges[i], 'max': edges[i + 1], 'count': int(counts[i])}
+        for i in range(HISTOGRAM_BINS)
+    ]
+
+
+def _sql_percentile(project_id, teacher_id, graded, percentile):
+    # Nội suy tuyến tính giữa hai giá trị liền kề (giống numpy.percentile mặc định)
+    position = (graded - 1) * percentile / 100
+    lower = math.floor(position)
+    stmt = _scoped(select(Submission.score), project_id, teacher_id) \
+        .where(Submission.score.isnot(None)) \
+        .order_by(Submission.score).limit(2).offset(lower)
+    values = db.session.execute(stmt).scalars().all()
+    if len(values) == 1:
+        return values[0]
+    return values[0] + (values[1] - values[0]) * (position - lower)
+
+
+def _sql_stats(project_id, teacher_id, graded):
+    """Thống kê bằng các phép tổng hợp SQL (cho tập điểm nhỏ)"""
+    score = Submission.score
+    row = db.session.execute(_scoped(
+        select(func.avg(score), func.min(score), func.max(score), func.avg(score * score)),
+        project_id, teacher_id
+    )).one()
+    mean, minimum, maximum, mean_square = row
+    variance = max((mean_square or 0) - (mean or 0) ** 2, 0)
+
+    width = (SCORE_MAX - SCORE_MIN) / HISTOGRAM_BINS
+    # Điểm tối đa thuộc cột cuối cùng, giống numpy.histogram
+    bucket = case(
+        (score >= SCORE_MAX, HISTOGRAM_BINS - 1),
+        else_=func.cast((score - SCORE_MIN) / width, db.Integer)
+    )
+    counts = [0] * HISTOGRAM_BINS
+    for index, count in db.session.execute(_scoped(
+        select(bucket, func.count()).where(score.isnot(None)).group_by(bucket),
+        project_id, teacher_id
+    )):
+        counts[index] = count
+
+    return {
+        'mean': mean,
+        'min': minimum,
+        'max': maximum,
+        'stddev': math.sqrt(variance),
+        'percentiles': {
+            f'p{p}': _sql_percentile(project_id, teacher_id, graded, p) for p in PERCENTILES
+        },
+        'histogram': _histogram(counts),
+    }
+
+
+def _numpy_stats(project_id, teacher_id, graded):
+    """Thống kê bằng NumPy: tải điểm vào một mảng một lần rồi tính vector hóa"""
+    result = db.session.execute(_scoped(
+        select(Submission.score).where(Submission.score.isnot(None)),
+        project_id, teacher_id
+    ).execution_options(yield_per=10000))
+    scores = np.fromiter(result.scalars(), dtype=np.float64, count=graded)
+    counts, _ = np.histogram(scores, bins=HISTOGRAM_BINS, range=(SCORE_MIN, SCORE_MAX))
+    percentiles = np.percentile(scores, PERCENTILES)
+    return {
+        'mean': float(scores.mean()),
+        'min': float(scores.min()),
+        'max': float(scores.max()),
+        'stddev': float(scores.std()),
+        'percentiles': {f'p{p}': float(v) for p, v in zip(PERCENTILES, percentiles)},
+        'histogram': _histogram(counts),
+    }
+
+
+def _compute(project_id=None, teacher_id=None):
+    total, graded = db.session.execute(_scoped(
+        select(func.count(Submission.id), func.count(Submission.score)),
+        project_id, teacher_id
+    )).one()
+
+    result = {'submissions': total, 'graded': graded, 'ungraded': total - graded}
+    if graded == 0:
+        result.update({
+            'mean': None, 'min': None, 'max': None, 'stddev': None,
+            'percentiles': {f'p{p}': None for p in PERCENTILES},
+            'histogram': _histogram([0] * HISTOGRAM_BINS),
+        })
+    elif np is not None and graded >= _numpy_threshold():
+        result.update(_numpy_stats(project_id, teacher_id, graded))
+    else:
+        result.update(_sql_stats(project_id, teacher_id, graded))
+    return result
+
+
+def project_score_stats(project):
+    """Phân bố điểm của một dự án (có cache)
+
+    Args:
+        project: Project object
+
+    Returns:
+        dict: submissions, graded, ungraded, mean, min, max, stddev,
+              percentiles (p25, p50, p75, p90) và histogram theo thang 0-10
+    """
+    version = _teacher_version(project.teacher_id)
+    key = ('project', project.id)
+    cached = stats_cache.get(key, version)
+    if cached is None:
+        cached = _compute(project_id=project.id)
+        stats_cache.set(key, version, cached)
+    return cached
+
+
+def teacher_score_stats(teacher_id):
+    """Phân bố điểm trên mọi dự án của một giáo viên (có cache)
+
+    Args:
+        teacher_id: ID giáo viên
+
+    Returns:
+        dict: Cùng cấu trúc với project_score_stats
+    """
+    version = _teacher_version(teacher_id)
+    key = ('teacher', teacher_id)
+    cached = stats_cache.get(key, version)
+    if cached is None:
+        cached = _compute(teacher_id=teacher_id)
+        stats_cache.set(key, version, cached)
+    return cached
@@ -0,0 +1,286 @@
+import re
+import html
+from sqlalchemy import text
+
+# Bảng FTS5 chứa văn bản của dự án, bài nộp và bình luận. rowid = id * 4 + 1/2/3
+# (dự án/bài nộp/bình luận) để ba bảng nguồn không trùng rowid.
+#
+# Cột tags chứa các token dùng để lọc ngay trong truy vấn MATCH, nhờ đó bm25 chỉ chấm
+# điểm các dòng người dùng được xem (lọc bằng cột UNINDEXED hay JOIN thì FTS5 vẫn phải
+# xếp hạng mọi dòng khớp trước):
+# - loại nội dung: project, submission, comment
+# - t<id>: giáo viên sở hữu dự án
+# - s<id>: học sinh của bài nộp (bài nộp và bình luận)
+# - active: dự án đang hoạt động
+SEARCH_TABLE = 'search_index'
+
+SEARCH_KINDS = ('project', 'submission', 'comment')
+
+# Trọng số bm25 cho các cột title, body (tiêu đề quan trọng hơn nội dung); cột tags
+# không tính điểm
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+# Số từ tối đa của một truy vấn
+MAX_QUERY_TERMS = 10
+
+# Ký tự đánh dấu tạm cho snippet, được đổi thành <mark> sau khi escape HTML
+_OPEN = '\x02'
+_CLOSE = '\x03'
+
+_COLUMNS = 'rowid, title, body, tags, kind, ref_id, project_id, submission_id'
+
+_PROJECT_TAGS = "'project t' || {p}.teacher_id || CASE WHEN {p}.is_active THEN ' active' ELSE '' END"
+_SUBMISSION_TAGS = "'{kind} t' || p.teacher_id || ' s' || {s}.student_id"
+
+_INDEX_PROJECT = f"""
+        INSERT INTO {SEARCH_TABLE} ({_COLUMNS})
+        VALUES (new.id * 4 + 1, new.title,
+                coalesce(new.description, '') || char(10) || coalesce(new.requirements, ''),
+                {_PROJECT_TAGS.format(p='new')}, 'project', new.id, new.id, NULL);"""
+
+_INDEX_SUBMISSION = f"""
+        INSERT INTO {SEARCH_TABLE} ({_COLUMNS})
+        SELECT new.id * 4 + 2, new.title,
+               coalesce(new.content, '') || char(10) || coalesce(new.feedback, ''),
+               {_SUBMISSION_TAGS.format(kind='submission', s='new')}, 'submission', new.id, new.project_id, new.id
+        FROM projects p WHERE p.id = new.project_id;"""
+
+_INDEX_COMMENT = f"""
+        INSERT INTO {SEARCH_TABLE} ({_COLUMNS})
+        SELECT new.id * 4 + 3, '', new.content,
+               {_SUBMISSION_TAGS.format(kind='comment', s='s')}, 'comment', new.id, s.project_id, s.id
+        FROM submissions s JOIN projects p ON p.id = s.project_id
+        WHERE s.id = new.submission_id;"""
+
+SEARCH_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title, body, tags,
+        kind UNINDEXED, ref_id UNINDEXED, project_id UNINDEXED, submission_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    # Thứ tự mặc định của cột rank, cho phép ORDER BY rank để FTS5 tự sắp xếp
+    f"""
+    INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank)
+    VALUES ('rank', 'bm25({TITLE_WEIGHT}, {BODY_WEIGHT}, 0.0)')
+    """,
+    # Dự án
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_projects_ai AFTER INSERT ON projects BEGIN{_INDEX_PROJECT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_projects_au
+    AFTER UPDATE OF title, description, requirements, is_active, teacher_id ON projects BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 4 + 1;{_INDEX_PROJECT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_projects_ad AFTER DELETE ON projects BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 4 + 1;
+    END
+    """,
+    # Đổi giáo viên của dự án: cập nhật tag của các bài nộp và bình luận trong dự án
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_projects_teacher
+    AFTER UPDATE OF teacher_id ON projects WHEN old.teacher_id IS NOT new.teacher_id BEGIN
+        UPDATE {SEARCH_TABLE}
+        SET tags = 'submission t' || new.teacher_id || ' s' || s.student_id
+        FROM submissions s
+        WHERE s.project_id = new.id AND {SEARCH_TABLE}.rowid = s.id * 4 + 2;
+        UPDATE {SEARCH_TABLE}
+        SET tags = 'comment t' || new.teacher_id || ' s' || s.student_id
+        FROM comments c JOIN submissions s ON s.id = c.submission_id
+        WHERE s.project_id = new.id AND {SEARCH_TABLE}.rowid = c.id * 4 + 3;
+    END
+    """,
+    # Bài nộp
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_submissions_ai AFTER INSERT ON submissions BEGIN{_INDEX_SUBMISSION}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_submissions_au
+    AFTER UPDATE OF title, content, feedback ON submissions BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 4 + 2;{_INDEX_SUBMISSION}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_submissions_ad AFTER DELETE ON submissions BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 4 + 2;
+    END
+    """,
+    # Bình luận (dự án và học sinh lấy từ bài nộp để lọc theo quyền)
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_comments_ai AFTER INSERT ON comments BEGIN{_INDEX_COMMENT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_comments_au AFTER UPDATE OF content ON comments BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 4 + 3;{_INDEX_COMMENT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_comments_ad AFTER DELETE ON comments BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 4 + 3;
+    END
+    """,
+]
+
+REBUILD_SQL = [
+    f"DELETE FROM {SEARCH_TABLE}",
+    f"""
+    INSERT INTO {SEARCH_TABLE} ({_COLUMNS})
+    SELECT p.id * 4 + 1, p.title, coalesce(p.description, '') || char(10) || coalesce(p.requirements, ''),
+           {_PROJECT_TAGS.format(p='p')}, 'project', p.id, p.id, NULL
+    FROM projects p
+    """,
+    f"""
+    INSERT INTO {SEARCH_TABLE} ({_COLUMNS})
+    SELECT s.id * 4 + 2, s.title, coalesce(s.content, '') || char(10) || coalesce(s.feedback, ''),
+           {_SUBMISSION_TAGS.format(kind='submission', s='s')}, 'submission', s.id, s.project_id, s.id
+    FROM submissions s JOIN projects p ON p.id = s.project_id
+    """,
+    f"""
+    INSERT INTO {SEARCH_TABLE} ({_COLUMNS})
+    SELECT c.id * 4 + 3, '', c.content,
+           {_SUBMISSION_TAGS.format(kind='comment', s='s')}, 'comment', c.id, s.project_id, s.id
+    FROM comments c JOIN submissions s ON s.id = c.submission_id JOIN projects p ON p.id = s.project_id
+    """,
+    # Gộp các segment của chỉ mục sau khi nạp hàng loạt
+    f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')",
+]
+
+
+def search_supported(connection):
+    """Chỉ mục tìm kiếm chỉ có trên SQLite (FTS5)"""
+    return connection.dialect.name == 'sqlite'
+
+
+def create_search_index(connection):
+    """Tạo bảng FTS5 và trigger đồng bộ nếu chưa có, nạp dữ liệu có sẵn khi mới tạo
+
+    Args:
+        connection: Connection của transaction hiện tại
+
+    Returns:
+        bool: True nếu bảng vừa được tạo
+    """
+    if not search_supported(connection):
+        return False
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': SEARCH_TABLE}
+    ).first() is not None
+    for statement in SEARCH_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        rebuild_search_index(connection)
+    return not exists
+
+
+def rebuild_search_index(connection):
+    """Nạp lại toàn bộ chỉ mục từ các bảng nguồn
+
+    Args:
+        connection: Connection của transaction hiện tại
+    """
+    for statement in REBUILD_SQL:
+        connection.execute(text(statement))
+
+
+def build_match_query(q):
+    """Chuyển chuỗi người dùng nhập thành truy vấn FTS5 an toàn
+
+    Mỗi từ được đặt trong dấu ngoặc kép (không dùng cú pháp FTS5 của người dùng),
+    các từ được AND với nhau và từ cuối cùng khớp theo tiền tố.
+
+    Args:
+        q: Chuỗi tìm kiếm
+
+    Returns:
+        str hoặc None nếu không có từ nào
+    """
+    terms = re.findall(r'\w+', q or '')[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _highlight(value):
+    # Escape nội dung người dùng trước khi thêm thẻ <mark>
+    escaped = html.escape(value or '')
+    return escaped.replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def access_filter(user_id, is_teacher, kind=None):
+    """Điều kiện FTS5 trên cột tags giới hạn kết quả theo quyền
+
+    - Giáo viên: mọi nội dung trong dự án của mình
+    - Học sinh: dự án đang hoạt động, bài nộp và bình luận trên bài nộp của mình
+
+    Args:
+        user_id: ID người dùng hiện tại
+        is_teacher: Người dùng là giáo viên
+        kind: Chỉ tìm một loại ('project', 'submission', 'comment')
+
+    Returns:
+        str: Biểu thức FTS5 để AND với truy vấn của người dùng
+    """
+    user_id = int(user_id)
+    if is_teacher:
+        access = f'tags : t{user_id}'
+    else:
+        access = f'tags : (active OR s{user_id})'
+    if kind:
+        if kind not in SEARCH_KINDS:
+            raise ValueError(f'Loại nội dung không hợp lệ: {kind}')
+        access += f' AND tags : {kind}'
+    return access
+
+
+def search(connection, match_query, user_id, is_teacher, kind=None, limit=20):
+    """Tìm kiếm theo bm25, chỉ trả về kết quả người dùng có quyền xem (xem access_filter)
+
+    Bộ lọc quyền nằm trong truy vấn MATCH và kết quả được sắp xếp bằng ORDER BY rank,
+    nên FTS5 chỉ xếp hạng các dòng được xem và chỉ tạo highlight/snippet cho `limit`
+    dòng đầu.
+
+    Args:
+        connection: Connection database
+        match_query: Truy vấn từ build_match_query
+        user_id: ID người dùng hiện tại
+        is_teacher: Người dùng là giáo viên
+        kind: Chỉ tìm một loại ('project', 'submission', 'comment')
+        limit: Số kết quả tối đa
+
+    Returns:
+        list: Các dictionary kết quả, xếp theo độ liên quan
+    """
+    match = f'{{title body}} : ({match_query}) AND {access_filter(user_id, is_teacher, kind)}'
+
+    rows = connection.execute(text(f"""
+        SELECT kind, ref_id, project_id, submission_id,
+               highlight({SEARCH_TABLE}, 0, :open, :close) AS title,
+               snippet({SEARCH_TABLE}, 1, :open, :close, '…', 16) AS snippet,
+               rank
+        FROM {SEARCH_TABLE}
+        WHERE {SEARCH_TABLE} MATCH :match
+        ORDER BY rank
+        LIMIT :limit
+    """), {'match': match, 'limit': limit, 'open': _OPEN, 'close': _CLOSE})
+
+    return [{
+        'type': row.kind,
+        'id': row.ref_id,
+        'project_id': row.project_id,
+        'submission_id': row.submission_id,
+        'title': _highlight(row.title),
+        'snippet': _highlight(row.snippet),
+        # bm25 càng nhỏ càng liên quan; đổi dấu để điểm cao hơn là tốt hơn
+        'score': round(-row.rank, 4),
+    } for row in rows]
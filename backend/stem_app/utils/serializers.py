@@ -0,0 +1,204 @@
+from functools import lru_cache
+from operator import itemgetter
+from sqlalchemy import select, func
+
+from stem_app.models import db
+from stem_app.models.project import Project
+from stem_app.models.submission import Submission
+from stem_app.models.comment import Comment
+from stem_app.models.user import User
+
+
+class Field:
+    """Một trường JSON lấy trực tiếp từ một cột (hoặc biểu thức SQL)"""
+
+    def __init__(self, name, column):
+        self.name = name
+        self.column = column
+
+    def columns(self):
+        return [self.column.label(self.name)]
+
+
+class Nested:
+    """Một object JSON lồng nhau lấy từ bảng được OUTER JOIN
+
+    Object là None khi cột đầu tiên (khóa của bảng được join) là NULL.
+
+    Args:
+        name: Tên trường, vd. 'teacher'
+        fields: List Field của object con, Field đầu tiên là khóa
+        join: (bảng, điều kiện join)
+    """
+
+    def __init__(self, name, fields, join):
+        self.name = name
+        self.fields = fields
+        self.join = join
+
+    def columns(self):
+        return [field.column.label(f'{self.name}__{field.name}') for field in self.fields]
+
+
+class RowSerializer:
+    """Serializer khai báo cho một tài nguyên, đọc bằng select() chỉ gồm cột
+
+    Kết quả là các Row tuple (không tạo ORM instance, không qua identity map);
+    mỗi tập trường có một hàm chuyển Row -> dict được dựng sẵn một lần.
+
+    Args:
+        entity: Model gốc (bảng FROM)
+        fields: List Field/Nested theo thứ tự trong JSON
+    """
+
+    def __init__(self, entity, fields):
+        self.entity = entity
+        self.fields = fields
+        self.names = frozenset(field.name for field in fields)
+        self._by_name = {field.name: field for field in fields}
+        # Mỗi tổ hợp fields= chỉ dựng hàm chuyển đổi một lần
+        self._compile = lru_cache(maxsize=64)(self._build)
+
+    def _selected(self, fields):
+        if not fields:
+            return tuple(self.fields)
+        return tuple(self._by_name[name] for name in fields if name in self._by_name)
+
+    def select(self, fields=None):
+        """Câu SELECT cho các trường yêu cầu (None là tất cả)
+
+        Có thể nối thêm where/order_by; cột được thêm sau (add_columns) không ảnh hưởng
+        tới hàm chuyển đổi.
+        """
+        selected = self._selected(fields)
+        columns = [column for field in selected for column in field.columns()]
+        stmt = select(*columns).select_from(self.entity)
+        for field in selected:
+            if isinstance(field, Nested):
+                stmt = stmt.outerjoin(*field.join)
+        return stmt
+
+    def converter(self, fields=None):
+        """Hàm chuyển Row -> dict cho tập trường yêu cầu (được cache)"""
+        return self._compile(tuple(fields) if fields else None)
+
+    def _build(self, fields):
+        selected = self._selected(fields)
+        if not any(isinstance(field, Nested) for field in selected):
+            # Trường hợp phổ biến: các cột nằm đúng thứ tự của tên trường
+            names = tuple(field.name for field in selected)
+            return lambda row: dict(zip(names, row))
+
+        accessors = []
+        index = 0
+        for field in selected:
+            if isinstance(field, Nested):
+                accessors.append((field.name, _nested_getter(field, index)))
+                index += len(field.fields)
+            else:
+                accessors.append((field.name, itemgetter(index)))
+                index += 1
+        accessors = tuple(accessors)
+        return lambda row: {name: getter(row) for name, getter in accessors}
+
+    def serialize(self, rows, fields=None):
+        """Chuyển list Row thành list dict"""
+        convert = self.converter(fields)
+        return [convert(row) for row in rows]
+
+    def get(self, ident, fields=None):
+        """Đọc một bản ghi theo khóa chính
+
+        Returns:
+            dict hoặc None nếu không tồn tại
+        """
+        stmt = self.select(fields).where(self.entity.id == ident)
+        row = db.session.execute(stmt).first()
+        return self.converter(fields)(row) if row is not None else None
+
+
+def _nested_getter(field, start):
+    names = tuple(sub.name for sub in field.fields)
+    stop = start + len(names)
+
+    def getter(row):
+        if row[start] is None:
+            return None
+        return dict(zip(names, row[start:stop]))
+    return getter
+
+
+def _user_ref(name, foreign_key, *extra):
+    return Nested(name, [
+        Field('id', User.id),
+        Field('username', User.username),
+        *[Field(column.key, column) for column in extra],
+    ], (User, foreign_key == User.id))
+
+
+# Số bài nộp của dự án (subquery tương quan, dùng index ix_submissions_project_*)
+_project_submission_count = select(func.count(Submission.id)) \
+    .where(Submission.project_id == Project.id).correlate(Project).scalar_subquery()
+
+# Danh sách và chi tiết dự án
+project_serializer = RowSerializer(Project, [
+    Field('id', Project.id),
+    Field('title', Project.title),
+    Field('description', Project.description),
+    Field('deadline', Project.deadline),
+    Field('is_active', Project.is_active),
+    Field('created_at', Project.created_at),
+    _user_ref('teacher', Project.teacher_id),
+    Field('submission_count', _project_submission_count),
+])
+
+# Dự án sau khi tạo/cập nhật
+project_summary_serializer = RowSerializer(Project, [
+    Field('id', Project.id),
+    Field('title', Project.title),
+    Field('description', Project.description),
+    Field('deadline', Project.deadline),
+    Field('is_active', Project.is_active),
+    Field('created_at', Project.created_at),
+    Field('teacher_id', Project.teacher_id),
+])
+
+# Danh sách bài nộp của một dự án
+submission_serializer = RowSerializer(Submission, [
+    Field('id', Submission.id),
+    Field('title', Submission.title),
+    Field('content', Submission.content),
+    Field('file_path', Submission.file_path),
+    Field('score', Submission.score),
+    Field('feedback', Submission.feedback),
+    Field('submitted_at', Submission.submitted_at),
+    _user_ref('student', Submission.student_id),
+])
+
+# Chi tiết bài nộp (bình luận đọc riêng bằng comment_serializer)
+submission_detail_serializer = RowSerializer(Submission, [
+    *submission_serializer.fields,
+    Nested('project', [
+        Field('id', Project.id),
+        Field('title', Project.title),
+    ], (Project, Submission.project_id == Project.id)),
+])
+
+# Bài nộp sau khi nộp/cập nhật
+submission_summary_serializer = RowSerializer(Submission, [
+    Field('id', Submission.id),
+    Field('title', Submission.title),
+    Field('content', Submission.content),
+    Field('score', Submission.score),
+    Field('feedback', Submission.feedback),
+    Field('submitted_at', Submission.submitted_at),
+    Field('project_id', Submission.project_id),
+    Field('student_id', Submission.student_id),
+])
+
+comment_serializer = RowSerializer(Comment, [
+    Field('id', Comment.id),
+    Field('content', Comment.content),
+    Field('created_at', Comment.created_at),
+    _user_ref('user', Comment.user_id, User.is_teacher),
+])
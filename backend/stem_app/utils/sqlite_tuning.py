@@ -0,0 +1,76 @@
+from sqlalchemy import event
+
+
+class SqliteTuning:
+    """Bộ PRAGMA áp dụng cho mỗi kết nối SQLite mới
+
+    Mỗi lớp Config khai báo một SQLITE_TUNING riêng; create_app gắn nó vào engine
+    qua sự kiện `connect` của SQLAlchemy. Đặt SQLITE_TUNING = None để tắt.
+
+    Attributes:
+        journal_mode: WAL cho phép đọc song song với một tiến trình ghi
+        synchronous: NORMAL là an toàn với WAL và giảm fsync mỗi commit
+        busy_timeout: Số mili giây chờ khóa trước khi báo "database is locked"
+        mmap_size: Số byte của file database được ánh xạ vào bộ nhớ
+        cache_size: Kích thước page cache (số âm tính theo KiB)
+        temp_store: Nơi lưu bảng tạm và chỉ mục tạm
+        foreign_keys: Bật kiểm tra khóa ngoại
+    """
+
+    def __init__(self, journal_mode='WAL', synchronous='NORMAL', busy_timeout=30000,
+                 mmap_size=256 * 1024 * 1024, cache_size=-64000, temp_store='MEMORY',
+                 foreign_keys=True):
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.busy_timeout = busy_timeout
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.temp_store = temp_store
+        self.foreign_keys = foreign_keys
+
+    def pragmas(self):
+        """Danh sách câu lệnh PRAGMA theo thứ tự áp dụng
+
+        Returns:
+            list: Các câu lệnh SQL
+        """
+        statements = [
+            # busy_timeout trước để các PRAGMA sau cũng được chờ khóa
+            f'PRAGMA busy_timeout = {int(self.busy_timeout)}',
+            f'PRAGMA journal_mode = {self.journal_mode}',
+            f'PRAGMA synchronous = {self.synchronous}',
+            f'PRAGMA mmap_size = {int(self.mmap_size)}',
+            f'PRAGMA cache_size = {int(self.cache_size)}',
+            f'PRAGMA temp_store = {self.temp_store}',
+            f"PRAGMA foreign_keys = {'ON' if self.foreign_keys else 'OFF'}",
+        ]
+        return statements
+
+    def apply(self, dbapi_connection, connection_record=None):
+        """Áp dụng PRAGMA cho một kết nối DBAPI (dùng làm listener `connect`)"""
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in self.pragmas():
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    def __repr__(self):
+        return f'<SqliteTuning journal_mode={self.journal_mode} synchronous={self.synchronous}>'
+
+
+def register_sqlite_tuning(engine, tuning):
+    """Gắn SqliteTuning vào engine nếu engine dùng SQLite
+
+    Args:
+        engine: SQLAlchemy Engine
+        tuning: SqliteTuning hoặc None
+
+    Returns:
+        bool: True nếu đã gắn listener
+    """
+    if tuning is None or engine.dialect.name != 'sqlite':
+        return False
+    if not event.contains(engine, 'connect', tuning.apply):
+        event.listen(engine, 'connect', tuning.apply)
+    return True
@@ -0,0 +1,207 @@
+import io
+import shutil
+from functools import lru_cache
+from flask import current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+# Bảng MIME hợp lệ cho từng phần mở rộng. Config.ALLOWED_EXTENSIONS chọn phần
+# mở rộng nào được bật; MIME nhận diện từ nội dung phải nằm trong tập của đúng phần
+# mở rộng của file. Phần mở rộng mới cần được thêm vào đây, nếu không file đó sẽ bị
+# từ chối ở bước kiểm tra MIME.
+EXTENSION_MIMES = {
+    'pdf': {'application/pdf'},
+    'doc': {'application/msword'},
+    'docx': {'application/vnd.openxmlformats-officedocument.wordprocessingml.document'},
+    'ppt': {'application/vnd.ms-powerpoint'},
+    'pptx': {'application/vnd.openxmlformats-officedocument.presentationml.presentation'},
+    'txt': {'text/plain'},
+    'png': {'image/png'},
+    'jpg': {'image/jpeg'},
+    'jpeg': {'image/jpeg'},
+    'gif': {'image/gif'},
+    'zip': {'application/zip'},
+    'rar': {'application/x-rar', 'application/x-rar-compressed'},
+    '7z': {'application/x-7z-compressed'},
+    'py': {'text/x-python', 'text/x-script.python', 'text/plain'},
+    'ipynb': {'application/json', 'text/plain'},
+    'java': {'text/x-java', 'text/plain'},
+    'cpp': {'text/x-c++', 'text/plain'},
+    'c': {'text/x-c', 'text/plain'},
+}
+
+# Kích thước mỗi lần chép khi phải đếm byte trong lúc ghi
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """File upload vi phạm chính sách
+
+    Attributes:
+        message: Thông báo lỗi cho người dùng
+        status_code: 413 (quá lớn) hoặc 415 (sai loại)
+    """
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+    def to_http_exception(self):
+        """HTTPException tương ứng, dùng được cả trong lúc werkzeug đang parse form"""
+        if self.status_code == 413:
+            return RequestEntityTooLarge(self.message)
+        return UnsupportedMediaType(self.message)
+
+
+class UploadRules:
+    """Chính sách upload đã được biên dịch từ cấu hình
+
+    Attributes:
+        extensions: Tập phần mở rộng được phép
+        max_size: Kích thước tối đa của một file (byte), None nếu không giới hạn
+    """
+
+    def __init__(self, extensions, max_size=None):
+        self.extensions = frozenset(ext.lower() for ext in extensions)
+        self.max_size = max_size
+
+    @staticmethod
+    def extension(filename):
+        """Phần mở rộng (chữ thường) của tên file, None nếu không có"""
+        if not filename or '.' not in filename:
+            return None
+        return filename.rsplit('.', 1)[1].lower()
+
+    def extension_allowed(self, filename):
+        return self.extension(filename) in self.extensions
+
+    def mime_allowed(self, mimetype, filename):
+        """MIME nhận diện từ nội dung phải thuộc EXTENSION_MIMES của chính phần mở rộng
+        của file (ảnh PNG đặt tên .pdf bị từ chối dù cả png và pdf đều được phép)"""
+        ext = self.extension(filename)
+        return ext in self.extensions and mimetype in EXTENSION_MIMES.get(ext, ())
+
+    def check_filename(self, filename):
+        if not self.extension_allowed(filename):
+            raise UploadRejected('Loại file không được phép', 415)
+
+    def check_mime(self, mimetype, filename):
+        if not self.mime_allowed(mimetype, filename):
+            raise UploadRejected('Loại file không được phép', 415)
+
+    def check_size(self, size):
+        if self.max_size is not None and size is not None and size > self.max_size:
+            raise UploadRejected(
+                f'File quá lớn. Kích thước tối đa là {self.max_size // (1024 * 1024)}MB.', 413
+            )
+
+    def __repr__(self):
+        return f'<UploadRules {len(self.extensions)} extensions max_size={self.max_size}>'
+
+
+@lru_cache(maxsize=8)
+def compile_rules(extensions, max_size=None):
+    """Biên dịch UploadRules một lần cho mỗi cấu hình
+
+    Args:
+        extensions: frozenset phần mở rộng
+        max_size: Kích thước tối đa (byte)
+
+    Returns:
+        UploadRules
+    """
+    return UploadRules(extensions, max_size)
+
+
+def get_upload_rules():
+    """UploadRules của app hiện tại, từ ALLOWED_EXTENSIONS và MAX_CONTENT_LENGTH"""
+    config = current_app.config
+    return compile_rules(
+        frozenset(config['ALLOWED_EXTENSIONS']),
+        config.get('MAX_CONTENT_LENGTH')
+    )
+
+
+def allowed_file(filename):
+    """Kiểm tra phần mở rộng của file theo chính sách upload của app
+
+    Args:
+        filename: Tên file cần kiểm tra
+
+    Returns:
+        bool: True nếu file được phép
+    """
+    return get_upload_rules().extension_allowed(filename)
+
+
+def measure_size(file):
+    """Xác định kích thước file upload mà không đọc nội dung
+
+    Dùng Content-Length của phần multipart nếu có, nếu không thì seek/tell trên
+    stream (werkzeug luôn đưa file vào stream có thể seek).
+
+    Args:
+        file: FileStorage hoặc stream nhị phân
+
+    Returns:
+        int hoặc None nếu không xác định được (stream không seek được)
+    """
+    content_length = getattr(file, 'content_length', None)
+    if content_length:
+        return content_length
+
+    stream = getattr(file, 'stream', file)
+    try:
+        position = stream.tell()
+        stream.seek(0, io.SEEK_END)
+        size = stream.tell()
+        stream.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return size
+
+
+def check_upload(file, rules=None):
+    """Kiểm tra tên và kích thước file upload mà không đọc nội dung
+
+    Args:
+        file: FileStorage
+        rules: UploadRules (mặc định get_upload_rules())
+
+    Returns:
+        int hoặc None: Kích thước file nếu xác định được
+
+    Raises:
+        UploadRejected: Nếu file sai loại hoặc quá lớn
+    """
+    rules = rules or get_upload_rules()
+    rules.check_filename(file.filename)
+    size = measure_size(file)
+    rules.check_size(size)
+    return size
+
+
+def copy_with_limit(source, destination, rules, written=0):
+    """Chép stream và dừng ngay khi vượt quá rules.max_size
+
+    Dùng khi measure_size không xác định được kích thước trước.
+
+    Args:
+        source: Stream nguồn
+        destination: File đích
+        rules: UploadRules
+        written: Số byte đã ghi trước đó (vd. phần đầu đã đọc để nhận diện MIME)
+
+    Raises:
+        UploadRejected: Nếu dữ liệu vượt quá max_size
+    """
+    if rules.max_size is None:
+        shutil.copyfileobj(source, destination, COPY_CHUNK_SIZE)
+        return
+    while True:
+        chunk = source.read(COPY_CHUNK_SIZE)
+        if not chunk:
+            return
+        written += len(chunk)
+        rules.check_size(written)
+        destination.write(chunk)
@@ -0,0 +1,174 @@
+import os
+import zlib
+import hashlib
+import tempfile
+from functools import wraps
+from flask import Request, request, current_app
+from stem_app.utils.mime_sniffer import SNIFF_BYTES, detect_mime
+from stem_app.utils.upload_policy import UploadRejected, get_upload_rules
+
+# Khóa trong WSGI environ chứa UploadPolicy của request hiện tại
+UPLOAD_POLICY_KEY = 'stem_app.upload_policy'
+
+
+class UploadPolicy:
+    """Chính sách cho các file upload của một endpoint
+
+    Attributes:
+        upload_dir: Thư mục đích tuyệt đối (file tạm được tạo ngay trong đó)
+        rules: UploadRules (phần mở rộng, MIME và kích thước tối đa)
+        check_mime: Kiểm tra MIME nhận diện từ nội dung
+    """
+
+    def __init__(self, upload_dir, rules, check_mime=True):
+        self.upload_dir = upload_dir
+        self.rules = rules
+        self.check_mime = check_mime
+        self.sinks = []
+
+
+class UploadSink:
+    """File đích của một phần multipart, được werkzeug ghi trực tiếp từng chunk
+
+    Trong cùng một lượt ghi: đếm kích thước, tính SHA-256, CRC-32 và nhận diện MIME từ
+    SNIFF_BYTES byte đầu. Dữ liệu được ghi vào file tạm nằm sẵn trong thư mục
+    đích, nên commit() chỉ là một lần đổi tên (không sao chép lại).
+    """
+
+    def __init__(self, policy, filename):
+        self.policy = policy
+        self.filename = filename
+        self.size = 0
+        self.mimetype = None
+        self.committed_path = None
+        self._sha256 = hashlib.sha256()
+        self.crc32 = 0
+        self._head = b''
+
+        os.makedirs(policy.upload_dir, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=policy.upload_dir, prefix='.upload-')
+        self._file = os.fdopen(fd, 'w+b')
+
+    @property
+    def sha256(self):
+        return self._sha256.hexdigest()
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        try:
+            self.policy.rules.check_size(self.size)
+        except UploadRejected as e:
+            self.discard()
+            raise e.to_http_exception()
+
+        if self.mimetype is None:
+            self._head += chunk[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniff()
+
+        self._sha256.update(chunk)
+        self.crc32 = zlib.crc32(chunk, self.crc32)
+        return self._file.write(chunk)
+
+    def _sniff(self):
+        # Nhận diện từ phần đầu file, từ chối trước khi phần còn lại được ghi
+        self.mimetype = detect_mime(self._head)
+        self._head = b''
+        if self.policy.check_mime and not self.policy.rules.mime_allowed(self.mimetype, self.filename):
+            self.discard()
+            raise UploadRejected('Loại file không được phép', 415).to_http_exception()
+
+    def seek(self, offset, whence=0):
+        # werkzeug gọi seek(0) sau khi ghi xong; file nhỏ hơn SNIFF_BYTES được nhận diện tại đây
+        if self.mimetype is None and self._file is not None:
+            self._sniff()
+        return self._file.seek(offset, whence)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        return self._file.flush()
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+    def commit(self, name):
+        """Đưa file tạm vào vị trí cuối cùng trong thư mục đích
+
+        Args:
+            name: Đường dẫn đích tương đối với thư mục upload (đã được làm sạch)
+
+        Returns:
+            str: Đường dẫn tuyệt đối của file đã lưu
+        """
+        self.close()
+        final_path = os.path.join(self.policy.upload_dir, name)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(self.temp_path, final_path)
+        self.committed_path = final_path
+        return final_path
+
+    def discard(self):
+        """Xóa file tạm nếu chưa được commit"""
+        self.close()
+        if self.committed_path is None and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class UploadRequest(Request):
+    """Request dùng UploadSink cho các endpoint được đánh dấu bằng @streaming_upload
+
+    Các endpoint khác giữ nguyên hành vi mặc định của werkzeug.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None,
+                         content_length=None):
+        policy = self.environ.get(UPLOAD_POLICY_KEY)
+        if policy is None:
+            return super()._get_file_stream(
+                total_content_length, content_type, filename, content_length
+            )
+
+        try:
+            policy.rules.check_filename(filename)
+        except UploadRejected as e:
+            raise e.to_http_exception()
+
+        sink = UploadSink(policy, filename)
+        policy.sinks.append(sink)
+        return sink
+
+
+def streaming_upload(subdirectory='', rules=None, check_mime=True):
+    """Decorator bật pipeline upload một lượt cho endpoint
+
+    File tạm chưa được commit khi view kết thúc (lỗi, quyền...) sẽ bị xóa.
+    Đặt decorator này sau các decorator xác thực để không ghi gì ra đĩa khi
+    request chưa được xác thực.
+
+    Args:
+        subdirectory: Thư mục con trong UPLOAD_FOLDER
+        rules: UploadRules (mặc định get_upload_rules(), từ Config.ALLOWED_EXTENSIONS)
+        check_mime: Kiểm tra MIME nhận diện từ nội dung
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            policy = UploadPolicy(
+                upload_dir=os.path.join(current_app.config['UPLOAD_FOLDER'], subdirectory),
+                rules=rules or get_upload_rules(),
+                check_mime=check_mime
+            )
+            request.environ[UPLOAD_POLICY_KEY] = policy
+            try:
+                return f(*args, **kwargs)
+            finally:
+                for sink in policy.sinks:
+                    sink.discard()
+        return decorated_function
+    return decorator
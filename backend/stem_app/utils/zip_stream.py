@@ -0,0 +1,231 @@
+import os
+import struct
+import zlib
+from datetime import datetime
+
+# Phần mở rộng của các định dạng đã nén sẵn: lưu nguyên (STORED), không nén lại
+STORED_EXTENSIONS = {
+    'pdf', 'png', 'jpg', 'jpeg', 'gif', 'zip', 'rar', '7z', 'docx', 'pptx'
+}
+
+# Kích thước mỗi lần đọc file nguồn
+CHUNK_SIZE = 64 * 1024
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+# Cờ: tên file mã hóa UTF-8 (bit 11), CRC và kích thước nằm trong data descriptor (bit 3)
+FLAG_UTF8 = 0x0800
+FLAG_DATA_DESCRIPTOR = 0x0008
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+
+def _dos_datetime(dt):
+    dt = dt or datetime(1980, 1, 1)
+    year = max(dt.year, 1980)
+    date = ((year - 1980) << 9) | (dt.month << 5) | dt.day
+    time = (dt.hour << 11) | (dt.minute << 5) | (dt.second // 2)
+    return time, date
+
+
+class ZipEntry:
+    """Một file trong archive
+
+    Attributes:
+        name: Tên trong archive (UTF-8, dùng '/' làm dấu phân cách)
+        path: Đường dẫn tuyệt đối của file nguồn
+        size: Kích thước file nguồn (byte)
+        crc32: CRC-32 của nội dung nếu đã biết trước, None nếu chưa
+        modified: Thời điểm sửa đổi ghi vào archive
+    """
+
+    def __init__(self, name, path, size, crc32=None, modified=None):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.crc32 = crc32
+        self.modified = modified
+        ext = name.rsplit('.', 1)[1].lower() if '.' in name else ''
+        self.method = ZIP_STORED if ext in STORED_EXTENSIONS else ZIP_DEFLATED
+        # Điền trong lúc ghi
+        self.offset = None
+        self.compressed_size = size if self.method == ZIP_STORED else None
+
+    @property
+    def precomputed(self):
+        """Có thể ghi header đầy đủ trước dữ liệu (STORED và đã biết CRC)"""
+        return self.method == ZIP_STORED and self.crc32 is not None
+
+    def local_header(self, descriptor):
+        name = self.name.encode('utf-8')
+        time, date = _dos_datetime(self.modified)
+        flags = FLAG_UTF8 | (FLAG_DATA_DESCRIPTOR if descriptor else 0)
+        crc, csize, usize = (0, 0, 0) if descriptor else (self.crc32, self.size, self.size)
+        return struct.pack(
+            '<IHHHHHIIIHH', 0x04034b50, 20, flags, self.method, time, date,
+            crc, csize, usize, len(name), 0
+        ) + name
+
+    def data_descriptor(self):
+        return struct.pack('<IIII', 0x08074b50, self.crc32, self.compressed_size, self.size)
+
+    def central_header(self, descriptor):
+        name = self.name.encode('utf-8')
+        time, date = _dos_datetime(self.modified)
+        flags = FLAG_UTF8 | (FLAG_DATA_DESCRIPTOR if descriptor else 0)
+        extra = b''
+        offset = self.offset
+        version = 20
+        if offset >= ZIP64_LIMIT:
+            # Offset vượt 4 GB: ghi vào trường mở rộng ZIP64
+            extra = struct.pack('<HHQ', 0x0001, 8, offset)
+            offset = ZIP64_LIMIT
+            version = 45
+        return struct.pack(
+            '<IHHHHHHIIIHHHHHII', 0x02014b50, version, version, flags, self.method,
+            time, date, self.crc32, self.compressed_size, self.size,
+            len(name), len(extra), 0, 0, 0, 0, offset
+        ) + name + extra
+
+
+def _end_of_central_directory(count, cd_offset, cd_size):
+    zip64 = count >= ZIP64_COUNT_LIMIT or cd_offset >= ZIP64_LIMIT or cd_size >= ZIP64_LIMIT
+    if not zip64:
+        return struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, count, count, cd_size, cd_offset, 0)
+
+    zip64_offset = cd_offset + cd_size
+    record = struct.pack(
+        '<IQHHIIQQQQ', 0x06064b50, 44, 45, 45, 0, 0, count, count, cd_size, cd_offset
+    )
+    locator = struct.pack('<IIQI', 0x07064b50, 0, zip64_offset, 1)
+    end = struct.pack(
+        '<IHHHHIIH', 0x06054b50, 0, 0, ZIP64_COUNT_LIMIT, ZIP64_COUNT_LIMIT,
+        ZIP64_LIMIT, ZIP64_LIMIT, 0
+    )
+    return record + locator + end
+
+
+def _read_file(path, start=0, length=None):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining is None or remaining > 0:
+            chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not chunk:
+                return
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+class ZipStream:
+    """Tạo file ZIP trực tiếp vào response, không dùng file tạm
+
+    Nếu mọi entry đều STORED và đã biết CRC, toàn bộ bố cục archive (header,
+    central directory) được tính trước: biết tổng kích thước và có thể phục vụ
+    một đoạn bất kỳ (HTTP Range). Nếu không, archive được ghi tuần tự với data
+    descriptor sau mỗi entry.
+    """
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self._segments = None
+        if all(entry.precomputed for entry in self.entries):
+            self._segments = self._layout()
+
+    @property
+    def size(self):
+        """Tổng kích thước archive, None nếu không tính trước được"""
+        if self._segments is None:
+            return None
+        return sum(length for _, _, length in self._segments)
+
+    def _layout(self):
+        # Mỗi segment: (bytes, None, length) hoặc (None, path, length)
+        segments = []
+        offset = 0
+        for entry in self.entries:
+            entry.offset = offset
+            header = entry.local_header(descriptor=False)
+            segments.append((header, None, len(header)))
+            segments.append((None, entry.path, entry.size))
+            offset += len(header) + entry.size
+
+        central = b''.join(entry.central_header(descriptor=False) for entry in self.entries)
+        segments.append((central, None, len(central)))
+        end = _end_of_central_directory(len(self.entries), offset, len(central))
+        segments.append((end, None, len(end)))
+        return segments
+
+    def iter_range(self, start, stop):
+        """Sinh các byte [start, stop) của archive đã tính trước bố cục"""
+        position = 0
+        for data, path, length in self._segments:
+            segment_end = position + length
+            if segment_end > start and position < stop:
+                begin = max(start - position, 0)
+                end = min(stop, segment_end) - position
+                if data is not None:
+                    yield data[begin:end]
+                else:
+                    yield from _read_file(path, begin, end - begin)
+            position = segment_end
+            if position >= stop:
+                return
+
+    def __iter__(self):
+        if self._segments is not None:
+            yield from self.iter_range(0, self.size)
+            return
+
+        offset = 0
+        for entry in self.entries:
+            entry.offset = offset
+            header = entry.local_header(descriptor=True)
+            yield header
+            offset += len(header)
+
+            crc = 0
+            written = 0
+            compressor = None
+            if entry.method == ZIP_DEFLATED:
+                compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            for chunk in _read_file(entry.path):
+                crc = zlib.crc32(chunk, crc)
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    written += len(chunk)
+                    yield chunk
+            if compressor is not None:
+                tail = compressor.flush()
+                written += len(tail)
+                yield tail
+
+            entry.crc32 = crc
+            entry.compressed_size = written
+            descriptor = entry.data_descriptor()
+            yield descriptor
+            offset += written + len(descriptor)
+
+        central = b''.join(entry.central_header(descriptor=True) for entry in self.entries)
+        yield central
+        yield _end_of_central_directory(len(self.entries), offset, len(central))
+
+
+def file_crc32(path):
+    """Tính CRC-32 của một file bằng cách đọc theo từng chunk"""
+    crc = 0
+    for chunk in _read_file(path):
+        crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def entry_size(path):
+    """Kích thước file nguồn, None nếu file không tồn tại"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
@@ -0,0 +1,23 @@
+import pytest
+
+from stem_app import create_app
+from stem_app.cli import init_database
+from stem_app.models import db
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Ứng dụng cấu hình 'testing' với database và thư mục upload riêng cho mỗi test"""
+    monkeypatch.setenv('TEST_DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    with app.app_context():
+        init_database()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,112 @@
+"""Hàm tạo dữ liệu và tiện ích dùng chung cho các test"""
+import os
+import struct
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import jwt
+from flask import current_app
+from sqlalchemy import event
+
+from stem_app.models import db
+from stem_app.models.user import User
+from stem_app.models.project import Project
+from stem_app.models.submission import Submission
+from stem_app.models.stats import COUNTER_COLUMNS, DashboardStats
+from stem_app.utils.upload_policy import get_upload_rules
+from stem_app.utils.uploads import UploadPolicy, UploadSink
+
+
+def make_user(username, is_teacher=False):
+    user = User(username=username, email=f'{username}@example.com', is_teacher=is_teacher)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_project(teacher, title='Dự án robot', **kwargs):
+    project = Project(title=title, description='Mô tả dự án', teacher_id=teacher.id, **kwargs)
+    db.session.add(project)
+    db.session.commit()
+    return project
+
+
+def make_submission(project, student, title='Bài nộp', content='Nội dung bài nộp', file_path=None):
+    submission = Submission(title=title, content=content, project_id=project.id,
+                            student_id=student.id, file_path=file_path)
+    db.session.add(submission)
+    db.session.commit()
+    return submission
+
+
+def upload_sink(content, filename):
+    """UploadSink đã nhận xong content, giống những gì werkzeug làm khi đọc multipart"""
+    policy = UploadPolicy(current_app.config['UPLOAD_FOLDER'], get_upload_rules())
+    sink = UploadSink(policy, filename)
+    sink.write(content)
+    sink.seek(0)
+    return sink
+
+
+def dashboard_snapshot():
+    """Các bộ đếm của bảng dashboard_stats theo (scope, scope_id), bỏ qua dòng toàn số 0"""
+    db.session.expire_all()
+    snapshot = {}
+    for stats in db.session.scalars(db.select(DashboardStats)):
+        counters = {name: getattr(stats, name) for name in COUNTER_COLUMNS}
+        counters['score_sum'] = round(counters['score_sum'], 6)
+        if any(counters.values()):
+            snapshot[(stats.scope, stats.scope_id)] = counters
+    return snapshot
+
+
+def auth_headers(user):
+    """Header Authorization với JWT giống token do /api/auth/login tạo ra"""
+    token = jwt.encode(
+        {
+            'id': user.id,
+            'email': user.email,
+            'is_teacher': user.is_teacher,
+            'exp': datetime.utcnow() + timedelta(hours=1),
+        },
+        os.environ.get('JWT_SECRET_KEY', 'dev-key'),
+        algorithm='HS256',
+    )
+    return {'Authorization': f'Bearer {token}'}
+
+
+@contextmanager
+def capture_queries(engine):
+    """Ghi lại các câu lệnh SQL (statement, parameters) chạy trên engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def login(client, user):
+    """Đăng nhập phiên Flask-Login cho các route giao diện web"""
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+# Ảnh PNG 1x1 hợp lệ và một file PDF tối thiểu, được libmagic nhận diện đúng loại
+PNG_BYTES = (
+    b'\x89PNG\r\n\x1a\n'
+    + _png_chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 0, 0, 0, 0))
+    + _png_chunk(b'IDAT', zlib.compress(b'\0\0'))
+    + _png_chunk(b'IEND', b'')
+)
+PDF_BYTES = b'%PDF-1.4\n1 0 obj\n<<>>\nendobj\ntrailer\n<<>>\n%%EOF\n'
@@ -0,0 +1,85 @@
+import io
+import zipfile
+
+import pytest
+
+from stem_app.models import db
+from stem_app.models.blob import Blob
+from stem_app.utils.blob_store import attach_file
+from stem_app.utils.downloads import submission_archive_entries
+from stem_app.utils.zip_stream import ZipStream
+from tests.helpers import (
+    make_user, make_project, make_submission, auth_headers, upload_sink, PDF_BYTES, PNG_BYTES
+)
+
+
+@pytest.fixture
+def project(app):
+    teacher = make_user('giaovien', is_teacher=True)
+    project = make_project(teacher)
+    for username, content, filename in (('hocsinh1', PDF_BYTES, 'bao-cao.pdf'),
+                                        ('hocsinh2', PNG_BYTES, 'so-do.png')):
+        submission = make_submission(project, make_user(username), file_path=filename)
+        attach_file(submission, upload_sink(content, filename), filename)
+    db.session.commit()
+    return project, auth_headers(teacher)
+
+
+def _download(client, project, **headers):
+    project, auth = project
+    return client.get(f'/api/projects/{project.id}/submissions.zip', headers={**auth, **headers})
+
+
+def test_archive_contains_every_attachment(client, project):
+    response = _download(client, project)
+
+    assert response.status_code == 200
+    assert response.content_length == len(response.data)
+    assert response.accept_ranges == 'bytes'
+    archive = zipfile.ZipFile(io.BytesIO(response.data))
+    assert archive.testzip() is None
+    assert archive.namelist() == ['hocsinh1/bao-cao.pdf', 'hocsinh2/so-do.png']
+    assert archive.read('hocsinh1/bao-cao.pdf') == PDF_BYTES
+    assert archive.read('hocsinh2/so-do.png') == PNG_BYTES
+
+
+def test_range_request_matches_precomputed_layout(client, project):
+    full = _download(client, project).data
+    assert ZipStream(submission_archive_entries(project[0].id)).size == len(full)
+
+    response = _download(client, project, Range='bytes=20-119')
+
+    assert response.status_code == 206
+    assert response.content_range.to_header() == f'bytes 20-119/{len(full)}'
+    assert response.data == full[20:120]
+
+    # Đoạn cuối chứa central directory
+    tail = _download(client, project, Range='bytes=-50')
+    assert tail.data == full[-50:]
+
+
+def test_download_does_not_write_missing_crc(client, project):
+    Blob.query.update({Blob.crc32: None})
+    db.session.commit()
+
+    response = _download(client, project)
+
+    # Không tính trước được bố cục: archive được ghi tuần tự, không có Range
+    assert response.status_code == 200
+    assert response.content_length is None
+    archive = zipfile.ZipFile(io.BytesIO(response.data))
+    assert archive.read('hocsinh1/bao-cao.pdf') == PDF_BYTES
+    db.session.expire_all()
+    assert [blob.crc32 for blob in Blob.query] == [None, None]
+
+
+def test_backfill_command_restores_range_support(app, client, project):
+    Blob.query.update({Blob.crc32: None})
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['stem', 'backfill-crc'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Đã tính CRC-32 cho 2 blob' in result.output
+    response = _download(client, project, Range='bytes=0-9')
+    assert response.status_code == 206
@@ -0,0 +1,138 @@
+import os
+import zlib
+
+import pytest
+from sqlalchemy import insert
+
+from stem_app.models import db
+from stem_app.models.blob import Blob
+from stem_app.utils import blob_store
+from stem_app.utils.blob_store import attach_file, blob_absolute_path
+from tests.helpers import make_user, make_project, make_submission, upload_sink, PDF_BYTES
+
+OTHER_PDF = PDF_BYTES.replace(b'%%EOF', b'% phien ban 2\n%%EOF')
+
+
+@pytest.fixture
+def people(app):
+    return make_user('giaovien', is_teacher=True), make_user('hocsinh'), make_user('hocsinh2')
+
+
+def _attach(submission, content):
+    attachment = attach_file(submission, upload_sink(content, 'bao-cao.pdf'), 'bao-cao.pdf')
+    db.session.commit()
+    return attachment.blob_sha256
+
+
+def _blob_files(app):
+    root = os.path.join(app.config['UPLOAD_FOLDER'], blob_store.BLOB_SUBDIR)
+    return sorted(name for _, _, files in os.walk(root) for name in files)
+
+
+def test_identical_uploads_share_one_blob(app, people):
+    teacher, first, second = people
+    project = make_project(teacher)
+
+    sha_a = _attach(make_submission(project, first), PDF_BYTES)
+    sha_b = _attach(make_submission(project, second), PDF_BYTES)
+
+    assert sha_a == sha_b
+    assert db.session.get(Blob, sha_a).ref_count == 2
+    assert _blob_files(app) == [sha_a]
+
+
+def test_reupload_releases_old_blob_and_file(app, people):
+    teacher, student, _ = people
+    submission = make_submission(make_project(teacher), student)
+    old = _attach(submission, PDF_BYTES)
+
+    new = _attach(submission, OTHER_PDF)
+
+    assert new != old
+    assert db.session.get(Blob, old) is None
+    assert not os.path.exists(blob_absolute_path(old))
+    assert db.session.get(Blob, new).ref_count == 1
+    assert _blob_files(app) == [new]
+
+
+def test_reupload_of_same_content_keeps_one_reference(app, people):
+    teacher, student, _ = people
+    submission = make_submission(make_project(teacher), student)
+    sha = _attach(submission, PDF_BYTES)
+
+    assert _attach(submission, PDF_BYTES) == sha
+    assert db.session.get(Blob, sha).ref_count == 1
+    assert _blob_files(app) == [sha]
+
+
+def test_new_reference_fills_missing_crc32(app, people):
+    teacher, first, second = people
+    project = make_project(teacher)
+    sha = _attach(make_submission(project, first), PDF_BYTES)
+    Blob.query.update({Blob.crc32: None})
+    db.session.commit()
+
+    # Blob tải lên trước khi có cột crc32 được bổ sung khi có người tải lại cùng nội dung
+    _attach(make_submission(project, second), PDF_BYTES)
+    db.session.expire_all()
+    assert db.session.get(Blob, sha).crc32 == zlib.crc32(PDF_BYTES)
+
+
+def test_rollback_removes_newly_written_blob_file(app, people):
+    teacher, student, _ = people
+    submission = make_submission(make_project(teacher), student)
+
+    sha = attach_file(submission, upload_sink(PDF_BYTES, 'bao-cao.pdf'), 'bao-cao.pdf').blob_sha256
+    db.session.flush()
+    assert os.path.exists(blob_absolute_path(sha))
+    db.session.rollback()
+
+    assert db.session.get(Blob, sha) is None
+    assert _blob_files(app) == []
+
+
+def test_cascade_delete_releases_references(app, people):
+    teacher, first, second = people
+    project = make_project(teacher)
+    submission = make_submission(project, first)
+    sha = _attach(submission, PDF_BYTES)
+    _attach(make_submission(project, second), PDF_BYTES)
+
+    db.session.delete(submission)
+    db.session.commit()
+    assert db.session.get(Blob, sha).ref_count == 1
+    assert _blob_files(app) == [sha]
+
+    # Xóa dự án xóa luôn bài nộp còn lại qua cascade
+    db.session.delete(project)
+    db.session.commit()
+    assert db.session.get(Blob, sha) is None
+    assert _blob_files(app) == []
+
+
+def test_concurrent_insert_of_same_blob_adds_reference(app, people, monkeypatch):
+    teacher, student, _ = people
+    submission = make_submission(make_project(teacher), student)
+    sink = upload_sink(PDF_BYTES, 'bao-cao.pdf')
+    add_reference = blob_store._add_reference
+    calls = []
+
+    def racing_add_reference(sha256, crc32):
+        calls.append(sha256)
+        if len(calls) == 1:
+            # Request khác commit cùng blob ngay sau khi request này thấy blob chưa có
+            with db.engine.begin() as connection:
+                connection.execute(insert(Blob.__table__).values(
+                    sha256=sha256, size=sink.size, ref_count=1
+                ))
+            return False
+        return add_reference(sha256, crc32)
+
+    monkeypatch.setattr(blob_store, '_add_reference', racing_add_reference)
+    sha = attach_file(submission, sink, 'bao-cao.pdf').blob_sha256
+    db.session.commit()
+
+    assert len(calls) == 2
+    db.session.expire_all()
+    assert db.session.get(Blob, sha).ref_count == 2
+    assert _blob_files(app) == [sha]
@@ -0,0 +1,69 @@
+from stem_app.models import db
+from stem_app.models.stats import rebuild_dashboard_stats
+from tests.helpers import make_user, make_project, make_submission, auth_headers, dashboard_snapshot
+
+
+def _dashboards(client, users):
+    db.session.expire_all()
+    result = {}
+    for user in users:
+        response = client.get('/api/dashboard/stats', headers=auth_headers(user))
+        assert response.status_code == 200
+        result[user.username] = response.get_json()
+    return result
+
+
+def _assert_matches_rebuild(client, users):
+    incremental = dashboard_snapshot(), _dashboards(client, users)
+    rebuild_dashboard_stats(db.session.connection())
+    db.session.commit()
+    assert (dashboard_snapshot(), _dashboards(client, users)) == incremental
+    return incremental[1]
+
+
+def test_incremental_stats_match_rebuild(app, client):
+    teachers = [make_user('giaovien1', is_teacher=True), make_user('giaovien2', is_teacher=True)]
+    students = [make_user('hocsinh1'), make_user('hocsinh2')]
+    users = teachers + students
+
+    # Thêm dự án và bài nộp
+    robot = make_project(teachers[0], title='Robot')
+    solar = make_project(teachers[0], title='Pin mặt trời', is_active=False)
+    bridge = make_project(teachers[1], title='Cây cầu')
+    first = make_submission(robot, students[0])
+    second = make_submission(robot, students[1])
+    third = make_submission(bridge, students[0])
+    stats = _assert_matches_rebuild(client, users)
+    assert stats['giaovien1']['totalSubmissions'] == 2
+    assert stats['hocsinh1']['totalProjects'] == 3
+
+    # Chấm điểm, chấm lại và bỏ điểm
+    first.score = 8.0
+    second.score = 6.0
+    third.score = 9.0
+    db.session.commit()
+    first.score = 7.0
+    second.score = None
+    db.session.commit()
+    stats = _assert_matches_rebuild(client, users)
+    assert stats['giaovien1']['gradedSubmissions'] == 1
+    assert stats['hocsinh1']['averageScore'] == 8.0
+
+    # Xóa bài nộp
+    db.session.delete(second)
+    db.session.commit()
+    _assert_matches_rebuild(client, users)
+
+    # Bật/tắt dự án
+    solar.is_active = True
+    robot.is_active = False
+    db.session.commit()
+    stats = _assert_matches_rebuild(client, users)
+    assert stats['giaovien1']['activeProjects'] == 1
+
+    # Xóa dự án cùng các bài nộp của nó
+    db.session.delete(robot)
+    db.session.commit()
+    stats = _assert_matches_rebuild(client, users)
+    assert stats['giaovien1']['totalProjects'] == 1
+    assert stats['hocsinh1']['submittedProjects'] == 1
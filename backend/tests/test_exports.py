@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+
+import pytest
+
+from stem_app.models import db
+from stem_app.models.user import User
+from stem_app.utils import exports
+from tests.helpers import make_user, make_project, make_submission, auth_headers
+
+FEEDBACK = 'Tốt, nhưng cần "trích dẫn"\nvà sơ đồ'
+
+
+@pytest.fixture
+def graded(app):
+    teacher = make_user('giaovien', is_teacher=True)
+    project = make_project(teacher)
+    other = make_project(make_user('giaovienkhac', is_teacher=True), title='Dự án khác')
+    students = [make_user(f'hocsinh{i}') for i in range(3)]
+    for i, student in enumerate(students):
+        submission = make_submission(project, student)
+        submission.score = 5 + i
+        submission.feedback = FEEDBACK if i == 0 else None
+        make_submission(other, student)
+    db.session.commit()
+    return teacher, project
+
+
+def _export(client, user, project, export_format):
+    return client.get(f'/api/submissions/project/{project.id}/export?format={export_format}',
+                      headers=auth_headers(user))
+
+
+def test_csv_export_has_bom_and_escapes_feedback(client, graded, monkeypatch):
+    # Lô nhỏ để nội dung được ghi qua nhiều chunk
+    monkeypatch.setattr(exports, 'EXPORT_BATCH_SIZE', 2)
+    teacher, project = graded
+
+    response = _export(client, teacher, project, 'csv')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert f'grades-project-{project.id}.csv' in response.headers['Content-Disposition']
+    text = response.data.decode('utf-8')
+    assert text.startswith('\ufeffsubmission_id,')
+    rows = list(csv.reader(io.StringIO(text[1:])))
+    assert rows[0] == ['submission_id', 'student_username', 'score', 'feedback', 'submitted_at']
+    assert [row[1:4] for row in rows[1:]] == [
+        ['hocsinh0', '5.0', FEEDBACK],
+        ['hocsinh1', '6.0', ''],
+        ['hocsinh2', '7.0', ''],
+    ]
+
+
+def test_ndjson_export_has_one_record_per_line(client, graded, monkeypatch):
+    monkeypatch.setattr(exports, 'EXPORT_BATCH_SIZE', 2)
+    teacher, project = graded
+
+    response = _export(client, teacher, project, 'ndjson')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.data.decode('utf-8').splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record['student_username'] for record in records] == ['hocsinh0', 'hocsinh1', 'hocsinh2']
+    assert records[0]['feedback'] == FEEDBACK
+    assert records[1]['feedback'] is None
+
+
+def test_export_is_limited_to_the_project_teacher(client, graded):
+    teacher, project = graded
+    other_teacher = User.query.filter_by(username='giaovienkhac').one()
+    student = User.query.filter_by(username='hocsinh0').one()
+
+    assert _export(client, other_teacher, project, 'csv').status_code == 403
+    assert _export(client, student, project, 'csv').status_code == 403
+    assert _export(client, teacher, project, 'xlsx').status_code == 400
+    response = client.get('/api/submissions/project/9999/export', headers=auth_headers(teacher))
+    assert response.status_code == 404
@@ -0,0 +1,101 @@
+from stem_app.models import db
+from stem_app.models.stats import SCOPE_STUDENT, SCOPE_TEACHER, rebuild_dashboard_stats
+from tests.helpers import (
+    make_user, make_project, make_submission, auth_headers, capture_queries, dashboard_snapshot
+)
+
+URL = '/api/submissions/grades:batch'
+
+
+def _grade(client, user, grades):
+    return client.post(URL, json={'grades': grades}, headers=auth_headers(user))
+
+
+def test_batch_reports_each_item_and_saves_valid_ones(app, client):
+    teacher = make_user('giaovien', is_teacher=True)
+    other = make_user('giaovienkhac', is_teacher=True)
+    student = make_user('hocsinh')
+    own = make_submission(make_project(teacher), student)
+    foreign = make_submission(make_project(other, title='Dự án khác'), student)
+
+    response = _grade(client, teacher, [
+        {'id': own.id, 'score': 8.5, 'feedback': 'Tốt'},
+        {'id': foreign.id, 'score': 9},
+        {'id': 9999, 'score': 5},
+        {'id': own.id, 'score': 1},
+    ])
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['updated'] == 1
+    assert [item['status'] for item in body['results']] == [200, 403, 404, 400]
+
+    db.session.expire_all()
+    assert (own.score, own.feedback) == (8.5, 'Tốt')
+    assert foreign.score is None
+
+
+def test_boolean_id_is_rejected(app, client):
+    teacher = make_user('giaovien', is_teacher=True)
+    submission = make_submission(make_project(teacher), make_user('hocsinh'))
+    assert submission.id == 1
+
+    response = _grade(client, teacher, [{'id': True, 'score': 5}])
+
+    assert response.get_json()['results'] == [{'index': 0, 'status': 400, 'error': 'Thiếu id bài nộp'}]
+    db.session.expire_all()
+    assert submission.score is None
+
+
+def test_batch_updates_dashboard_counters(app, client):
+    teacher = make_user('giaovien', is_teacher=True)
+    student = make_user('hocsinh')
+    project = make_project(teacher)
+    first = make_submission(project, student, title='Bài 1')
+    second = make_submission(make_project(teacher, title='Dự án 2'), student, title='Bài 2')
+    first.score = 4.0
+    db.session.commit()
+    before = dashboard_snapshot()
+
+    response = _grade(client, teacher, [
+        {'id': first.id, 'score': 6},
+        {'id': second.id, 'score': 7.5},
+    ])
+    assert response.get_json()['updated'] == 2
+
+    after = dashboard_snapshot()
+    for key in ((SCOPE_TEACHER, teacher.id), (SCOPE_STUDENT, student.id)):
+        assert after[key]['graded_count'] - before[key]['graded_count'] == 1
+        assert after[key]['score_sum'] - before[key]['score_sum'] == 9.5
+
+    # Cộng dồn phải khớp với việc tính lại từ đầu
+    rebuild_dashboard_stats(db.session.connection())
+    assert dashboard_snapshot() == after
+
+
+def test_regrading_does_not_double_count(app, client):
+    teacher = make_user('giaovien', is_teacher=True)
+    student = make_user('hocsinh')
+    submission = make_submission(make_project(teacher), student)
+
+    for score in (5, 7):
+        assert _grade(client, teacher, [{'id': submission.id, 'score': score}]).status_code == 200
+
+    stats = dashboard_snapshot()[(SCOPE_TEACHER, teacher.id)]
+    assert (stats['graded_count'], stats['score_sum']) == (1, 7.0)
+
+
+def test_old_scores_are_read_inside_the_write_transaction(app, client):
+    teacher = make_user('giaovien', is_teacher=True)
+    submission = make_submission(make_project(teacher), make_user('hocsinh'))
+    headers = auth_headers(teacher)
+
+    with capture_queries(db.engine) as statements:
+        client.post(URL, json={'grades': [{'id': submission.id, 'score': 5}]}, headers=headers)
+
+    sql = [statement.lstrip().split()[0] for statement, _ in statements]
+    first_write = sql.index('UPDATE')
+    score_read = next(i for i, (statement, _) in enumerate(statements)
+                      if statement.lstrip().startswith('SELECT submissions.id, projects.teacher_id'))
+    # Điểm cũ được đọc sau lệnh ghi đầu tiên, tức là khi đã giữ khóa ghi
+    assert first_write < score_read
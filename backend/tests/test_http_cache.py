@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from stem_app.models import db
+from stem_app.models.comment import Comment
+from tests.helpers import make_user, make_project, make_submission, auth_headers
+
+
+@pytest.fixture
+def submission(app):
+    teacher = make_user('giaovien', is_teacher=True)
+    student = make_user('hocsinh')
+    project = make_project(teacher)
+    submission = make_submission(project, student)
+    comment = Comment('Cần bổ sung sơ đồ', teacher.id, submission.id)
+    db.session.add(comment)
+    db.session.flush()
+    # Dữ liệu cũ hơn độ chính xác theo giây của Last-Modified
+    past = datetime.utcnow() - timedelta(hours=1)
+    project.updated_at = submission.updated_at = comment.updated_at = past
+    db.session.commit()
+    return submission, comment, auth_headers(student)
+
+
+def _get(client, submission, **headers):
+    submission, _, auth = submission
+    return client.get(f'/api/submissions/{submission.id}', headers={**auth, **headers})
+
+
+@pytest.mark.parametrize('validator', ['etag', 'last_modified'])
+def test_deleting_a_comment_invalidates_cached_submission(client, submission, validator):
+    first = _get(client, submission)
+    assert first.status_code == 200
+    if validator == 'etag':
+        conditional = {'If-None-Match': first.headers['ETag']}
+    else:
+        conditional = {'If-Modified-Since': first.headers['Last-Modified']}
+
+    assert _get(client, submission, **conditional).status_code == 304
+
+    db.session.delete(submission[1])
+    db.session.commit()
+
+    response = _get(client, submission, **conditional)
+    assert response.status_code == 200
+    assert response.get_json()['comments'] == []
@@ -0,0 +1,77 @@
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from stem_app.utils import json_provider
+from tests.helpers import make_user, make_project, auth_headers
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def json_backend(request, monkeypatch):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    return request.param
+
+
+def test_json_provider_writes_iso_dates_and_utf8(app, json_backend):
+    payload = {'title': 'Dự án điện tử', 'created_at': datetime(2024, 5, 1, 8, 30, 15, 120000)}
+
+    body = app.json.response(payload).get_data()
+
+    assert 'Dự án điện tử'.encode('utf-8') in body
+    assert json.loads(body) == {'title': 'Dự án điện tử', 'created_at': '2024-05-01T08:30:15.120000'}
+
+
+def test_orjson_and_stdlib_produce_the_same_listing(app, client, monkeypatch):
+    pytest.importorskip('orjson')
+    teacher = make_user('giaovien', is_teacher=True)
+    for i in range(5):
+        make_project(teacher, title=f'Dự án {i}')
+    headers = auth_headers(teacher)
+
+    fast = client.get('/api/projects/', headers=headers).get_data()
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    standard = client.get('/api/projects/', headers=headers).get_data()
+
+    assert json.loads(fast) == json.loads(standard)
+
+
+@pytest.fixture
+def large_listing(app):
+    teacher = make_user('giaovien', is_teacher=True)
+    for i in range(60):
+        make_project(teacher, title=f'Dự án số {i}')
+    return auth_headers(teacher)
+
+
+def test_large_response_is_gzipped(client, large_listing):
+    plain = client.get('/api/projects/?limit=100', headers=large_listing)
+    compressed = client.get('/api/projects/?limit=100',
+                            headers={**large_listing, 'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert len(compressed.get_data()) < len(plain.get_data()) / 4
+
+
+def test_brotli_preferred_when_available(client, large_listing):
+    brotli = pytest.importorskip('brotli')
+    plain = client.get('/api/projects/?limit=100', headers=large_listing)
+    response = client.get('/api/projects/?limit=100',
+                          headers={**large_listing, 'Accept-Encoding': 'gzip, br'})
+
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.get_data()) == plain.get_data()
+
+
+def test_small_response_is_not_compressed(client):
+    response = client.get('/api/health', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
@@ -0,0 +1,117 @@
+import socket
+import time
+
+import pytest
+
+from stem_app.utils.jobs import PermanentJobError, job_queue
+from stem_app.utils.mailer import mail, deliver_emails, send_bulk_email, _message_payload
+
+controller = pytest.importorskip('aiosmtpd.controller')
+
+
+class RecordingHandler:
+    """Server SMTP giả: ghi lại email nhận được, từ chối địa chỉ bounce@ (550) và later@ (450)"""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith('bounce@'):
+            return '550 5.1.1 Mailbox does not exist'
+        if address.startswith('later@'):
+            return '450 4.2.1 Mailbox busy'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((list(envelope.rcpt_tos), envelope.content))
+        return '250 OK'
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _use_smtp(app, port):
+    # Flask-Mail mặc định không gửi khi TESTING; ở đây cần gửi thật tới server giả
+    app.config.update(MAIL_SUPPRESS_SEND=False, MAIL_SERVER='127.0.0.1', MAIL_PORT=port,
+                      MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+                      MAIL_USERNAME=None, MAIL_PASSWORD=None)
+    mail.init_app(app)
+
+
+@pytest.fixture
+def smtp_server(app):
+    handler = RecordingHandler()
+    server = controller.Controller(handler, hostname='127.0.0.1', port=_free_port())
+    server.start()
+    _use_smtp(app, server.port)
+    yield handler
+    job_queue.stop(timeout=5)
+    server.stop()
+
+
+def test_batch_is_sent_over_one_connection(app, smtp_server):
+    payloads = [_message_payload(f'Điểm bài {i}', [f'hocsinh{i}@example.com'], 'Đã chấm')
+                for i in range(5)]
+
+    errors = deliver_emails(payloads)
+
+    assert errors == [None] * 5
+    assert smtp_server.sessions == 1
+    assert [rcpt for rcpt, _ in smtp_server.messages] == [
+        [f'hocsinh{i}@example.com'] for i in range(5)
+    ]
+
+
+def test_invalid_messages_fail_alone(app, smtp_server):
+    payloads = [
+        _message_payload('Hợp lệ', ['a@example.com'], 'x'),
+        _message_payload('Tiêu đề\nBcc: chen@example.com', ['b@example.com'], 'x'),
+        _message_payload('Không có người nhận', [], 'x'),
+        _message_payload('Bị từ chối', ['bounce@example.com'], 'x'),
+        _message_payload('Tạm hoãn', ['later@example.com'], 'x'),
+        _message_payload('Hợp lệ', ['c@example.com'], 'x'),
+    ]
+
+    errors = deliver_emails(payloads)
+
+    assert errors[0] is None and errors[5] is None
+    # Header chèn dòng, thiếu người nhận, lỗi 5xx: không chạy lại
+    assert all(isinstance(e, PermanentJobError) for e in errors[1:4])
+    # Lỗi 4xx: chạy lại sau
+    assert errors[4] is not None and not isinstance(errors[4], PermanentJobError)
+    assert [rcpt for rcpt, _ in smtp_server.messages] == [['a@example.com'], ['c@example.com']]
+    assert smtp_server.sessions == 1
+
+
+def test_unreachable_server_retries_whole_batch(app):
+    _use_smtp(app, _free_port())
+    payloads = [_message_payload('Thông báo', [f'hs{i}@example.com'], 'x') for i in range(3)]
+
+    errors = deliver_emails(payloads)
+
+    assert all(isinstance(e, OSError) for e in errors)
+
+
+def test_queued_emails_are_delivered_by_workers(app, smtp_server):
+    send_bulk_email([
+        {'subject': 'Điểm dự án', 'recipients': [f'hocsinh{i}@example.com'], 'text_body': 'Đã chấm'}
+        for i in range(3)
+    ])
+
+    deadline = time.monotonic() + 10
+    while len(smtp_server.messages) < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert sorted(rcpt[0] for rcpt, _ in smtp_server.messages) == [
+        f'hocsinh{i}@example.com' for i in range(3)
+    ]
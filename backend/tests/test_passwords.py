@@ -0,0 +1,33 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from stem_app.models.user import User
+from stem_app.utils import passwords
+from stem_app.utils.passwords import PasswordHashBusy, needs_rehash
+
+
+@pytest.mark.parametrize('method', [
+    'pbkdf2', 'pbkdf2:sha512', 'pbkdf2:sha256:1000', 'scrypt', 'scrypt:16384:8:1',
+])
+def test_method_prefix_matches_werkzeug(method):
+    expected = generate_password_hash('', method).split('$', 1)[0]
+    assert passwords._method_prefix(method) == expected
+
+
+def test_busy_pool_skips_rehash(app, monkeypatch):
+    user = User(username='hocsinh', email='hocsinh@example.com')
+    old_hash = generate_password_hash('matkhau123', 'pbkdf2:sha256:500')
+    user.password_hash = old_hash
+    assert needs_rehash(old_hash)
+
+    def busy(password):
+        raise PasswordHashBusy()
+
+    with monkeypatch.context() as m:
+        m.setattr('stem_app.models.user.hash_password', busy)
+        # Mật khẩu vẫn được chấp nhận, hash cũ được giữ để băm lại ở lần đăng nhập sau
+        assert user.verify_and_update_password('matkhau123') == (True, False)
+        assert user.password_hash == old_hash
+
+    assert user.verify_and_update_password('matkhau123') == (True, True)
+    assert not needs_rehash(user.password_hash)
@@ -0,0 +1,68 @@
+import pytest
+
+from stem_app.models import db
+from tests.helpers import (
+    make_user, make_project, make_submission, auth_headers, capture_queries
+)
+
+
+def _count_queries(client, url, user):
+    headers = auth_headers(user)
+    db.session.expire_all()
+    with capture_queries(db.engine) as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return len(response.get_json()), len(statements)
+
+
+@pytest.mark.parametrize('is_teacher', [True, False])
+def test_project_listing_query_count_does_not_grow_with_rows(app, client, is_teacher):
+    teacher = make_user('giaovien', is_teacher=True)
+    student = make_user('hocsinh')
+    user = teacher if is_teacher else student
+
+    for i in range(3):
+        make_submission(make_project(teacher, title=f'Dự án {i}'), student)
+    few = _count_queries(client, '/api/projects/?limit=100', user)
+
+    for i in range(3, 40):
+        make_submission(make_project(teacher, title=f'Dự án {i}'), student)
+    many = _count_queries(client, '/api/projects/?limit=100', user)
+
+    # Một truy vấn cho cả trang: không nạp giáo viên hay đếm bài nộp riêng cho từng dự án
+    assert few == (3, 1)
+    assert many == (40, 1)
+
+
+def test_project_listing_includes_teacher_and_submission_count(app, client):
+    teacher = make_user('giaovien', is_teacher=True)
+    students = [make_user(f'hocsinh{i}') for i in range(2)]
+    empty = make_project(teacher, title='Chưa có bài nộp')
+    project = make_project(teacher, title='Có bài nộp')
+    for student in students:
+        make_submission(project, student)
+
+    response = client.get('/api/projects/', headers=auth_headers(teacher))
+
+    projects = {p['id']: p for p in response.get_json()}
+    assert projects[project.id]['teacher'] == {'id': teacher.id, 'username': 'giaovien'}
+    assert projects[project.id]['submission_count'] == 2
+    assert projects[empty.id]['submission_count'] == 0
+
+
+def test_submission_listing_query_count_does_not_grow_with_rows(app, client):
+    teacher = make_user('giaovien', is_teacher=True)
+    project = make_project(teacher)
+    url = f'/api/submissions/project/{project.id}?limit=100'
+
+    for i in range(2):
+        make_submission(project, make_user(f'hocsinh{i}'))
+    few = _count_queries(client, url, teacher)
+
+    for i in range(2, 30):
+        make_submission(project, make_user(f'hocsinh{i}'))
+    many = _count_queries(client, url, teacher)
+
+    # Kiểm tra quyền trên dự án và một truy vấn danh sách
+    assert few == (2, 2)
+    assert many == (30, 2)
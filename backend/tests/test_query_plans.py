@@ -0,0 +1,63 @@
+import re
+
+import pytest
+
+from stem_app.models import db
+from stem_app.models.comment import Comment
+from tests.helpers import (
+    make_user, make_project, make_submission, auth_headers, capture_queries
+)
+
+# Dòng "SCAN <bảng>" trong EXPLAIN QUERY PLAN là quét toàn bộ bảng (hoặc toàn bộ chỉ mục)
+FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)')
+
+
+@pytest.fixture
+def data(app):
+    teacher = make_user('giaovien', is_teacher=True)
+    student = make_user('hocsinh')
+    project = make_project(teacher)
+    submission = make_submission(project, student, file_path='bai-nop/bao-cao.pdf')
+    db.session.add(Comment('Làm tốt lắm', teacher.id, submission.id))
+    db.session.commit()
+    return {
+        'teacher': auth_headers(teacher),
+        'student': auth_headers(student),
+        'new_student': auth_headers(make_user('hocsinhmoi')),
+        'project_id': project.id,
+        'submission_id': submission.id,
+    }
+
+
+# Các truy vấn nóng: danh sách/chi tiết dự án, bài nộp theo dự án và theo học sinh,
+# kiểm tra đã nộp (project_id, student_id), tải file theo file_path, bình luận của bài nộp
+HOT_REQUESTS = [
+    ('GET', '/api/projects/', 'teacher'),
+    ('GET', '/api/projects/', 'student'),
+    ('GET', '/api/projects/{project_id}', 'student'),
+    ('GET', '/api/submissions/project/{project_id}', 'teacher'),
+    ('GET', '/api/submissions/project/{project_id}', 'student'),
+    ('GET', '/api/submissions/{submission_id}', 'teacher'),
+    ('GET', '/api/submissions/download/bai-nop/bao-cao.pdf', 'student'),
+    ('POST', '/api/submissions/project/{project_id}', 'new_student'),
+]
+
+
+@pytest.mark.parametrize('method, url, user', HOT_REQUESTS)
+def test_hot_queries_use_indexes(client, data, method, url, user):
+    url = url.format(**data)
+    body = {'title': 'Bài nộp mới', 'content': 'Nội dung'} if method == 'POST' else None
+    with capture_queries(db.engine) as statements:
+        client.open(url, method=method, headers=data[user], json=body)
+
+    selects = [(sql, params) for sql, params in statements
+               if sql.lstrip().upper().startswith('SELECT')]
+    assert selects
+
+    with db.engine.connect() as connection:
+        for sql, params in selects:
+            plan = [row[3] for row in connection.exec_driver_sql(
+                f'EXPLAIN QUERY PLAN {sql}', params
+            )]
+            scans = [step for step in plan if FULL_SCAN.match(step)]
+            assert not scans, f'{sql}\n' + '\n'.join(plan)
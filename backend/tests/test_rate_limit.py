@@ -0,0 +1,54 @@
+from flask import Flask
+
+from stem_app.utils.rate_limit import LoginRateLimiter, MemoryBackend
+
+
+def _limiter(**config):
+    app = Flask(__name__)
+    app.config.update(LOGIN_RATE_LIMIT_EMAIL=(2, 60), LOGIN_RATE_LIMIT_IP=(3, 60), **config)
+    return LoginRateLimiter(app)
+
+
+def test_email_limit_applies_across_ips():
+    limiter = _limiter()
+
+    assert limiter.check('HocSinh@example.com', '10.0.0.1') == 0
+    assert limiter.check('hocsinh@example.com ', '10.0.0.2') == 0
+    # Bucket email (2 lần/60s) đã hết: Retry-After theo thời gian nạp một token của email
+    assert limiter.check('hocsinh@example.com', '10.0.0.3') == 30
+
+
+def test_denied_ip_does_not_create_email_buckets():
+    limiter = _limiter()
+    for i in range(3):
+        assert limiter.check(f'hs{i}@example.com', '10.0.0.1') == 0
+    buckets = len(limiter.backend._buckets)
+
+    for i in range(3, 1000):
+        assert limiter.check(f'hs{i}@example.com', '10.0.0.1') == 20
+
+    assert len(limiter.backend._buckets) == buckets
+
+
+def test_memory_backend_evicts_least_recently_used_keys():
+    backend = MemoryBackend()
+    backend.MAX_KEYS = 3
+    for key in 'abcd':
+        backend.consume(key, 1 / 60, 1, now=0)
+
+    assert list(backend._buckets) == ['b', 'c', 'd']
+    # Dùng lại 'b' đưa nó về cuối hàng, bucket 'c' bị bỏ tiếp theo
+    assert backend.consume('b', 1 / 60, 1, now=1) is False
+    backend.consume('e', 1 / 60, 1, now=1)
+    assert list(backend._buckets) == ['d', 'b', 'e']
+
+
+def test_memory_backend_drops_refilled_buckets():
+    backend = MemoryBackend()
+    backend.consume('a', 1, 5, now=0)
+    backend.consume('b', 1, 5, now=3)
+
+    # 'a' đã nạp đầy sau 5 giây, 'b' thì chưa
+    backend.consume('c', 1, 5, now=6)
+
+    assert list(backend._buckets) == ['b', 'c']
@@ -0,0 +1,75 @@
+import pytest
+
+from stem_app.models import db
+from stem_app.utils import score_stats
+from stem_app.utils.score_stats import stats_cache
+from tests.helpers import make_user, make_project, make_submission, auth_headers
+
+# Có cả biên của các cột histogram, điểm 0 và 10, điểm trùng nhau
+SCORES = [0, 0.5, 1, 2, 2, 3.3, 4, 4.99, 5, 5, 5.5, 6, 7, 7.25, 8, 8, 9, 9.9, 10, 10, None, None]
+
+
+@pytest.fixture
+def project(app):
+    stats_cache.clear()
+    teacher = make_user('giaovien', is_teacher=True)
+    project = make_project(teacher)
+    for i, score in enumerate(SCORES):
+        submission = make_submission(project, make_user(f'hocsinh{i}'))
+        submission.score = score
+    db.session.commit()
+    yield project
+    stats_cache.clear()
+
+
+def _compute(app, project, threshold):
+    app.config['SCORE_STATS_NUMPY_THRESHOLD'] = threshold
+    return score_stats._compute(project_id=project.id)
+
+
+def test_sql_and_numpy_paths_agree(app, project):
+    pytest.importorskip('numpy')
+    sql = _compute(app, project, threshold=10 ** 9)
+    numpy = _compute(app, project, threshold=0)
+
+    assert (sql['submissions'], sql['graded'], sql['ungraded']) == (22, 20, 2)
+    assert sql['histogram'] == numpy['histogram']
+    assert sum(bucket['count'] for bucket in sql['histogram']) == 20
+    # Cột cuối [9, 10] gồm cả điểm tối đa
+    assert sql['histogram'][-1]['count'] == 4
+    assert sql['percentiles'] == pytest.approx(numpy['percentiles'])
+    for key in ('mean', 'min', 'max', 'stddev'):
+        assert sql[key] == pytest.approx(numpy[key])
+
+
+def test_teacher_and_project_scope_agree(app, project):
+    assert score_stats._compute(teacher_id=project.teacher_id) == score_stats._compute(project_id=project.id)
+
+
+def test_grading_invalidates_cached_stats(app, client, project, monkeypatch):
+    computed = []
+    compute = score_stats._compute
+    monkeypatch.setattr(score_stats, '_compute', lambda **scope: computed.append(scope) or compute(**scope))
+    headers = auth_headers(project.teacher)
+    url = f'/api/projects/{project.id}/stats'
+
+    first = client.get(url, headers=headers).get_json()
+    assert client.get(url, headers=headers).get_json() == first
+    assert len(computed) == 1
+
+    ungraded = next(s for s in project.submissions if s.score is None)
+    response = client.post('/api/submissions/grades:batch', headers=headers,
+                           json={'grades': [{'id': ungraded.id, 'score': 10}]})
+    assert response.get_json()['updated'] == 1
+
+    second = client.get(url, headers=headers).get_json()
+    assert len(computed) == 2
+    assert (second['graded'], second['ungraded']) == (21, 1)
+    assert second['histogram'][-1]['count'] == 5
+
+    # Sửa điểm qua ORM (sự kiện after_update) cũng làm mục cache hết hạn
+    ungraded = next(s for s in project.submissions if s.score is None)
+    ungraded.score = 0
+    db.session.commit()
+    assert client.get(url, headers=headers).get_json()['graded'] == 22
+    assert len(computed) == 3
@@ -0,0 +1,99 @@
+import pytest
+
+from stem_app.models import db
+from stem_app.models.comment import Comment
+from stem_app.utils.search import build_match_query
+from tests.helpers import make_user, make_project, make_submission, auth_headers
+
+
+@pytest.fixture
+def content(app):
+    teachers = [make_user('giaovien1', is_teacher=True), make_user('giaovien2', is_teacher=True)]
+    students = [make_user('hocsinh1'), make_user('hocsinh2')]
+    active = make_project(teachers[0], title='Robot dò đường')
+    hidden = make_project(teachers[0], title='Robot bí mật', is_active=False)
+    foreign = make_project(teachers[1], title='Robot của lớp khác')
+    submissions = {
+        'mine': make_submission(active, students[0], title='Robot của em'),
+        'theirs': make_submission(active, students[1], title='Robot của bạn'),
+        'foreign': make_submission(foreign, students[1], title='Robot lớp khác'),
+    }
+    comments = {}
+    for key, submission in submissions.items():
+        comment = Comment('Robot chạy tốt', teachers[0].id, submission.id)
+        db.session.add(comment)
+        db.session.flush()
+        comments[key] = comment
+    db.session.commit()
+    return {'teachers': teachers, 'students': students, 'projects': (active, hidden, foreign),
+            'submissions': submissions, 'comments': comments}
+
+
+def _search(client, user, q='robot', **params):
+    response = client.get('/api/search', query_string={'q': q, 'limit': 50, **params},
+                          headers=auth_headers(user))
+    assert response.status_code == 200, response.get_json()
+    return {(result['type'], result['id']) for result in response.get_json()['results']}
+
+
+def test_student_sees_active_projects_and_own_work(client, content):
+    active, hidden, foreign = content['projects']
+    mine = content['submissions']['mine']
+
+    assert _search(client, content['students'][0]) == {
+        ('project', active.id), ('project', foreign.id),
+        ('submission', mine.id), ('comment', content['comments']['mine'].id),
+    }
+
+
+def test_teacher_sees_only_own_projects(client, content):
+    active, hidden, foreign = content['projects']
+    submissions, comments = content['submissions'], content['comments']
+
+    assert _search(client, content['teachers'][1]) == {
+        ('project', foreign.id), ('submission', submissions['foreign'].id),
+        ('comment', comments['foreign'].id),
+    }
+    assert _search(client, content['teachers'][0], type='project') == {
+        ('project', active.id), ('project', hidden.id),
+    }
+
+
+def test_tags_follow_is_active_and_teacher_changes(client, content):
+    active, hidden, foreign = content['projects']
+    teachers, student = content['teachers'], content['students'][0]
+
+    hidden.is_active = True
+    active.is_active = False
+    db.session.commit()
+    projects = {ref for ref in _search(client, student) if ref[0] == 'project'}
+    assert projects == {('project', hidden.id), ('project', foreign.id)}
+
+    # Chuyển dự án cho giáo viên khác: bài nộp và bình luận đi theo
+    active.teacher_id = teachers[1].id
+    db.session.commit()
+    moved = {('project', active.id), ('submission', content['submissions']['mine'].id),
+             ('comment', content['comments']['mine'].id)}
+    assert moved <= _search(client, teachers[1])
+    assert not moved & _search(client, teachers[0])
+
+
+@pytest.mark.parametrize('q, expected', [
+    ('robot', '"robot"*'),
+    ('robot dò đường', '"robot" "dò" "đường"*'),
+    # Cú pháp FTS5 của người dùng chỉ còn là các từ thường
+    ('robot" OR tags:t1 NEAR(x', '"robot" "OR" "tags" "t1" "NEAR" "x"*'),
+    ('*^-"', None),
+    ('', None),
+])
+def test_build_match_query_quotes_user_input(q, expected):
+    assert build_match_query(q) == expected
+
+
+def test_fts_syntax_in_query_cannot_widen_access(client, content):
+    student = content['students'][0]
+    teacher_id = content['teachers'][0].id
+
+    # Tự thêm điều kiện trên cột tags không mở thêm được dự án ẩn
+    results = _search(client, student, q=f'robot OR tags : t{teacher_id}')
+    assert ('project', content['projects'][1].id) not in results
@@ -0,0 +1,140 @@
+"""So sánh RowSerializer với dict được dựng từ ORM object như các handler cũ"""
+from datetime import datetime
+
+import pytest
+
+from stem_app.models import db
+from stem_app.models.comment import Comment
+from stem_app.models.project import Project
+from stem_app.models.submission import Submission
+from stem_app.utils.serializers import (
+    project_serializer, project_summary_serializer, submission_serializer,
+    submission_detail_serializer, submission_summary_serializer, comment_serializer
+)
+from tests.helpers import make_user, make_project, make_submission
+
+
+def _user_ref(user, *extra):
+    if user is None:
+        return None
+    return dict({'id': user.id, 'username': user.username},
+                **{name: getattr(user, name) for name in extra})
+
+
+def legacy_project(project):
+    return {
+        'id': project.id,
+        'title': project.title,
+        'description': project.description,
+        'deadline': project.deadline,
+        'is_active': project.is_active,
+        'created_at': project.created_at,
+        'teacher': _user_ref(project.teacher),
+        'submission_count': project.submission_count,
+    }
+
+
+def legacy_project_summary(project):
+    return {
+        'id': project.id,
+        'title': project.title,
+        'description': project.description,
+        'deadline': project.deadline,
+        'is_active': project.is_active,
+        'created_at': project.created_at,
+        'teacher_id': project.teacher_id,
+    }
+
+
+def legacy_submission(submission):
+    return {
+        'id': submission.id,
+        'title': submission.title,
+        'content': submission.content,
+        'file_path': submission.file_path,
+        'score': submission.score,
+        'feedback': submission.feedback,
+        'submitted_at': submission.submitted_at,
+        'student': _user_ref(submission.student),
+    }
+
+
+def legacy_submission_detail(submission):
+    project = submission.project
+    return dict(legacy_submission(submission), project={
+        'id': project.id,
+        'title': project.title,
+    } if project else None)
+
+
+def legacy_submission_summary(submission):
+    return {
+        'id': submission.id,
+        'title': submission.title,
+        'content': submission.content,
+        'score': submission.score,
+        'feedback': submission.feedback,
+        'submitted_at': submission.submitted_at,
+        'project_id': submission.project_id,
+        'student_id': submission.student_id,
+    }
+
+
+def legacy_comment(comment):
+    return {
+        'id': comment.id,
+        'content': comment.content,
+        'created_at': comment.created_at,
+        'user': _user_ref(comment.author, 'is_teacher'),
+    }
+
+
+@pytest.fixture
+def objects(app):
+    teacher = make_user('giaovien', is_teacher=True)
+    students = [make_user('hocsinh1'), make_user('hocsinh2')]
+    # Có và không có hạn nộp, đang mở và đã đóng, có và không có bài nộp
+    open_project = make_project(teacher, deadline=datetime(2030, 5, 1, 8, 30))
+    closed = make_project(teacher, title='Dự án đã đóng', is_active=False)
+    graded = make_submission(open_project, students[0], file_path='bao-cao.pdf')
+    graded.score = 8.5
+    graded.feedback = 'Tốt'
+    make_submission(open_project, students[1], content=None)
+    db.session.add_all([
+        Comment('Cần thêm sơ đồ', teacher.id, graded.id),
+        Comment('Em đã sửa', students[0].id, graded.id),
+    ])
+    db.session.commit()
+    db.session.expire_all()
+    return {Project: [open_project.id, closed.id],
+            Submission: [s.id for s in Submission.query],
+            Comment: [c.id for c in Comment.query]}
+
+
+@pytest.mark.parametrize('serializer, legacy, model', [
+    (project_serializer, legacy_project, Project),
+    (project_summary_serializer, legacy_project_summary, Project),
+    (submission_serializer, legacy_submission, Submission),
+    (submission_detail_serializer, legacy_submission_detail, Submission),
+    (submission_summary_serializer, legacy_submission_summary, Submission),
+    (comment_serializer, legacy_comment, Comment),
+])
+def test_serializer_matches_legacy_dict(objects, serializer, legacy, model):
+    ids = objects[model]
+    assert ids
+    for ident in ids:
+        expected = legacy(db.session.get(model, ident))
+        assert serializer.get(ident) == expected
+        # Thứ tự trường trong JSON giữ nguyên
+        assert list(serializer.get(ident)) == list(expected)
+
+    rows = db.session.execute(serializer.select().where(model.id.in_(ids)).order_by(model.id)).all()
+    assert serializer.serialize(rows) == [legacy(db.session.get(model, ident)) for ident in sorted(ids)]
+
+
+@pytest.mark.parametrize('fields', [['id'], ['title', 'teacher'], ['submission_count', 'id']])
+def test_field_selection_matches_legacy_subset(objects, fields):
+    for ident in objects[Project]:
+        expected = legacy_project(db.session.get(Project, ident))
+        result = project_serializer.get(ident, fields)
+        assert result == {name: expected[name] for name in fields}
@@ -0,0 +1,55 @@
+import threading
+
+from sqlalchemy import text
+
+from stem_app.models import db
+from stem_app.models.comment import Comment
+from tests.helpers import make_user, make_project, make_submission
+
+
+def test_pragmas_applied_to_every_connection(app):
+    tuning = app.config['SQLITE_TUNING']
+    # Kết nối mới từ pool, không phải kết nối đã dùng để tạo bảng
+    db.engine.dispose()
+    with db.engine.connect() as connection:
+        def pragma(name):
+            return connection.execute(text(f'PRAGMA {name}')).scalar()
+
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('foreign_keys') == 1
+        assert pragma('busy_timeout') == tuning.busy_timeout
+        assert pragma('synchronous') == 0  # OFF trong TestingConfig
+        assert pragma('temp_store') == 2  # MEMORY
+        assert pragma('cache_size') == tuning.cache_size
+
+
+def test_concurrent_writers_do_not_fail_with_database_locked(app):
+    teacher = make_user('giaovien', is_teacher=True)
+    student = make_user('hocsinh')
+    submission = make_submission(make_project(teacher), student)
+    user_id, submission_id = teacher.id, submission.id
+
+    threads, writes = 8, 25
+    errors = []
+    start = threading.Barrier(threads)
+
+    def writer(n):
+        with app.app_context():
+            start.wait()
+            try:
+                for i in range(writes):
+                    db.session.add(Comment(f'Nhận xét {n}-{i}', user_id, submission_id))
+                    db.session.commit()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    assert Comment.query.count() == threads * writes
@@ -0,0 +1,37 @@
+from stem_app import create_app
+from stem_app.models import db
+from stem_app.models.user import User
+
+
+def test_create_app_does_not_touch_database(tmp_path, monkeypatch):
+    db_path = tmp_path / 'test.db'
+    monkeypatch.setenv('TEST_DATABASE_URL', f'sqlite:///{db_path}')
+
+    app = create_app('testing')
+
+    # Worker khởi động không tạo bảng, không seed và không mở kết nối (SQLite tạo file
+    # ngay khi kết nối)
+    assert not db_path.exists()
+    with app.app_context():
+        assert db.engine.pool.checkedout() == 0
+    assert not db_path.exists()
+
+
+def test_bootstrap_command_creates_schema_and_sample_data(tmp_path, monkeypatch):
+    monkeypatch.setenv('TEST_DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['stem', 'bootstrap'])
+    assert result.exit_code == 0, result.output
+    assert 'Đã tạo dữ liệu mẫu thành công' in result.output
+
+    # Chạy lại không tạo trùng dữ liệu
+    result = runner.invoke(args=['stem', 'bootstrap'])
+    assert result.exit_code == 0, result.output
+    assert 'Dữ liệu mẫu đã tồn tại' in result.output
+
+    with app.app_context():
+        assert User.query.count() == 2
+        db.engine.dispose()
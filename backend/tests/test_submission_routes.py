@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from tests.helpers import make_user, make_project, make_submission, login
+
+
+@pytest.fixture
+def legacy_file(app):
+    teacher = make_user('giaovien', is_teacher=True)
+    student = make_user('hocsinh')
+    submission = make_submission(make_project(teacher), student, file_path='bao-cao.txt')
+    # File lưu trực tiếp trong UPLOAD_FOLDER (trước khi có kho blob)
+    path = os.path.join(app.config['UPLOAD_FOLDER'], submission.file_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'noi dung bai nop')
+    return {'teacher': teacher, 'student': student, 'url': f'/submissions/download/{submission.file_path}'}
+
+
+@pytest.mark.parametrize('user', ['student', 'teacher'])
+def test_download_allowed_for_owner_and_project_teacher(client, legacy_file, user):
+    login(client, legacy_file[user])
+
+    response = client.get(legacy_file['url'])
+
+    assert response.status_code == 200
+    assert response.get_data() == b'noi dung bai nop'
+
+
+@pytest.mark.parametrize('is_teacher', [True, False])
+def test_download_denied_for_other_users(client, legacy_file, is_teacher):
+    login(client, make_user('nguoikhac', is_teacher=is_teacher))
+
+    response = client.get(legacy_file['url'])
+
+    # Giáo viên của dự án khác cũng bị từ chối
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/projects/')
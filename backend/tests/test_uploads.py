@@ -0,0 +1,59 @@
+import io
+import os
+
+import pytest
+
+from stem_app.models.blob import Blob
+from stem_app.utils.upload_policy import UploadRules, UploadRejected
+from tests.helpers import (
+    make_user, make_project, make_submission, auth_headers, PNG_BYTES, PDF_BYTES
+)
+
+
+@pytest.fixture
+def submission(app):
+    teacher = make_user('giaovien', is_teacher=True)
+    student = make_user('hocsinh')
+    return make_submission(make_project(teacher), student), auth_headers(student)
+
+
+def _upload(client, submission, content, filename):
+    submission, headers = submission
+    return client.put(
+        f'/api/submissions/{submission.id}',
+        headers=headers,
+        data={'file': (io.BytesIO(content), filename)},
+        content_type='multipart/form-data',
+    )
+
+
+@pytest.mark.parametrize('content, filename', [(PNG_BYTES, 'so-do.png'), (PDF_BYTES, 'bao-cao.pdf')])
+def test_upload_matching_extension_is_stored(client, submission, content, filename):
+    response = _upload(client, submission, content, filename)
+
+    assert response.status_code == 200
+    assert Blob.query.count() == 1
+
+
+@pytest.mark.parametrize('content, filename', [(PNG_BYTES, 'a.pdf'), (PDF_BYTES, 'a.png')])
+def test_upload_with_mismatched_extension_is_rejected(app, client, submission, content, filename):
+    response = _upload(client, submission, content, filename)
+
+    assert response.status_code == 415
+    assert Blob.query.count() == 0
+    # Không để lại file tạm hay blob trên đĩa
+    for _, _, files in os.walk(app.config['UPLOAD_FOLDER']):
+        assert files == []
+
+
+def test_mime_must_belong_to_the_file_extension():
+    rules = UploadRules({'png', 'pdf', 'txt', 'py'})
+
+    assert rules.mime_allowed('image/png', 'so-do.PNG')
+    assert rules.mime_allowed('text/plain', 'bai.py')
+    assert not rules.mime_allowed('image/png', 'a.pdf')
+    assert not rules.mime_allowed('application/pdf', 'a.txt')
+    # Phần mở rộng không được bật
+    assert not rules.mime_allowed('image/gif', 'a.gif')
+    with pytest.raises(UploadRejected):
+        rules.check_mime('image/png', 'a.pdf')
@@ -1,18 +1,13 @@
-from flask import current_app
-from flask_mail import Message
-from threading import Thread
-from app import mail
-
-def send_async_email(app, msg):
-    with app.app_context():
-        mail.send(msg)
+from flask import current_app, url_for
+from stem_app.utils.mailer import send_email as enqueue_email
 
 def send_email(subject, sender, recipients, text_body, html_body):
-    msg = Message(subject, sender=sender, recipients=recipients)
-    msg.body = text_body
-    msg.html = html_body
-    Thread(target=send_async_email,
-           args=(current_app._get_current_object(), msg)).start()
+    """Xếp email vào hàng đợi gửi nền (xem stem_app/utils/jobs.py)
+
+    Không tạo thread riêng cho mỗi email: các worker cố định của hàng đợi gửi
+    email theo lô, dùng chung kết nối SMTP và tự gửi lại khi lỗi.
+    """
+    enqueue_email(subject, recipients, text_body, html_body, sender=sender)
 
 def send_password_reset_email(user):
     token = user.get_reset_password_token()
@@ -30,4 +25,4 @@ Nếu bạn không yêu cầu đặt lại mật khẩu, vui lòng bỏ qua emai
     Đặt lại mật khẩu
 </a></p>
 <p>Nếu bạn không yêu cầu đặt lại mật khẩu, vui lòng bỏ qua email này.</p>
-''') 
\ No newline at end of file
+''')
@@ -1,27 +1,13 @@
 from wtforms.validators import ValidationError
-import os
-from werkzeug.utils import secure_filename
-
-def allowed_file(filename, allowed_extensions):
-    """Kiểm tra phần mở rộng của file có được phép không
-    
-    Args:
-        filename: Tên file cần kiểm tra
-        allowed_extensions: Set các phần mở rộng được phép
-        
-    Returns:
-        bool: True nếu file được phép, False nếu không
-    """
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in allowed_extensions
+from stem_app.utils.upload_policy import UploadRejected, check_upload
 
 def validate_file_upload(form, field):
     """Validator cho file upload
     
-    Kiểm tra:
+    Kiểm tra theo chính sách upload chung (stem_app.utils.upload_policy):
     - File có tồn tại
-    - Phần mở rộng file hợp lệ
-    - Kích thước file trong giới hạn
+    - Phần mở rộng file hợp lệ (Config.ALLOWED_EXTENSIONS)
+    - Kích thước file trong giới hạn (Content-Length hoặc seek/tell, không đọc nội dung)
     
     Args:
         form: Form chứa field
@@ -33,14 +19,10 @@ def validate_file_upload(form, field):
     if not field.data:
         raise ValidationError('Vui lòng chọn file để tải lên.')
         
-    file = field.data
-    if not allowed_file(file.filename, {'pdf', 'doc', 'docx', 'txt'}):
-        raise ValidationError('Loại file không được phép. Chỉ chấp nhận PDF, DOC, DOCX, TXT.')
-        
-    # Kiểm tra kích thước file (max 10MB)
-    if len(file.read()) > 10 * 1024 * 1024:
-        raise ValidationError('File quá lớn. Kích thước tối đa là 10MB.')
-    file.seek(0)  # Reset con trỏ file
+    try:
+        check_upload(field.data)
+    except UploadRejected as e:
+        raise ValidationError(e.message)
 
 def validate_unique_username(form, field):
     """Validator kiểm tra username có bị trùng không